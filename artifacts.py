@@ -0,0 +1,300 @@
+# === スクリーンショット・HTMLの非同期保存 ===
+# ブラウザからは画像データ(base64)とHTMLを受け取るだけにして、
+# デコード・縮小・圧縮・ディスクへの書き込みは裏のワーカースレッドで行う
+# → 分析が終わったらすぐにブラウザをプールに返せる
+# - 全体スクリーンショット: Chrome DevTools の Page.captureScreenshot(captureBeyondViewport)
+# - 縮小・WebP/JPEG変換: Pillowが必要(PNGをそのまま保存するだけなら不要)
+# - 保存先は screenshot_path(url) でURLごとに決める(並列に分析しても上書きし合わない)
+# 例: writer = get_default_writer()
+#     writer.save_screenshot(driver, screenshot_path(url), full_page=True, max_width=800)
+#     writer.flush()   # 全部書き終わるまで待つ
+
+# base64のデコード用
+import base64
+# URLから保存先のファイル名を作るため
+import hashlib
+# 画像データをファイルのように扱うため
+import io
+# ファイル操作用
+import os
+# ワーカーへの受け渡し用
+import queue
+# 裏で書き込むため
+import threading
+# 結果(保存したパス・サイズ)を後から受け取るため
+from concurrent.futures import Future
+# ファイル名にホスト名を入れるため
+from urllib.parse import urlsplit
+# プログラム終了時に書き残しを保存するため
+import atexit
+# ログ出力用
+import logging
+
+from snapshot_store import get_default_store
+
+logger = logging.getLogger(__name__)
+
+# 溜めておける仕事の数(超えたら submit が空くまで待つ)
+DEFAULT_QUEUE_SIZE = 32
+# Pillowで保存するときの形式名
+IMAGE_FORMATS = {'.png': 'PNG', '.webp': 'WEBP', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+# スクリーンショットのデフォルトの保存先
+DEFAULT_SCREENSHOT_DIR = 'screenshots'
+
+
+def screenshot_path(url, directory=None, suffix='.png'):
+    """
+    URLからスクリーンショットの保存先を決める(ページごとに別のファイルになる)
+
+    環境変数 SCREENSHOT_DIR で保存先のディレクトリを変えられる。
+
+    Args:
+        url (str): ページのURL
+        directory (str): 保存先ディレクトリ(省略時は SCREENSHOT_DIR か DEFAULT_SCREENSHOT_DIR)
+        suffix (str): 拡張子(.png / .webp / .jpg)
+
+    Returns:
+        str: 例 'screenshots/www.coorikuya.com_3f2a9c1d0b4e.png'
+    """
+    directory = directory or os.environ.get('SCREENSHOT_DIR', DEFAULT_SCREENSHOT_DIR)
+    host = urlsplit(url).hostname or 'local'
+    digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(directory, f"{host}_{digest}{suffix}")
+
+
+def capture_screenshot(driver, full_page=False):
+    """
+    ブラウザからスクリーンショットをbase64のまま取得する(デコードはしない)
+
+    Args:
+        driver: Chromeドライバー
+        full_page (bool): Trueならスクロールしないと見えない部分も含めたページ全体
+
+    Returns:
+        str: PNG画像のbase64文字列
+    """
+    if not full_page:
+        return driver.get_screenshot_as_base64()
+    # ページ全体の大きさを調べて、その範囲を1枚で撮る
+    metrics = driver.execute_cdp_cmd('Page.getLayoutMetrics', {})
+    size = metrics.get('cssContentSize') or metrics['contentSize']
+    result = driver.execute_cdp_cmd('Page.captureScreenshot', {
+        'format': 'png',
+        'captureBeyondViewport': True,
+        'clip': {'x': 0, 'y': 0, 'width': size['width'], 'height': size['height'], 'scale': 1},
+    })
+    return result['data']
+
+
+def encode_screenshot(data, path, max_width=None, quality=80):
+    """
+    base64のスクリーンショットをデコード・縮小・変換してファイルに書く(ワーカーで実行)
+
+    Args:
+        data (str): capture_screenshot() の戻り値
+        path (str): 保存先(拡張子 .png / .webp / .jpg で形式が決まる)
+        max_width (int): これより幅が広ければ縦横比を保って縮小する
+        quality (int): WebP/JPEGの画質
+
+    Returns:
+        dict: path, width, height, bytes
+    """
+    png = base64.b64decode(data)
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in IMAGE_FORMATS:
+        raise ValueError(f"スクリーンショットの拡張子は {', '.join(IMAGE_FORMATS)} のどれかにしてください: {path}")
+
+    if suffix == '.png' and not max_width:
+        # 変換不要ならブラウザのPNGをそのまま書く
+        _write_atomic(path, png)
+        return {'path': path, 'bytes': len(png)}
+
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("スクリーンショットの縮小・変換には Pillow をインストールしてください: pip install Pillow")
+    image = Image.open(io.BytesIO(png))
+    if max_width and image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.LANCZOS)
+    if IMAGE_FORMATS[suffix] == 'JPEG':
+        image = image.convert('RGB')
+    out = io.BytesIO()
+    image.save(out, IMAGE_FORMATS[suffix], quality=quality, optimize=True)
+    _write_atomic(path, out.getvalue())
+    return {'path': path, 'width': image.width, 'height': image.height, 'bytes': out.tell()}
+
+
+def _write_atomic(path, data):
+    """一時ファイルに書いてから名前を付け替える(書きかけのファイルを残さない)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ArtifactWriter:
+    """
+    スクリーンショット・HTMLスナップショットを裏のスレッドで保存する
+
+    ブラウザが必要な「取得」だけを呼び出し元で行い、残りはキューに入れてすぐ戻る。
+    キューがいっぱいのときは空くまで待つ(メモリを使いすぎないように)。
+
+    Args:
+        workers (int): 書き込みスレッドの数
+        queue_size (int): 溜めておける仕事の数
+        store: HTMLの保存先 SnapshotStore(省略時は共有のデフォルト)
+
+    Example:
+        >>> writer = ArtifactWriter()
+        >>> future = writer.save_screenshot(driver, 'shot.webp', max_width=800)
+        >>> pool.release(session)   # すぐ返せる
+        >>> future.result()['bytes']
+    """
+
+    def __init__(self, workers=1, queue_size=DEFAULT_QUEUE_SIZE, store=None):
+        self.store = store
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        # 統計
+        self.completed = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f'artifact-writer-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        """キューから仕事を取り出して実行する(ワーカースレッド)"""
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                future, func, args = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = func(*args)
+                except Exception as e:
+                    logger.error(f"保存に失敗しました: {e}")
+                    with self._lock:
+                        self.failed += 1
+                    future.set_exception(e)
+                else:
+                    with self._lock:
+                        self.completed += 1
+                        self.bytes_written += result.get('stored_bytes', result.get('bytes', 0))
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, func, *args):
+        """
+        保存処理をキューに入れる
+
+        Args:
+            func: 裏で実行する関数(dictを返す)
+            *args: 関数の引数
+
+        Returns:
+            Future: 関数の戻り値を受け取るためのFuture
+        """
+        if self._closed:
+            raise RuntimeError("ArtifactWriter は閉じられています")
+        future = Future()
+        self._queue.put((future, func, args))
+        return future
+
+    def save_screenshot(self, driver, path, full_page=False, max_width=None, quality=80):
+        """
+        スクリーンショットを撮り、変換・保存はキューに入れる
+
+        Args:
+            driver: Chromeドライバー
+            path (str): 保存先(.png / .webp / .jpg)
+            full_page (bool): ページ全体を撮るか
+            max_width (int): 縮小後の最大幅(省略時は縮小しない)
+            quality (int): WebP/JPEGの画質
+
+        Returns:
+            Future: encode_screenshot() の結果
+        """
+        data = capture_screenshot(driver, full_page=full_page)
+        return self.submit(encode_screenshot, data, path, max_width, quality)
+
+    def save_snapshot(self, url, source):
+        """
+        HTMLソースの圧縮保存をキューに入れる
+
+        保存先のパスはハッシュから決まるので、書き込みを待たずに分かる。
+
+        Args:
+            url (str): ページのURL
+            source (str): HTMLソース
+
+        Returns:
+            tuple: (保存先のパス, 元のバイト数, SnapshotStore.write() の結果のFuture)
+        """
+        store = self.store or get_default_store()
+        hashed = store.digest(source)
+        future = self.submit(store.write, url, source, hashed)
+        return store.path_for(hashed[0]), hashed[1], future
+
+    def flush(self):
+        """キューに入っている仕事が全て終わるまで待つ"""
+        self._queue.join()
+
+    def close(self):
+        """書き残しを全て保存してからスレッドを止める"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self):
+        """
+        保存の状況を返す
+
+        Returns:
+            dict: pending, completed, failed, bytes_written
+        """
+        with self._lock:
+            return {
+                'pending': self._queue.unfinished_tasks,
+                'completed': self.completed,
+                'failed': self.failed,
+                'bytes_written': self.bytes_written,
+            }
+
+
+# プログラム全体で共有する書き込み係(get_default_writer()で取得)
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def get_default_writer():
+    """
+    共有のArtifactWriterを返す(初回呼び出し時に作成)
+
+    プログラム終了時には書き残しを全て保存してから終わる。
+
+    Returns:
+        ArtifactWriter: 共有の書き込み係
+    """
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = ArtifactWriter()
+            atexit.register(_default_writer.close)
+    return _default_writer
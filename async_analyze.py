@@ -0,0 +1,653 @@
+# === asyncio版の構造分析(DevTools Protocol を websocket で直接使う) ===
+# sctest.py / toku.py は Selenium の同期APIなので、driver.get・待機・page_source の間
+# ワーカースレッドが何もせずに待っている。ここでは Chrome の DevTools Protocol(CDP)に
+# websocket で直接つなぎ、1つのイベントループで複数のタブを同時に動かす
+# - 1つのブラウザに concurrency 個のタブを開き、各タブが次々とURLを処理する
+# - 結果のキューに上限があるので、受け取る側が遅ければタブも新しいページを開かずに待つ(背圧)
+# - ページごとのタイムアウト・途中でやめた(async for を抜けた)ときはタブとブラウザを必ず閉じる
+# - HTMLの解析(CPUを使う部分)はプロセスプールで行い、イベントループを止めない
+# 必要: pip install websockets  (Chromeは CHROME_BINARY または PATH 上の google-chrome / chromium)
+# 例: python async_analyze.py urls.txt --concurrency 8 --output results.ndjson
+#     python async_analyze.py urls.txt --cdp ws://127.0.0.1:9222/devtools/browser/...  (起動済みのChromeを使う)
+
+# 非同期処理の本体
+import asyncio
+# CDPのメッセージはJSON
+import json
+# ファイル操作・環境変数用
+import os
+# Chromeの場所を探すため
+import shutil
+# 一時的なプロファイルディレクトリ用
+import tempfile
+# 経過時間の計測用
+import time
+# 解析をプロセスプールで行うため
+from concurrent.futures import ProcessPoolExecutor
+# プロセス終了時にプロセスプールを止めるため
+import atexit
+# プロセスプールを1回だけ作るため
+import threading
+# ログ出力用
+import logging
+
+from html_parsers import collect_stats
+from page_ready import ReadinessReport
+from fetch_profile import get_fetch_profile
+from report import ConsoleSink, emit_report
+from artifacts import get_default_writer
+from dom_extract import COUNT_SCRIPT
+from sctest import build_structure_report, render_structure_report, SELENIUM_SELECTORS
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Chromeの実行ファイルの候補(CHROME_BINARY が無いとき PATH から探す)
+CHROME_CANDIDATES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+# Chromeの起動を待つ最大秒数
+LAUNCH_TIMEOUT = 20
+# driver_pool.create_chrome_options と同じ User-Agent
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+class CdpError(RuntimeError):
+    """CDPのコマンドがエラーを返した・接続が切れたときのエラー"""
+
+
+class CdpConnection:
+    """
+    DevTools Protocol の websocket 接続1本(全タブで共有する)
+
+    コマンドには番号を付けて送り、返事は読み取り用のタスクが番号で振り分ける。
+    イベントは subscribe() したキューに配る。
+
+    Example:
+        >>> connection = await CdpConnection.connect(ws_url)
+        >>> version = await connection.send('Browser.getVersion')
+    """
+
+    def __init__(self, websocket):
+        self._ws = websocket
+        self._next_id = 0
+        # 番号 → 返事を待っているFuture
+        self._pending = {}
+        # (イベント名, セッションID) → キューのリスト
+        self._subscribers = {}
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    @classmethod
+    async def connect(cls, ws_url):
+        """
+        websocket でブラウザにつなぐ
+
+        Args:
+            ws_url (str): ws://127.0.0.1:<port>/devtools/browser/<id>
+
+        Returns:
+            CdpConnection: 接続
+        """
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("asyncio版の分析を使うには websockets をインストールしてください: pip install websockets")
+        # page_source は数MBになることがあるので受信サイズの上限を外す
+        websocket = await websockets.connect(ws_url, max_size=None)
+        return cls(websocket)
+
+    async def send(self, method, params=None, session_id=None):
+        """
+        コマンドを送って返事を待つ
+
+        Args:
+            method (str): 例: 'Page.navigate'
+            params (dict): パラメーター
+            session_id (str): タブのセッションID(ブラウザ全体へのコマンドなら省略)
+
+        Returns:
+            dict: 返事の result
+
+        Raises:
+            CdpError: エラーが返ってきた・接続が切れた場合
+        """
+        self._next_id += 1
+        message = {'id': self._next_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        try:
+            await self._ws.send(json.dumps(message))
+            return await future
+        finally:
+            self._pending.pop(message['id'], None)
+
+    def subscribe(self, method, session_id=None):
+        """
+        イベントを受け取るキューを登録する(使い終わったら unsubscribe() する)
+
+        Args:
+            method (str): 例: 'Page.lifecycleEvent'
+            session_id (str): タブのセッションID
+
+        Returns:
+            asyncio.Queue: イベントの params が入るキュー
+        """
+        queue = asyncio.Queue()
+        self._subscribers.setdefault((method, session_id), []).append(queue)
+        return queue
+
+    def unsubscribe(self, method, queue, session_id=None):
+        queues = self._subscribers.get((method, session_id), [])
+        if queue in queues:
+            queues.remove(queue)
+
+    async def _read(self):
+        """届いたメッセージを返事とイベントに振り分ける"""
+        error = CdpError('DevTools の接続が切れました')
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if 'id' in message:
+                    future = self._pending.get(message['id'])
+                    if future is None or future.done():
+                        continue
+                    if 'error' in message:
+                        future.set_exception(CdpError(f"{message['error'].get('message')} ({message['error'].get('code')})"))
+                    else:
+                        future.set_result(message.get('result', {}))
+                else:
+                    key = (message.get('method'), message.get('sessionId'))
+                    for queue in self._subscribers.get(key, ()):
+                        queue.put_nowait(message.get('params', {}))
+        except Exception as e:
+            error = CdpError(f'DevTools の接続でエラーが発生しました: {e}')
+        finally:
+            # 返事を待っているコマンドを全てエラーにする(待ち続けないように)
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self):
+        await self._ws.close()
+        self._reader.cancel()
+        try:
+            await self._reader
+        except asyncio.CancelledError:
+            pass
+
+
+class AsyncTab:
+    """
+    ブラウザのタブ1つ(CDPのターゲットに flatten モードでつないだセッション)
+
+    Attributes:
+        target_id (str): ターゲットID
+        session_id (str): セッションID
+    """
+
+    def __init__(self, connection, target_id, session_id):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+
+    async def send(self, method, params=None):
+        """このタブにコマンドを送る"""
+        return await self.connection.send(method, params, self.session_id)
+
+    async def setup(self, profile):
+        """ライフサイクルイベント・User-Agent・取得プロファイルのブロックを設定する"""
+        await self.send('Page.enable')
+        await self.send('Page.setLifecycleEventsEnabled', {'enabled': True})
+        await self.send('Network.enable')
+        await self.send('Network.setUserAgentOverride', {'userAgent': USER_AGENT})
+        patterns = profile.blocked_patterns()
+        if patterns:
+            await self.send('Network.setBlockedURLs', {'urls': patterns})
+
+    async def navigate(self, url, timeout=15):
+        """
+        ページを開き、通信がほぼ落ち着く(networkAlmostIdle)まで待つ
+
+        タイムアウトしても例外にはせず、ReadinessReport に記録して続ける(wait_for_page と同じ)。
+
+        Args:
+            url (str): 開くURL
+            timeout (float): 待つ最大秒数
+
+        Returns:
+            ReadinessReport: 待機結果
+
+        Raises:
+            CdpError: ページを開けなかった場合(DNSエラーなど)
+        """
+        report = ReadinessReport(url)
+        started = time.monotonic()
+        events = self.connection.subscribe('Page.lifecycleEvent', self.session_id)
+        try:
+            result = await self.send('Page.navigate', {'url': url})
+            if result.get('errorText'):
+                raise CdpError(f"ページを開けません: {url} ({result['errorText']})")
+            loader_id = result.get('loaderId')
+            try:
+                # 同じ文書内の移動(#だけ違う)なら loaderId が無く、待つものも無い
+                while loader_id:
+                    remaining = timeout - (time.monotonic() - started)
+                    event = await asyncio.wait_for(events.get(), max(remaining, 0.001))
+                    if event.get('loaderId') == loader_id and event.get('name') == 'networkAlmostIdle':
+                        break
+            except asyncio.TimeoutError:
+                report.timed_out.append('network_almost_idle')
+        finally:
+            self.connection.unsubscribe('Page.lifecycleEvent', events, self.session_id)
+        report.total = report.timings['network_almost_idle'] = time.monotonic() - started
+        return report
+
+    async def evaluate(self, expression):
+        """
+        JavaScriptの式を評価して値を返す
+
+        Args:
+            expression (str): 式
+
+        Returns:
+            JSONにできる値
+        """
+        result = await self.send('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+        if 'exceptionDetails' in result:
+            raise CdpError(f"スクリプトのエラー: {result['exceptionDetails'].get('text')}")
+        return result['result'].get('value')
+
+    async def call(self, body, *args):
+        """
+        execute_script と同じく、arguments を使う関数の本体を実行する
+
+        Args:
+            body (str): 関数の本体(return で値を返す)
+            *args: arguments に渡す値(JSONにできるもの)
+
+        Returns:
+            JSONにできる値
+        """
+        return await self.evaluate(f'(function(){{{body}\n}}).apply(null, {json.dumps(list(args))})')
+
+    async def close(self):
+        await self.connection.send('Target.closeTarget', {'targetId': self.target_id})
+
+
+def find_chrome():
+    """
+    Chromeの実行ファイルを探す
+
+    Returns:
+        str: 実行ファイルのパス
+
+    Raises:
+        FileNotFoundError: 見つからない場合
+    """
+    path = os.environ.get('CHROME_BINARY')
+    if path:
+        return path
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise FileNotFoundError("Chromeが見つかりません。CHROME_BINARY に実行ファイルを指定してください")
+
+
+class AsyncBrowser:
+    """
+    asyncio から使うChrome(1プロセスに複数のタブ)
+
+    Args:
+        connection (CdpConnection): ブラウザへの接続
+        profile: 取得プロファイル名 / FetchProfile(省略時は環境変数 FETCH_PROFILE)
+        process: launch() で起動したChromeのプロセス(connect() ならNone)
+        user_data_dir (str): launch() で作った一時プロファイル(閉じるときに消す)
+
+    Example:
+        >>> async with await AsyncBrowser.launch() as browser:
+        ...     tab = await browser.new_tab()
+        ...     await tab.navigate(url)
+    """
+
+    def __init__(self, connection, profile=None, process=None, user_data_dir=None):
+        self.connection = connection
+        self.profile = get_fetch_profile(profile)
+        self.process = process
+        self.user_data_dir = user_data_dir
+
+    @classmethod
+    async def launch(cls, headless=True, profile=None, chrome=None):
+        """
+        Chromeを起動してつなぐ
+
+        Args:
+            headless (bool): Trueなら画面を出さない
+            profile: 取得プロファイル名 / FetchProfile
+            chrome (str): Chromeの実行ファイル(省略時は find_chrome())
+
+        Returns:
+            AsyncBrowser: 起動したブラウザ
+        """
+        user_data_dir = tempfile.mkdtemp(prefix='async_chrome_')
+        args = [
+            chrome or find_chrome(),
+            '--remote-debugging-port=0',
+            f'--user-data-dir={user_data_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-gpu',
+            '--no-sandbox',
+            '--window-size=1920,1080',
+            'about:blank',
+        ]
+        if headless:
+            args.insert(1, '--headless=new')
+        with span('browser.start'):
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            try:
+                ws_url = await cls._wait_for_port(user_data_dir, process)
+                connection = await CdpConnection.connect(ws_url)
+            except BaseException:
+                process.kill()
+                await process.wait()
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+                raise
+        return cls(connection, profile=profile, process=process, user_data_dir=user_data_dir)
+
+    @staticmethod
+    async def _wait_for_port(user_data_dir, process):
+        """Chromeが DevToolsActivePort に書くポート番号を待つ"""
+        path = os.path.join(user_data_dir, 'DevToolsActivePort')
+        deadline = time.monotonic() + LAUNCH_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.returncode is not None:
+                raise CdpError(f"Chromeが起動直後に終了しました(終了コード {process.returncode})")
+            try:
+                with open(path, encoding='utf-8') as f:
+                    lines = f.read().split()
+            except FileNotFoundError:
+                lines = []
+            if len(lines) >= 2:
+                return f'ws://127.0.0.1:{lines[0]}{lines[1]}'
+            await asyncio.sleep(0.05)
+        raise CdpError(f"Chromeの起動が{LAUNCH_TIMEOUT}秒以内に終わりませんでした")
+
+    @classmethod
+    async def connect(cls, ws_url, profile=None):
+        """
+        起動済みのChrome(--remote-debugging-port 付き)につなぐ
+
+        Args:
+            ws_url (str): ws://.../devtools/browser/<id>
+            profile: 取得プロファイル名 / FetchProfile
+
+        Returns:
+            AsyncBrowser: つないだブラウザ(close() してもChrome自体は終了しない)
+        """
+        return cls(await CdpConnection.connect(ws_url), profile=profile)
+
+    async def new_tab(self):
+        """
+        新しいタブを開く
+
+        Returns:
+            AsyncTab: 設定済みのタブ
+        """
+        target = await self.connection.send('Target.createTarget', {'url': 'about:blank'})
+        attached = await self.connection.send(
+            'Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        tab = AsyncTab(self.connection, target['targetId'], attached['sessionId'])
+        await tab.setup(self.profile)
+        return tab
+
+    async def close(self):
+        """接続を閉じ、launch() で起動したChromeなら終了させる"""
+        if self.process is not None and self.process.returncode is None:
+            try:
+                await asyncio.wait_for(self.connection.send('Browser.close'), 5)
+            except (CdpError, asyncio.TimeoutError):
+                self.process.kill()
+            await self.process.wait()
+        await self.connection.close()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+
+# HTMLの解析に使うプロセスプール(get_parse_executor()で取得)
+_parse_executor = None
+_parse_executor_lock = threading.Lock()
+
+
+def get_parse_executor():
+    """
+    HTMLの解析用の共有プロセスプールを返す(初回呼び出し時に作成)
+
+    環境変数 PARSE_WORKERS でプロセス数を指定できる(省略時はCPU数)。
+
+    Returns:
+        ProcessPoolExecutor: プロセスプール
+    """
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            workers = int(os.environ.get('PARSE_WORKERS') or 0) or None
+            _parse_executor = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(_parse_executor.shutdown, cancel_futures=True)
+    return _parse_executor
+
+
+async def analyze_page_async(tab, url, sinks=None, executor=None, timeout=15):
+    """
+    タブで1ページ分のHTML構造を分析する(sctest.analyze_page の asyncio版)
+
+    Args:
+        tab (AsyncTab): 使うタブ
+        url (str): 分析するURL
+        sinks: 結果の出力先(省略時は画面表示)
+        executor: HTMLを解析するExecutor(省略時は共有のプロセスプール)
+        timeout (float): 読み込みを待つ最大秒数
+
+    Returns:
+        Report: 【1】〜【15】の分析結果(スクリーンショットは撮らない)
+    """
+    if sinks is None:
+        sinks = [ConsoleSink(render_structure_report)]
+    if executor is None:
+        executor = get_parse_executor()
+    loop = asyncio.get_running_loop()
+
+    logger.info(f"アクセス中: {url}")
+    with span('driver.get', url=url):
+        readiness = await tab.navigate(url, timeout=timeout)
+    title, current_url = await tab.evaluate('[document.title, location.href]')
+    with span('page_source') as s:
+        page_source = await tab.evaluate(
+            "(document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '')"
+            " + document.documentElement.outerHTML")
+        s.set(chars=len(page_source))
+
+    # 木を作らない最速のパーサーで【1】〜【13】の数を集計(別プロセスで行いイベントループを止めない)
+    with span('dom_stats'):
+        stats = await loop.run_in_executor(executor, collect_stats, page_source)
+    with span('sections.1-13'):
+        report = build_structure_report(stats, url, base_url=current_url)
+    report.meta.update({
+        'title': title,
+        'current_url': current_url,
+        'readiness': readiness.to_dict(),
+        'extraction': 'source',
+        'transport': 'cdp',
+    })
+
+    # === 14. HTML全体を保存(裏で圧縮して保存) ===
+    path, size, _ = get_default_writer().save_snapshot(url, page_source)
+    report.add_section('14', 'HTMLソース保存', {'path': path, 'bytes': size})
+
+    # === 15. ブラウザ上のDOMで直接数える ===
+    try:
+        counts = await tab.call(COUNT_SCRIPT, list(SELENIUM_SELECTORS.values()))
+        selenium_data = {key: counts[selector] for key, selector in SELENIUM_SELECTORS.items()}
+    except CdpError as e:
+        selenium_data = {'error': str(e)}
+    report.add_section('15', 'Selenium要素確認', selenium_data)
+
+    emit_report(report, sinks)
+    return report
+
+
+async def analyze_site_structure_async(url, browser=None, sinks=None, executor=None, timeout=15):
+    """
+    サイトのHTML構造を分析する(sctest.analyze_site_structure の asyncio版)
+
+    Args:
+        url (str): 分析するURL
+        browser (AsyncBrowser): 使うブラウザ(省略時はヘッドレスで起動して最後に閉じる)
+        sinks: 結果の出力先(省略時は画面表示)
+        executor: HTMLを解析するExecutor(省略時は共有のプロセスプール)
+        timeout (float): 読み込みを待つ最大秒数
+
+    Returns:
+        Report: 分析結果
+
+    Example:
+        >>> report = asyncio.run(analyze_site_structure_async('https://www.coorikuya.com/'))
+    """
+    own_browser = browser is None
+    if own_browser:
+        browser = await AsyncBrowser.launch()
+    try:
+        tab = await browser.new_tab()
+        try:
+            return await analyze_page_async(tab, url, sinks=sinks, executor=executor, timeout=timeout)
+        finally:
+            await tab.close()
+    finally:
+        if own_browser:
+            await browser.close()
+
+
+async def analyze_many_async(urls, concurrency=4, browser=None, executor=None, page_timeout=60,
+                             queue_size=None):
+    """
+    複数URLを1つのブラウザの複数タブで同時に分析し、終わった順に結果を返す(非同期ジェネレーター)
+
+    - タブは concurrency 個。各タブは1ページ終わるとそのまま次のURLを開く
+    - 結果のキューは queue_size 件まで。受け取る側が遅いとタブは次のページを開かずに待つ
+    - 1ページが page_timeout 秒を超えたら打ち切って失敗にする
+    - async for を途中で抜けると、動いているページを取り消してタブ・ブラウザを閉じる
+
+    Args:
+        urls: 分析するURLの並び
+        concurrency (int): 同時に開くタブの数
+        browser (AsyncBrowser): 使うブラウザ(省略時はヘッドレスで起動して最後に閉じる)
+        executor: HTMLを解析するExecutor(省略時は共有のプロセスプール)
+        page_timeout (float): 1ページの最大秒数(読み込み・解析を含む)
+        queue_size (int): 結果のキューの上限(省略時は concurrency)
+
+    Yields:
+        dict: url, ok, elapsed と result または error(batch_crawl と同じ形)
+    """
+    own_browser = browser is None
+    if own_browser:
+        browser = await AsyncBrowser.launch()
+    pending = iter(urls)
+    results = asyncio.Queue(maxsize=queue_size or concurrency)
+
+    async def worker():
+        tab = await browser.new_tab()
+        try:
+            for url in pending:
+                started = time.monotonic()
+                try:
+                    report = await asyncio.wait_for(
+                        analyze_page_async(tab, url, sinks=(), executor=executor), page_timeout)
+                except Exception as e:
+                    # 読み込み・タイムアウトに限らず、解析のプロセスプールが壊れた・【15】が欠けたなども
+                    # そのページだけの失敗にして次のURLへ進む(crawl_batch と同じ)
+                    logger.warning(f"失敗: {url} - {e!r}")
+                    record = {'url': url, 'ok': False, 'error': repr(e)}
+                else:
+                    record = {'url': url, 'ok': True, 'result': report.to_dict()}
+                record['elapsed'] = round(time.monotonic() - started, 3)
+                # キューが一杯なら受け取られるまで待つ(その間は次のページを開かない)
+                await results.put(record)
+        finally:
+            try:
+                await tab.close()
+            except CdpError:
+                pass
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(concurrency, 1))]
+    done = asyncio.gather(*workers)
+    # 途中でやめたときの取り消しを「取り出されなかった例外」として警告させない
+    done.add_done_callback(lambda future: future.cancelled() or future.exception())
+    getter = None
+    try:
+        while True:
+            getter = asyncio.create_task(results.get())
+            finished, _ = await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in finished:
+                yield getter.result()
+                continue
+            getter.cancel()
+            # ワーカーが全て終わった(またはタブを開けずに止まった)ら残りを出して終わる
+            while not results.empty():
+                yield results.get_nowait()
+            done.result()
+            break
+    finally:
+        if getter is not None:
+            getter.cancel()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if own_browser:
+            await browser.close()
+
+
+async def _main(args):
+    from batch_crawl import load_urls
+    from report import open_sink
+
+    urls = load_urls(args.source)
+    browser = await AsyncBrowser.connect(args.cdp) if args.cdp else \
+        await AsyncBrowser.launch(headless=not args.headed)
+    sink = open_sink(args.output)
+    started = time.monotonic()
+    ok = 0
+    try:
+        async for record in analyze_many_async(urls, concurrency=args.concurrency, browser=browser,
+                                               page_timeout=args.timeout):
+            ok += record['ok']
+            sink.emit(record)
+    finally:
+        sink.close()
+        await browser.close()
+    elapsed = time.monotonic() - started
+    rate = len(urls) / elapsed if elapsed else 0.0
+    logger.info(f"完了: {ok}/{len(urls)}件成功 {elapsed:.1f}秒 ({rate:.2f}ページ/秒, タブ{args.concurrency}個)")
+    get_default_writer().flush()
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='1つのブラウザの複数タブで、asyncioで並列に構造分析する')
+    parser.add_argument('source', help='URLリスト(1行1URL)またはサイトマップXML')
+    parser.add_argument('--concurrency', type=int, default=4, help='同時に開くタブの数')
+    parser.add_argument('--timeout', type=float, default=60, help='1ページの最大秒数')
+    parser.add_argument('--output', default='-', help='結果の出力先(- は標準出力のNDJSON)')
+    parser.add_argument('--cdp', help='起動済みChromeの ws://.../devtools/browser/... (省略時は起動する)')
+    parser.add_argument('--headed', action='store_true', help='画面ありで起動する')
+    asyncio.run(_main(parser.parse_args()))
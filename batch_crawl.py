@@ -0,0 +1,277 @@
+# === 複数URLの並列構造分析(バッチモード) ===
+# URLリストやサイトマップを読み込み、DriverPoolのブラウザを
+# 複数のワーカーで使い回しながら analyze_page を並列実行する
+# 例: python batch_crawl.py urls.txt --workers 4 --output results.ndjson
+#     python batch_crawl.py urls.txt --workers 2 --parse-workers 8   (解析は別プロセス。parse_pipeline.py)
+
+# 並列実行用
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+# リトライ待ちのキュー
+from collections import deque, defaultdict
+# 引数を固定した分析関数を作るため
+from functools import partial
+# ホスト名を取り出すため
+from urllib.parse import urlparse
+# サイトマップ(XML)の読み込み用
+import xml.etree.ElementTree as ET
+# 経過時間の計測用
+import time
+# ログ出力用
+import logging
+
+from driver_pool import DriverPool
+from driver_binary import get_default_resolver
+from report import open_sink
+from artifacts import get_default_writer
+from run_mode import get_run_mode, RunMode, RUN_MODES, BATCH_RUN_MODE
+from fetch_profile import FETCH_PROFILES
+from change_detect import ChangeDetector
+from heavy_hitters import FrequencyTally
+from site_profile import SiteProfile
+from sctest import analyze_page
+
+logger = logging.getLogger(__name__)
+
+
+def load_urls(path):
+    """
+    URLリスト(1行1URL)またはサイトマップXMLからURLを読み込む
+
+    - 空行と # で始まる行は無視する
+    - サイトマップは <loc> 要素を全て取り出す(sitemapindexも同様)
+
+    Args:
+        path (str): ファイルパス
+
+    Returns:
+        list: URLのリスト(重複は除き、元の順番を保つ)
+    """
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+
+    if text.lstrip().startswith('<'):
+        # サイトマップ: 名前空間に関係なく loc 要素を集める
+        root = ET.fromstring(text)
+        urls = [
+            elem.text.strip()
+            for elem in root.iter()
+            if elem.tag.rsplit('}', 1)[-1] == 'loc' and elem.text
+        ]
+    else:
+        urls = [
+            line.strip()
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+    # 重複を除く(順番は保つ)
+    return list(dict.fromkeys(urls))
+
+
+def analyze_quietly(driver, url, extraction='source', changes=None, tally=None):
+    """画面表示・スクリーンショット無しで1ページ分析する(並列実行で出力が混ざらないように)"""
+    return analyze_page(driver, url, sinks=(), extraction=extraction, changes=changes, tally=tally,
+                        screenshot=False)
+
+
+def _analyze_with_pool(pool, analyze, url):
+    """ワーカー1回分: プールからブラウザを借りて1ページ分析する"""
+    started = time.monotonic()
+    with pool.lease() as driver:
+        result = analyze(driver, url)
+    # Reportは辞書にしてから返す(JSONでそのまま書き出せるように)
+    if hasattr(result, 'to_dict'):
+        result = result.to_dict()
+    return result, time.monotonic() - started
+
+
+def crawl_batch(urls, workers=4, per_host=2, retries=2, analyze=analyze_quietly, pool=None, mode=None,
+                profile=None):
+    """
+    複数URLを並列に分析し、終わった順に結果を1件ずつ返す(ジェネレーター)
+
+    - 同時に動くワーカーは workers 個まで(ブラウザも同数まで)
+    - 同じホストへの同時アクセスは per_host 個まで
+    - 失敗したURLはリトライ待ちのキューに戻し、最大 retries 回やり直す
+
+    Args:
+        urls: 分析するURLのリスト
+        workers (int): 並列数
+        per_host (int): ホストごとの同時アクセス数の上限
+        retries (int): 失敗時のリトライ回数
+        analyze: (driver, url) を受け取って結果(Reportまたは辞書)を返す関数
+        pool (DriverPool): 使うプール(省略時は workers 個のプールを作って最後に閉じる)
+        mode (RunMode): 自分でプールを作るときの実行モード(省略時は環境変数 RUN_MODE、無ければヘッドレス)
+        profile: 自分でプールを作るときの取得プロファイル名(省略時は環境変数 FETCH_PROFILE、無ければ full)
+
+    Yields:
+        dict: url, ok, attempts, elapsed と result または error
+    """
+    own_pool = pool is None
+    if own_pool:
+        if mode is None:
+            mode = get_run_mode(BATCH_RUN_MODE)
+        pool = DriverPool(size=workers, driver_factory=mode.driver_factory(profile=profile))
+
+    # (URL, 試行回数) の待ち行列
+    pending = deque((url, 1) for url in urls)
+    # 失敗して再実行を待っているURL
+    retry_queue = deque()
+    # ホストごとの実行中の件数
+    in_flight = defaultdict(int)
+    # 実行中のFuture → (URL, 試行回数)
+    running = {}
+
+    def next_job():
+        """ホストごとの上限を超えない次のジョブを取り出す"""
+        for queue in (pending, retry_queue):
+            for _ in range(len(queue)):
+                url, attempt = queue.popleft()
+                if in_flight[urlparse(url).netloc] < per_host:
+                    return url, attempt
+                # 上限に達しているホストは後回し
+                queue.append((url, attempt))
+        return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or retry_queue or running:
+                # 空いているワーカーにジョブを割り当てる
+                while len(running) < workers:
+                    job = next_job()
+                    if job is None:
+                        break
+                    url, attempt = job
+                    in_flight[urlparse(url).netloc] += 1
+                    future = executor.submit(_analyze_with_pool, pool, analyze, url)
+                    running[future] = job
+
+                # どれか1つ終わるまで待つ
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, attempt = running.pop(future)
+                    in_flight[urlparse(url).netloc] -= 1
+                    try:
+                        result, elapsed = future.result()
+                    except Exception as e:
+                        if attempt <= retries:
+                            logger.warning(f"失敗したのでリトライします({attempt}/{retries}): {url} - {e}")
+                            retry_queue.append((url, attempt + 1))
+                            continue
+                        logger.error(f"リトライ上限に達しました: {url} - {e}")
+                        yield {'url': url, 'ok': False, 'attempts': attempt, 'error': str(e)}
+                        continue
+                    yield {
+                        'url': url,
+                        'ok': True,
+                        'attempts': attempt,
+                        'elapsed': round(elapsed, 3),
+                        'result': result,
+                    }
+    finally:
+        if own_pool:
+            pool.close()
+
+
+def main(argv=None):
+    """
+    コマンドラインから実行する
+
+    Args:
+        argv (list): 引数のリスト(省略時は sys.argv)
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='複数URLのHTML構造を並列に分析する')
+    parser.add_argument('source', nargs='?', help='URLリスト(1行1URL)またはサイトマップXML')
+    parser.add_argument('--workers', type=int, default=4, help='並列数(ブラウザの数)')
+    parser.add_argument('--per-host', type=int, default=2, help='ホストごとの同時アクセス数')
+    parser.add_argument('--retries', type=int, default=2, help='失敗時のリトライ回数')
+    parser.add_argument('--output', default='-',
+                        help='結果の出力先(- は標準出力のNDJSON。.ndjson / .json / .parquet も指定可)')
+    parser.add_argument('--extraction', choices=('source', 'browser', 'stream'), default='source',
+                        help='source=page_sourceを解析 / browser=ブラウザ内で一括集計(往復1回) / '
+                             'stream=木を作らずに少しずつ解析(巨大なページ向け)')
+    parser.add_argument('--fixtures', help='このディレクトリをローカルで配信して全ページを分析する')
+    parser.add_argument('--mode', choices=RUN_MODES, default=None,
+                        help='ブラウザの実行モード(省略時は環境変数 RUN_MODE、無ければ headless)')
+    parser.add_argument('--profile', choices=list(FETCH_PROFILES), default=None,
+                        help='読み込むリソースの絞り方(structure=画像・フォント・計測スクリプト等を止める)')
+    parser.add_argument('--incremental', metavar='PATH',
+                        help='前回の指紋をこのファイルに保存し、変化の無いページは分析を省略する')
+    parser.add_argument('--site-profile', metavar='PATH',
+                        help='全ページをまとめたサイトのプロファイル(共通クラス名・テンプレート)を保存する')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='1以上なら解析をこの数のプロセスで行い、ブラウザは取得だけにする(parse_pipeline.py)')
+    parser.add_argument('--elements', action='store_true',
+                        help='--parse-workers のとき toku.py のパターン探索(抽出スキーマ付き)も行う')
+    args = parser.parse_args(argv)
+    if args.incremental and args.extraction != 'source':
+        parser.error('--incremental は --extraction source のときだけ使えます')
+    if args.parse_workers and (args.incremental or args.extraction != 'source'):
+        parser.error('--parse-workers は --incremental・--extraction browser/stream と一緒には使えません')
+    if args.elements and not args.parse_workers:
+        parser.error('--elements は --parse-workers と一緒に指定してください')
+    mode = RunMode(args.mode) if args.mode else get_run_mode(BATCH_RUN_MODE)
+
+    server = None
+    if args.fixtures:
+        # ネットワーク無しで試すためのローカルサーバー
+        from fixture_server import FixtureServer
+        server = FixtureServer(args.fixtures).start()
+        urls = server.page_urls()
+    elif args.source:
+        urls = load_urls(args.source)
+    else:
+        parser.error('source または --fixtures を指定してください')
+
+    changes = ChangeDetector(args.incremental) if args.incremental else None
+    # 全ページのクラス名・ID・data属性の出現数(HEAVY_HITTERS_CAPACITY があればメモリ一定の近似)
+    tally = FrequencyTally()
+    profile = SiteProfile() if args.site_profile else None
+    sink = open_sink(args.output)
+    started = time.monotonic()
+    ok = 0
+    try:
+        if args.parse_workers:
+            # ブラウザは取得だけ、解析はプロセスプールで行う
+            from parse_pipeline import crawl_pipeline
+            analyses = ('structure', 'elements') if args.elements else ('structure',)
+            records = crawl_pipeline(urls, workers=args.workers, parse_workers=args.parse_workers,
+                                     per_host=args.per_host, retries=args.retries, analyses=analyses,
+                                     mode=mode, profile=args.profile, tally=tally)
+        else:
+            analyze = partial(analyze_quietly, extraction=args.extraction, changes=changes, tally=tally)
+            records = crawl_batch(urls, workers=args.workers, per_host=args.per_host,
+                                  retries=args.retries, analyze=analyze, mode=mode, profile=args.profile)
+        for record in records:
+            ok += record['ok']
+            # 1件終わるごとに書き出す(NDJSONなら1行ずつ)
+            sink.emit(record)
+            if profile is not None:
+                profile.add_report(record)
+    finally:
+        sink.close()
+        if server:
+            server.stop()
+        if changes is not None:
+            changes.save()
+            logger.info(f"差分判定: {changes.stats()}")
+        if profile is not None:
+            profile.write(args.site_profile)
+
+    elapsed = time.monotonic() - started
+    rate = len(urls) / elapsed if elapsed else 0.0
+    logger.info(f"バッチ完了: {ok}/{len(urls)}件成功 {elapsed:.1f}秒 ({rate:.2f}ページ/秒, workers={args.workers}, "
+                f"parse_workers={args.parse_workers})")
+    logger.info(f"全ページの頻出クラス名: {tally.top(10)['classes']} {tally.stats()}")
+    # 裏で保存中のスクリーンショット・HTMLを書き終えるまで待つ
+    artifacts = get_default_writer()
+    artifacts.flush()
+    logger.info(f"保存完了: {artifacts.stats()}")
+    # ChromeDriverの場所をキャッシュしたことで省けた時間
+    logger.info(f"ChromeDriver解決: {get_default_resolver().stats()}")
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# === 変わったページだけを分析し直す(差分クロール) ===
+# 毎晩の再分析では、ほとんどのページが前回と同じなので、
+# ページの「指紋」を前回と比べて、意味のある変化があったときだけ分析する
+# - 骨格ハッシュ: タグ名とクラス名の並び(文字や属性値は見ない)のSHA-256
+# - 本文SimHash : 本文の文字4-gramから作る64ビットのSimHash(少しの書き換えなら近い値になる)
+# 判定:
+# - unchanged : 骨格が同じで本文もほぼ同じ → 分析を省略
+# - text      : 骨格は同じで本文だけ変わった → 【1】〜【13】の数は前回と同じ
+# - structure : 骨格が変わった(または初回) → 分析して、前回との数の差分を出す
+# 例: python change_detect.py old.html new.html
+
+# 骨格のハッシュ計算用
+import hashlib
+# 指紋の保存用
+import json
+# ファイル操作用
+import os
+# 複数スレッドから使っても壊れないようにするため
+import threading
+# 確認日時の記録用
+import time
+# ログ出力用
+import logging
+
+from html_parsers import walk_source
+
+logger = logging.getLogger(__name__)
+
+# 本文を無視する要素(スクリプト・スタイルの中身は本文ではない)
+SKIP_TEXT_TAGS = ('script', 'style', 'noscript', 'template')
+# SimHashを作る文字n-gramの長さ(日本語は単語の区切りが無いので文字単位)
+SHINGLE_SIZE = 4
+# SimHashのビット数
+SIMHASH_BITS = 64
+# これ以下のハミング距離なら本文は「ほぼ同じ」とみなす
+DEFAULT_TEXT_THRESHOLD = 3
+# デフォルトの指紋の保存先
+DEFAULT_FINGERPRINT_PATH = 'fingerprints.json'
+
+
+class FingerprintCollector:
+    """
+    start / text / end のイベントからページの指紋を作る
+
+    DomStatsCollector と同じイベントで動くので、html_parsers.walk_source() にそのまま渡せる。
+    """
+
+    def __init__(self):
+        self._skeleton = hashlib.sha256()
+        self._stack = []
+        self._skip_depth = 0
+        self._text = []
+        self.elements = 0
+
+    def start(self, name, attrs):
+        classes = attrs.get('class')
+        if isinstance(classes, str):
+            classes = classes.split()
+        token = name + ''.join(f'.{cls}' for cls in sorted(classes or ()))
+        self._skeleton.update(token.encode('utf-8') + b'<')
+        self._stack.append(name)
+        self.elements += 1
+        if name in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+
+    def text(self, data):
+        if not self._skip_depth:
+            self._text.append(data)
+
+    def end(self, name=None):
+        if not self._stack:
+            return
+        name = self._stack.pop()
+        self._skeleton.update(b'>')
+        if name in SKIP_TEXT_TAGS:
+            self._skip_depth -= 1
+
+    def close(self):
+        """
+        指紋を返す
+
+        Returns:
+            dict: skeleton(16進文字列), simhash(整数), elements
+        """
+        return {
+            'skeleton': self._skeleton.hexdigest(),
+            'simhash': simhash(' '.join(self._text)),
+            'elements': self.elements,
+        }
+
+
+def simhash(text, size=SHINGLE_SIZE):
+    """
+    文字n-gramのSimHashを計算する
+
+    Args:
+        text (str): 本文
+        size (int): n-gramの長さ
+
+    Returns:
+        int: 64ビットのSimHash
+    """
+    # 空白の違いは無視する
+    text = ' '.join(text.split())
+    counts = {}
+    for i in range(max(len(text) - size + 1, 1)):
+        shingle = text[i:i + size]
+        counts[shingle] = counts.get(shingle, 0) + 1
+    return simhash_features(counts)
+
+
+def simhash_features(features):
+    """
+    特徴 → 重みからSimHashを計算する(本文のn-gramでも、クラス名の集合でもよい)
+
+    Args:
+        features (dict): 特徴(文字列) → 重み
+
+    Returns:
+        int: 64ビットのSimHash
+    """
+    weights = [0] * SIMHASH_BITS
+    for feature, count in features.items():
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming(a, b):
+    """2つのSimHashのハミング距離(違うビットの数)を返す"""
+    return bin(a ^ b).count('1')
+
+
+def page_fingerprint(source, backend=None):
+    """
+    HTMLソースからページの指紋を作る
+
+    Args:
+        source (str): HTMLソース
+        backend (str): パーサー名(省略時は最速のもの)
+
+    Returns:
+        dict: skeleton, simhash, elements
+    """
+    collector = FingerprintCollector()
+    walk_source(source, collector, backend)
+    return collector.close()
+
+
+def _plain(counts):
+    """JSONで保存・読み込みした後と同じ形(タプル→リスト)にそろえる"""
+    return json.loads(json.dumps(counts, ensure_ascii=False))
+
+
+def diff_counts(old, new):
+    """
+    【1】〜【13】の数の差分を返す
+
+    Args:
+        old (dict): 前回の html_parsers.section_counts()
+        new (dict): 今回の html_parsers.section_counts()
+
+    Returns:
+        dict: 変わった項目 → {'old', 'new'}(数なら 'delta' も)
+    """
+    old, new = _plain(old), _plain(new)
+    diff = {}
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+        if before == after:
+            continue
+        change = {'old': before, 'new': after}
+        if isinstance(before, (int, float)) and isinstance(after, (int, float)) \
+                and not isinstance(before, bool) and not isinstance(after, bool):
+            change['delta'] = after - before
+        diff[key] = change
+    return diff
+
+
+class ChangeDetector:
+    """
+    URLごとの前回の指紋・数をJSONに保存し、今回のページと比べる
+
+    Args:
+        path (str): 指紋の保存先
+        text_threshold (int): 本文のSimHashがこのビット数以下の違いなら「ほぼ同じ」
+
+    Example:
+        >>> detector = ChangeDetector('fingerprints.json')
+        >>> change = detector.check(url, page_fingerprint(page_source))
+        >>> if change['status'] != 'unchanged':
+        ...     detector.update(url, change['fingerprint'], section_counts(stats, url))
+    """
+
+    def __init__(self, path=DEFAULT_FINGERPRINT_PATH, text_threshold=DEFAULT_TEXT_THRESHOLD):
+        self.path = path
+        self.text_threshold = text_threshold
+        self._lock = threading.Lock()
+        self.entries = self._load()
+        # 統計
+        self.results = {'unchanged': 0, 'text': 0, 'structure': 0}
+
+    def _load(self):
+        """保存済みの指紋を読み込む(無い・壊れていれば空から始める)"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"指紋ファイルを読めないので作り直します: {e}")
+            return {}
+
+    def save(self):
+        """指紋をJSONに書き出す(一時ファイルから置き換える)"""
+        with self._lock:
+            entries = dict(self.entries)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def check(self, url, fingerprint):
+        """
+        前回の指紋と比べる
+
+        Args:
+            url (str): ページのURL
+            fingerprint (dict): page_fingerprint() の結果
+
+        Returns:
+            dict: status('unchanged' / 'text' / 'structure'), text_distance, fingerprint
+        """
+        with self._lock:
+            previous = self.entries.get(url)
+        if previous is None:
+            status, distance = 'structure', None
+        else:
+            distance = hamming(previous['simhash'], fingerprint['simhash'])
+            if previous['skeleton'] != fingerprint['skeleton']:
+                status = 'structure'
+            elif distance > self.text_threshold:
+                status = 'text'
+            else:
+                status = 'unchanged'
+        with self._lock:
+            self.results[status] += 1
+            if previous is not None and status == 'unchanged':
+                previous['checked_at'] = time.time()
+        return {
+            'status': status,
+            'first_seen': previous is None,
+            'text_distance': distance,
+            'fingerprint': fingerprint,
+        }
+
+    def update(self, url, fingerprint, counts):
+        """
+        今回の指紋と数を保存する
+
+        Args:
+            url (str): ページのURL
+            fingerprint (dict): page_fingerprint() の結果
+            counts (dict): html_parsers.section_counts() の結果
+
+        Returns:
+            dict: 前回からの数の差分(初回は空)
+        """
+        with self._lock:
+            previous = self.entries.get(url)
+            now = time.time()
+            self.entries[url] = {
+                'skeleton': fingerprint['skeleton'],
+                'simhash': fingerprint['simhash'],
+                'counts': _plain(counts),
+                'changed_at': now,
+                'checked_at': now,
+            }
+        return diff_counts(previous['counts'], counts) if previous else {}
+
+    def stats(self):
+        """
+        判定結果の件数を返す
+
+        Returns:
+            dict: unchanged, text, structure, pages
+        """
+        with self._lock:
+            return dict(self.results, pages=len(self.entries))
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+    from html_parsers import collect_stats, section_counts
+
+    parser = argparse.ArgumentParser(description='2つのHTMLの指紋と【1】〜【13】の数の差分を比べる')
+    parser.add_argument('old_path', help='前回のHTMLファイル')
+    parser.add_argument('new_path', help='今回のHTMLファイル')
+    parser.add_argument('--base-url', help='ページのURL(【8】の内部/外部リンクの判定用)')
+    args = parser.parse_args()
+
+    pages = []
+    for path in (args.old_path, args.new_path):
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        pages.append((page_fingerprint(source), section_counts(collect_stats(source), args.base_url)))
+    (old_fp, old_counts), (new_fp, new_counts) = pages
+    print(f"骨格: {'同じ' if old_fp['skeleton'] == new_fp['skeleton'] else '変化あり'}")
+    print(f"本文SimHashの距離: {hamming(old_fp['simhash'], new_fp['simhash'])}ビット")
+    for key, change in diff_counts(old_counts, new_counts).items():
+        print(f"  {key}: {change['old']} → {change['new']}")
@@ -0,0 +1,243 @@
+# === ブラウザ内での一括DOM抽出 ===
+# 要素数・クラスの出現回数・リンク一覧・セレクターの一致数などを
+# ブラウザの中のJavaScriptで全部計算し、execute_script 1回で受け取る。
+# driver.page_source でHTML全体を転送したり、find_elements を何度も
+# 呼んだりする往復(ラウンドトリップ)を減らすための仕組み
+
+# 型付きの結果オブジェクト用
+from dataclasses import dataclass, field
+# ログ出力用
+import logging
+
+from dom_stats import DomStats, HEADING_SAMPLES, ID_SAMPLES, LINK_SAMPLES, IMAGE_SAMPLES
+from heavy_hitters import counter_from_items
+
+logger = logging.getLogger(__name__)
+
+
+# ブラウザ内で実行するスクリプト
+# arguments[0]: 一致数を数えるCSSセレクターのリスト
+# arguments[1]: 全リンクのhref一覧も返すかどうか
+# arguments[2]: サンプル件数 [見出し, ID, リンク, 画像]
+EXTRACT_SCRIPT = r"""
+const selectors = arguments[0] || [];
+const includeLinks = arguments[1];
+const [headingSamples, idSamples, linkSamples, imageSamples] = arguments[2];
+
+// BeautifulSoupの get_text(strip=True) と同じく、テキストを前後の空白を除いてつなげる
+function stripText(el) {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    const parts = [];
+    while (walker.nextNode()) {
+        const text = walker.currentNode.nodeValue.trim();
+        if (text) parts.push(text);
+    }
+    return parts.join('');
+}
+function classesOf(el) {
+    const value = el.getAttribute('class');
+    return value === null ? [] : value.split(/\s+/).filter(Boolean);
+}
+
+const tagCounts = {};
+const classCounts = new Map();
+const dataAttributes = new Set();
+const idCounts = new Map();
+const dataAttributeCounts = new Map();
+const idSampleList = [];
+const hrefs = [];
+const headings = {};
+let divsWithClass = 0, idCount = 0, linkCount = 0, internal = 0, external = 0, stylesheets = 0;
+const linkSampleList = [], imageSampleList = [];
+
+// 全要素を1回だけたどる
+const all = document.getElementsByTagName('*');
+for (let i = 0; i < all.length; i++) {
+    const el = all[i];
+    const name = el.localName.toLowerCase();
+    tagCounts[name] = (tagCounts[name] || 0) + 1;
+
+    if (el.hasAttribute('class')) {
+        for (const cls of classesOf(el)) classCounts.set(cls, (classCounts.get(cls) || 0) + 1);
+        if (name === 'div') divsWithClass++;
+    }
+    if (el.hasAttribute('id')) {
+        idCount++;
+        const id = el.getAttribute('id');
+        idCounts.set(id, (idCounts.get(id) || 0) + 1);
+        if (idSampleList.length < idSamples) idSampleList.push([el.getAttribute('id'), name]);
+    }
+    for (const attr of el.getAttributeNames()) {
+        if (attr.startsWith('data-')) {
+            dataAttributes.add(attr);
+            dataAttributeCounts.set(attr, (dataAttributeCounts.get(attr) || 0) + 1);
+        }
+    }
+
+    if (name === 'a' && el.hasAttribute('href')) {
+        const href = el.getAttribute('href');
+        linkCount++;
+        if (href.startsWith('http')) external++; else internal++;
+        if (linkSampleList.length < linkSamples) linkSampleList.push([stripText(el), href]);
+        if (includeLinks) hrefs.push(href);
+    } else if (/^h[1-6]$/.test(name)) {
+        const level = name[1];
+        headings[level] = headings[level] || [];
+        if (headings[level].length < headingSamples) headings[level].push(stripText(el));
+    } else if (name === 'img') {
+        if (imageSampleList.length < imageSamples) {
+            imageSampleList.push([el.getAttribute('alt') || '', el.getAttribute('src') || '']);
+        }
+    } else if (name === 'link') {
+        if ((el.getAttribute('rel') || '').split(/\s+/).includes('stylesheet')) stylesheets++;
+    }
+}
+
+const titleEl = document.querySelector('title');
+const meta = document.querySelector('meta[name="description"]');
+const header = document.querySelector('header');
+const nav = header ? header.querySelector('nav') : null;
+const main = document.querySelector('main');
+
+const selectorCounts = {};
+for (const selector of selectors) {
+    try {
+        selectorCounts[selector] = document.querySelectorAll(selector).length;
+    } catch (e) {
+        selectorCounts[selector] = null;
+    }
+}
+
+return {
+    url: location.href,
+    document_title: document.title,
+    stats: {
+        title: titleEl ? titleEl.textContent : null,
+        meta_description: meta ? (meta.getAttribute('content') || '') : null,
+        has_header: !!header,
+        header_classes: header ? classesOf(header) : [],
+        header_has_nav: !!nav,
+        header_nav_links: nav ? nav.getElementsByTagName('a').length : 0,
+        has_main: !!main,
+        main_classes: main ? classesOf(main) : [],
+        tag_counts: tagCounts,
+        divs_with_class: divsWithClass,
+        headings: headings,
+        class_counts: Array.from(classCounts.entries()),
+        id_count: idCount,
+        id_counts: Array.from(idCounts.entries()),
+        id_samples: idSampleList,
+        link_count: linkCount,
+        internal_links: internal,
+        external_links: external,
+        link_samples: linkSampleList,
+        image_samples: imageSampleList,
+        data_attributes: Array.from(dataAttributes),
+        data_attribute_counts: Array.from(dataAttributeCounts.entries()),
+        stylesheet_links: stylesheets,
+    },
+    selector_counts: selectorCounts,
+    hrefs: hrefs,
+};
+"""
+
+# セレクターの一致数だけを数えるスクリプト
+COUNT_SCRIPT = r"""
+const counts = {};
+for (const selector of arguments[0]) {
+    try {
+        counts[selector] = document.querySelectorAll(selector).length;
+    } catch (e) {
+        counts[selector] = null;
+    }
+}
+return counts;
+"""
+
+
+@dataclass
+class BrowserExtraction:
+    """
+    ブラウザ内抽出の結果
+
+    Attributes:
+        url (str): 抽出時点のURL(location.href)
+        document_title (str): document.title
+        stats (DomStats): 【1】〜【13】用のDOM統計
+        selector_counts (dict): セレクター → 一致数(不正なセレクターはNone)
+        hrefs (list): 全リンクのhref(include_links=True の場合のみ)
+    """
+
+    url: str
+    document_title: str
+    stats: DomStats
+    selector_counts: dict = field(default_factory=dict)
+    hrefs: list = field(default_factory=list)
+
+
+def _to_dom_stats(data):
+    """スクリプトの戻り値をDomStatsに変換する"""
+    return DomStats(
+        title=data['title'],
+        meta_description=data['meta_description'],
+        has_header=data['has_header'],
+        header_classes=data['header_classes'],
+        header_has_nav=data['header_has_nav'],
+        header_nav_links=data['header_nav_links'],
+        has_main=data['has_main'],
+        main_classes=data['main_classes'],
+        tag_counts=data['tag_counts'],
+        divs_with_class=data['divs_with_class'],
+        headings={int(level): samples for level, samples in data['headings'].items()},
+        class_counts=counter_from_items(data['class_counts']),
+        id_count=data['id_count'],
+        id_counts=counter_from_items(data['id_counts']),
+        id_samples=[tuple(sample) for sample in data['id_samples']],
+        link_count=data['link_count'],
+        internal_links=data['internal_links'],
+        external_links=data['external_links'],
+        link_samples=[tuple(sample) for sample in data['link_samples']],
+        image_samples=[tuple(sample) for sample in data['image_samples']],
+        data_attributes=set(data['data_attributes']),
+        data_attribute_counts=counter_from_items(data['data_attribute_counts']),
+        stylesheet_links=data['stylesheet_links'],
+    )
+
+
+def extract_in_browser(driver, selectors=(), include_links=False):
+    """
+    ページのDOM統計とセレクターの一致数を execute_script 1回で取得する
+
+    Args:
+        driver: Chromeドライバー(ページ読み込み済み)
+        selectors: 一致数を数えるCSSセレクターのリスト
+        include_links (bool): 全リンクのhref一覧も受け取るか
+
+    Returns:
+        BrowserExtraction: 抽出結果
+    """
+    sample_sizes = [HEADING_SAMPLES, ID_SAMPLES, LINK_SAMPLES, IMAGE_SAMPLES]
+    data = driver.execute_script(EXTRACT_SCRIPT, list(selectors), include_links, sample_sizes)
+    stats = _to_dom_stats(data['stats'])
+    stats.hrefs = data['hrefs']
+    return BrowserExtraction(
+        url=data['url'],
+        document_title=data['document_title'],
+        stats=stats,
+        selector_counts=data['selector_counts'],
+        hrefs=data['hrefs'],
+    )
+
+
+def count_selectors(driver, selectors):
+    """
+    複数のCSSセレクターの一致数を execute_script 1回で数える
+
+    Args:
+        driver: Chromeドライバー
+        selectors: CSSセレクターのリスト
+
+    Returns:
+        dict: セレクター → 一致数(不正なセレクターはNone)
+    """
+    return driver.execute_script(COUNT_SCRIPT, list(selectors))
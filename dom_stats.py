@@ -0,0 +1,373 @@
+# === DOM統計の1パス集計 ===
+# analyze_site_structure の【1】〜【13】で使う数・サンプル・頻出クラスを、
+# find_all を何十回も呼ぶ代わりに、木を1回たどるだけで全部集める
+# 例: python dom_stats.py coorikuya_source.html  (旧方式とのベンチマーク)
+
+# 型付きの結果オブジェクト用
+from dataclasses import dataclass, field
+# BeautifulSoupのノード種別の判定用
+from bs4 import BeautifulSoup, Tag, NavigableString
+from bs4.element import PreformattedString
+
+from heavy_hitters import new_counter
+from link_frontier import LinkClassifier
+
+
+# 見出しのサンプル数・リンクのサンプル数など(旧コードの表示件数と同じ)
+HEADING_SAMPLES = 3
+ID_SAMPLES = 10
+LINK_SAMPLES = 5
+IMAGE_SAMPLES = 3
+
+
+@dataclass
+class DomStats:
+    """
+    ページ1つ分のDOM統計
+
+    Attributes:
+        title (str): <title>の文字列(無ければNone)
+        meta_description (str): meta description の content(無ければNone)
+        has_header (bool): <header>があるか
+        header_classes (list): 最初の<header>のクラス名
+        header_has_nav (bool): <header>内に<nav>があるか
+        header_nav_links (int): その<nav>内の<a>の数
+        has_main (bool): <main>があるか
+        main_classes (list): 最初の<main>のクラス名
+        tag_counts (dict): タグ名 → 出現数
+        divs_with_class (int): class属性付き<div>の数
+        headings (dict): 見出しレベル(1〜6) → 最初の数件のテキスト
+        class_counts (ExactCounter): クラス名 → 出現数(初出順。HEAVY_HITTERS_CAPACITY があれば近似)
+        id_count (int): id属性付き要素の数
+        id_counts (ExactCounter): id属性の値 → 出現数(2以上なら重複したid)
+        id_samples (list): 最初の数件の (id, タグ名)
+        link_count (int): href付き<a>の数
+        internal_links (int): 内部リンク数
+        external_links (int): 外部リンク数
+        link_samples (list): 最初の数件の (テキスト, href)
+        hrefs (list): 全ての<a>のhref(出現順。link_frontier.pyで正規化・分類する)
+        links (dict): 集計しながら分類した classify_links() の結果
+                      (DomStatsCollector に base_url を渡したときだけ。そのとき hrefs は空)
+        image_samples (list): 最初の数件の (alt, src)
+        data_attributes (set): 見つかった data-* 属性名
+        data_attribute_counts (ExactCounter): data-* 属性名 → 出現数
+        stylesheet_links (int): <link rel="stylesheet">の数
+    """
+
+    title: str = None
+    meta_description: str = None
+    has_header: bool = False
+    header_classes: list = field(default_factory=list)
+    header_has_nav: bool = False
+    header_nav_links: int = 0
+    has_main: bool = False
+    main_classes: list = field(default_factory=list)
+    tag_counts: dict = field(default_factory=dict)
+    divs_with_class: int = 0
+    headings: dict = field(default_factory=dict)
+    class_counts: dict = field(default_factory=new_counter)
+    id_count: int = 0
+    id_counts: dict = field(default_factory=new_counter)
+    id_samples: list = field(default_factory=list)
+    link_count: int = 0
+    internal_links: int = 0
+    external_links: int = 0
+    link_samples: list = field(default_factory=list)
+    hrefs: list = field(default_factory=list)
+    links: dict = None
+    image_samples: list = field(default_factory=list)
+    data_attributes: set = field(default_factory=set)
+    data_attribute_counts: dict = field(default_factory=new_counter)
+    stylesheet_links: int = 0
+
+    def count(self, tag_name):
+        """
+        タグの出現数を返す
+
+        Args:
+            tag_name (str): タグ名(例: 'article')
+
+        Returns:
+            int: 出現数(無ければ0)
+        """
+        return self.tag_counts.get(tag_name, 0)
+
+    def heading_count(self, level):
+        """<h1>〜<h6>の出現数を返す"""
+        return self.count(f'h{level}')
+
+    def top_classes(self, n=10):
+        """
+        出現回数の多いクラス名を返す(同数なら初出順)
+
+        Args:
+            n (int): 返す件数
+
+        Returns:
+            list: (クラス名, 回数) のリスト
+        """
+        return self.class_counts.top(n)
+
+
+def _values(value):
+    """class や rel のような複数値属性をリストにそろえる"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return value.split()
+    return list(value)
+
+
+class DomStatsCollector:
+    """
+    開始タグ・テキスト・終了タグのイベントを受け取ってDomStatsを組み立てる
+
+    BeautifulSoupの木をたどる walk_soup() からも、木を作らない
+    ストリーミング解析からも同じイベントで使えるようにしている。
+
+    Args:
+        base_url (str): ページのURL。渡すとhrefを覚えずにその場で分類する(stats.links。巨大なページ用)
+        capacity (int): クラス名・id・data属性のカウンターの候補数(heavy_hitters.new_counter と同じ)
+    """
+
+    def __init__(self, base_url=None, capacity=None):
+        if capacity is None:
+            self.stats = DomStats()
+        else:
+            self.stats = DomStats(class_counts=new_counter(capacity), id_counts=new_counter(capacity),
+                                  data_attribute_counts=new_counter(capacity))
+        self._links = LinkClassifier(base_url) if base_url is not None else None
+        self._depth = 0
+        # 最初の<header>とその中の<nav>の深さ(閉じたらNoneに戻す)
+        self._header_depth = None
+        self._nav_depth = None
+        # テキストを集めている途中の要素: [種類, 深さ, 文字列のリスト, 付加情報]
+        self._captures = []
+        self._title_done = False
+
+    def start(self, name, attrs):
+        """
+        開始タグを処理する
+
+        Args:
+            name (str): タグ名
+            attrs (dict): 属性(class/rel はリストでも文字列でもよい)
+        """
+        stats = self.stats
+        self._depth += 1
+        depth = self._depth
+        counts = stats.tag_counts
+        counts[name] = counts.get(name, 0) + 1
+
+        # --- 属性: class / id / data-* ---
+        if 'class' in attrs:
+            classes = _values(attrs['class'])
+            add_class = stats.class_counts.add
+            for cls in classes:
+                add_class(cls)
+            if name == 'div':
+                stats.divs_with_class += 1
+        if 'id' in attrs:
+            stats.id_count += 1
+            stats.id_counts.add(attrs['id'])
+            if len(stats.id_samples) < ID_SAMPLES:
+                stats.id_samples.append((attrs['id'], name))
+        for attr in attrs:
+            if attr.startswith('data-'):
+                stats.data_attributes.add(attr)
+                stats.data_attribute_counts.add(attr)
+
+        # --- タグごとの処理 ---
+        if name == 'a':
+            if self._nav_depth is not None:
+                stats.header_nav_links += 1
+            href = attrs.get('href')
+            if href is not None:
+                stats.link_count += 1
+                if self._links is None:
+                    stats.hrefs.append(href)
+                else:
+                    self._links.add(href)
+                if href.startswith('http'):
+                    stats.external_links += 1
+                else:
+                    stats.internal_links += 1
+                if len(stats.link_samples) < LINK_SAMPLES:
+                    stats.link_samples.append(['', href])
+                    self._captures.append(['link', depth, [], stats.link_samples[-1]])
+        elif name in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            samples = stats.headings.setdefault(int(name[1]), [])
+            if len(samples) < HEADING_SAMPLES:
+                samples.append('')
+                self._captures.append(['heading', depth, [], (samples, len(samples) - 1)])
+        elif name == 'img':
+            if len(stats.image_samples) < IMAGE_SAMPLES:
+                stats.image_samples.append((attrs.get('alt', ''), attrs.get('src', '')))
+        elif name == 'link':
+            if 'stylesheet' in _values(attrs.get('rel')):
+                stats.stylesheet_links += 1
+        elif name == 'meta':
+            if stats.meta_description is None and attrs.get('name') == 'description':
+                stats.meta_description = attrs.get('content', '')
+        elif name == 'title':
+            if not self._title_done:
+                self._title_done = True
+                self._captures.append(['title', depth, [], None])
+        elif name == 'header':
+            if not stats.has_header:
+                stats.has_header = True
+                stats.header_classes = _values(attrs.get('class'))
+                self._header_depth = depth
+        elif name == 'nav':
+            if self._header_depth is not None and not stats.header_has_nav:
+                stats.header_has_nav = True
+                self._nav_depth = depth
+        elif name == 'main':
+            if not stats.has_main:
+                stats.has_main = True
+                stats.main_classes = _values(attrs.get('class'))
+
+    def text(self, data):
+        """
+        テキストを処理する(サンプルを集めている要素にだけ追加する)
+
+        Args:
+            data (str): テキスト
+        """
+        for capture in self._captures:
+            capture[2].append(data)
+
+    def end(self, name=None):
+        """
+        終了タグを処理する
+
+        Args:
+            name (str): タグ名(深さで管理しているので省略可)
+        """
+        depth = self._depth
+        while self._captures and self._captures[-1][1] >= depth:
+            self._finish_capture(self._captures.pop())
+        if self._nav_depth == depth:
+            self._nav_depth = None
+        if self._header_depth == depth:
+            # 最初の<header>を抜けたら以後の<nav>は数えない
+            self._header_depth = None
+            self._nav_depth = None
+        self._depth -= 1
+
+    def close(self):
+        """
+        集計を終えて結果を返す
+
+        Returns:
+            DomStats: 集計結果
+        """
+        while self._captures:
+            self._finish_capture(self._captures.pop())
+        # リンクのサンプルを (テキスト, href) のタプルにそろえる
+        self.stats.link_samples = [tuple(sample) for sample in self.stats.link_samples]
+        if self._links is not None:
+            self.stats.links = self._links.counts()
+        return self.stats
+
+    def _finish_capture(self, capture):
+        """集めたテキストをサンプルに書き込む"""
+        kind, _depth, parts, target = capture
+        if kind == 'title':
+            self.stats.title = ''.join(parts)
+            return
+        # get_text(strip=True) と同じく、前後の空白を除いてつなげる
+        text = ''.join(part.strip() for part in parts)
+        if kind == 'link':
+            target[0] = text
+        elif kind == 'heading':
+            samples, index = target
+            samples[index] = text
+
+
+def walk_soup(soup, collector):
+    """
+    BeautifulSoupの木を1回だけたどり、collectorにイベントを送る
+
+    Args:
+        soup: BeautifulSoupオブジェクト(またはTag)
+        collector: start / text / end を持つオブジェクト
+    """
+    # 再帰だと深いページで上限に当たるので、スタックでたどる
+    stack = [iter(soup.contents)]
+    while stack:
+        for node in stack[-1]:
+            if isinstance(node, Tag):
+                collector.start(node.name, node.attrs)
+                stack.append(iter(node.contents))
+                break
+            if isinstance(node, NavigableString) and not isinstance(node, PreformattedString):
+                collector.text(str(node))
+        else:
+            stack.pop()
+            if stack:
+                collector.end()
+
+
+def collect_dom_stats(soup):
+    """
+    ページのDOM統計を1パスで集める
+
+    Args:
+        soup: BeautifulSoupオブジェクト
+
+    Returns:
+        DomStats: 【1】〜【13】で使う統計
+    """
+    collector = DomStatsCollector()
+    walk_soup(soup, collector)
+    return collector.close()
+
+
+def _legacy_sweeps(soup):
+    """ベンチマーク用: 旧コードと同じ find_all を順番に呼ぶ"""
+    counts = {}
+    for name in ('article', 'section', 'ul', 'ol', 'img', 'form', 'input',
+                 'textarea', 'select', 'button', 'table', 'script', 'style'):
+        counts[name] = len(soup.find_all(name))
+    for i in range(1, 7):
+        counts[f'h{i}'] = len(soup.find_all(f'h{i}'))
+    divs_with_class = len(soup.find_all('div', class_=True))
+    class_counter = {}
+    for tag in soup.find_all(class_=True):
+        for cls in tag.get('class'):
+            class_counter[cls] = class_counter.get(cls, 0) + 1
+    id_count = len(soup.find_all(id=True))
+    link_count = len(soup.find_all('a', href=True))
+    data_attributes = set()
+    for tag in soup.find_all():
+        for attr in tag.attrs:
+            if attr.startswith('data-'):
+                data_attributes.add(attr)
+    stylesheet_links = len(soup.find_all('link', rel='stylesheet'))
+    return counts, divs_with_class, class_counter, id_count, link_count, data_attributes, stylesheet_links
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import sys
+    import timeit
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'coorikuya_source.html'
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with open(path, encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+
+    # 結果が旧方式と一致するか確認
+    stats = collect_dom_stats(soup)
+    counts, divs, classes, ids, links, data_attrs, css = _legacy_sweeps(soup)
+    assert all(stats.count(name) == n for name, n in counts.items()), '要素数が一致しません'
+    assert (stats.divs_with_class, stats.class_counts, stats.id_count, stats.link_count,
+            stats.data_attributes, stats.stylesheet_links) == (divs, classes, ids, links, data_attrs, css)
+
+    legacy = timeit.timeit(lambda: _legacy_sweeps(soup), number=repeat) / repeat
+    single = timeit.timeit(lambda: collect_dom_stats(soup), number=repeat) / repeat
+    print(f"{path}: 要素 {sum(stats.tag_counts.values())}個")
+    print(f"  旧方式(find_all複数回): {legacy * 1000:.2f} ms/ページ")
+    print(f"  1パス集計             : {single * 1000:.2f} ms/ページ")
+    print(f"  速度比: {legacy / single:.1f}倍")
@@ -0,0 +1,250 @@
+# === ChromeDriverの場所の解決(キャッシュ・オフライン対応) ===
+# ブラウザを起動するたびに ChromeDriverManager().install() を呼ぶと、
+# バージョン確認でネットワークにアクセスすることがあり起動が遅くなるので、
+# 1回解決した場所をプロセス内とファイル(マニフェスト)に覚えておく
+# 探す順番:
+#   1. このプロセスで解決済みの場所
+#   2. 環境変数 CHROMEDRIVER_PATH(事前に用意したドライバー。ネットワーク不要)
+#   3. マニフェスト(.chromedriver.json)に保存した前回の場所
+#   4. PATH上の chromedriver(refresh=True で取り直すときは、オンラインなら飛ばす)
+#   5. ChromeDriverManager().install()(ネットワークを使う。CHROMEDRIVER_OFFLINE=1 なら使わない)
+# 例: python driver_binary.py            (解決結果と所要時間を表示)
+#     python driver_binary.py --refresh  (マニフェストを無視して取り直す)
+
+# マニフェストの保存用
+import json
+# ファイル操作用
+import os
+# PATH上のコマンドを探すため
+import shutil
+# ドライバーのバージョン確認用
+import subprocess
+# 同時に複数スレッドから起動しても1回だけ解決するため
+import threading
+# 所要時間の計測用
+import time
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+# デフォルトのマニフェストの保存先
+DEFAULT_MANIFEST_PATH = '.chromedriver.json'
+
+
+class DriverNotFoundError(RuntimeError):
+    """オフラインでChromeDriverが見つからないときのエラー"""
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def driver_version(path):
+    """
+    ChromeDriverのバージョンを返す
+
+    Args:
+        path (str): chromedriver の場所
+
+    Returns:
+        str: バージョン(例: '141.0.7390.54'。取れなければNone)
+    """
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # 'ChromeDriver 141.0.7390.54 (...)' の2番目
+    parts = output.split()
+    return parts[1] if len(parts) > 1 else None
+
+
+class DriverResolver:
+    """
+    chromedriver の場所を1回だけ解決して使い回す
+
+    Args:
+        manifest_path (str): 解決結果を保存するファイル
+        offline (bool): Trueならネットワークを使わない(見つからなければDriverNotFoundError)
+        installer: ネットワークから取得する関数(省略時は ChromeDriverManager().install)
+
+    Example:
+        >>> resolver = DriverResolver()
+        >>> service = Service(resolver.resolve())
+    """
+
+    def __init__(self, manifest_path=DEFAULT_MANIFEST_PATH, offline=False, installer=None):
+        self.manifest_path = manifest_path
+        self.offline = offline
+        self.installer = installer
+        self._lock = threading.Lock()
+        self._resolved = None
+        # 統計
+        self.calls = 0
+        self.sources = {}
+        self.resolve_seconds = 0.0
+        self.install_seconds = None
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"ドライバーのマニフェストを読めません: {e}")
+            return {}
+
+    def _save_manifest(self, entry):
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _install(self):
+        """ネットワークからドライバーを取得する"""
+        installer = self.installer
+        if installer is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            installer = ChromeDriverManager().install
+        started = time.perf_counter()
+        path = installer()
+        self.install_seconds = time.perf_counter() - started
+        return path
+
+    def _find(self, refresh):
+        """
+        ドライバーを探す
+
+        Returns:
+            tuple: (場所, 見つけた方法)
+        """
+        env_path = os.environ.get('CHROMEDRIVER_PATH')
+        if env_path:
+            if not _is_executable(env_path):
+                raise DriverNotFoundError(f"CHROMEDRIVER_PATH のファイルが実行できません: {env_path}")
+            return env_path, 'env'
+
+        manifest = {} if refresh else self._load_manifest()
+        if _is_executable(manifest.get('path')):
+            if manifest.get('install_seconds') is not None:
+                self.install_seconds = manifest['install_seconds']
+            return manifest['path'], 'manifest'
+
+        # 取り直し(Chromeとバージョンが合わなかったとき)はPATH上のものも古い可能性があるので、
+        # オンラインなら飛ばして install() する
+        on_path = None if refresh and not self.offline else shutil.which('chromedriver')
+        if on_path:
+            return on_path, 'path'
+
+        if not self.offline:
+            return self._install(), 'install'
+        raise DriverNotFoundError(
+            "オフラインですがChromeDriverが見つかりません。"
+            "CHROMEDRIVER_PATH を指定するか、一度オンラインで実行してください"
+        )
+
+    def resolve(self, refresh=False):
+        """
+        chromedriver の場所を返す(2回目以降はプロセス内のキャッシュから返す)
+
+        Args:
+            refresh (bool): Trueならキャッシュ・マニフェストを無視して取り直す
+
+        Returns:
+            str: chromedriver の場所
+        """
+        started = time.perf_counter()
+        with self._lock:
+            if self._resolved is None or refresh:
+                path, source = self._find(refresh)
+                if source != 'manifest':
+                    self._save_manifest({
+                        'path': path,
+                        'version': driver_version(path),
+                        'source': source,
+                        'resolved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                        'install_seconds': self.install_seconds,
+                    })
+                self._resolved = path
+                logger.info(f"ChromeDriver: {path} ({source})")
+            else:
+                source = 'memory'
+            self.calls += 1
+            self.sources[source] = self.sources.get(source, 0) + 1
+            self.resolve_seconds += time.perf_counter() - started
+            return self._resolved
+
+    def stats(self):
+        """
+        解決の状況と、毎回 install() した場合と比べて節約できた時間を返す
+
+        Returns:
+            dict: calls, sources(方法 → 回数), resolve_seconds, install_seconds, saved_seconds
+        """
+        with self._lock:
+            saved = None
+            if self.install_seconds is not None:
+                # 毎回 install() していた場合の時間 - 実際に掛かった時間
+                saved = round(self.install_seconds * self.calls - self.resolve_seconds, 3)
+            return {
+                'calls': self.calls,
+                'sources': dict(self.sources),
+                'resolve_seconds': round(self.resolve_seconds, 3),
+                'install_seconds': self.install_seconds and round(self.install_seconds, 3),
+                'saved_seconds': saved,
+            }
+
+
+# プログラム全体で共有する解決係(get_default_resolver()で取得)
+_default_resolver = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_default_resolver():
+    """
+    共有のDriverResolverを返す(初回呼び出し時に作成)
+
+    環境変数 CHROMEDRIVER_MANIFEST で保存先、CHROMEDRIVER_OFFLINE=1 でオフラインにできる。
+
+    Returns:
+        DriverResolver: 共有の解決係
+    """
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = DriverResolver(
+                manifest_path=os.environ.get('CHROMEDRIVER_MANIFEST', DEFAULT_MANIFEST_PATH),
+                offline=os.environ.get('CHROMEDRIVER_OFFLINE', '') not in ('', '0'),
+            )
+    return _default_resolver
+
+
+def resolve_chromedriver(refresh=False):
+    """
+    共有の解決係で chromedriver の場所を返す
+
+    Args:
+        refresh (bool): Trueならキャッシュ・マニフェストを無視して取り直す
+
+    Returns:
+        str: chromedriver の場所
+    """
+    return get_default_resolver().resolve(refresh=refresh)
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='ChromeDriverの場所を解決して表示する')
+    parser.add_argument('--refresh', action='store_true', help='マニフェストを無視して取り直す')
+    args = parser.parse_args()
+
+    resolver = get_default_resolver()
+    for i in range(3):
+        started = time.perf_counter()
+        path = resolver.resolve(refresh=args.refresh and i == 0)
+        print(f"{i + 1}回目: {path} ({(time.perf_counter() - started) * 1000:.2f}ms)")
+    print(resolver.stats())
@@ -0,0 +1,365 @@
+# === WebDriverプール ===
+# sctest.py / toku.py が毎回ブラウザを起動・終了していたのをやめて、
+# 起動済み(ウォーム)のブラウザを貸し出して使い回すための仕組み
+
+# Seleniumの基本機能
+from selenium import webdriver
+# Chromeのオプション設定用
+from selenium.webdriver.chrome.options import Options
+# Chromeのサービス設定用
+from selenium.webdriver.chrome.service import Service
+# ブラウザが落ちたかどうかの判定用
+from selenium.common.exceptions import WebDriverException, SessionNotCreatedException
+# 同時に複数スレッドから使われても安全にするため
+import threading
+# 貸し出し(with文)を簡単に書くため
+from contextlib import contextmanager
+# プロセス終了時に全ブラウザを閉じるため
+import atexit
+# 訪れたURLからオリジンを取り出すため
+from urllib.parse import urlsplit
+# ログ出力用
+import logging
+
+from driver_binary import get_default_resolver
+from fetch_profile import get_fetch_profile
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def create_chrome_options(headless=False, profile=None):
+    """
+    sctest.py / toku.py 共通のChromeオプションを作成する
+
+    Args:
+        headless (bool): Trueなら画面を出さずに起動する(バッチ処理向け)
+        profile: 取得プロファイル名 / FetchProfile(fetch_profile.py参照。省略時は環境変数 FETCH_PROFILE)
+
+    Returns:
+        Options: 設定済みのChromeオプション
+    """
+    chrome_options = Options()
+
+    # ヘッドレスモード(Falseなら画面を見ながら確認できる)
+    if headless:
+        chrome_options.add_argument('--headless=new')
+
+    # その他の設定
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--window-size=1920,1080')
+
+    # User-Agent設定
+    chrome_options.add_argument(
+        'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    )
+
+    # 取得プロファイルで止めるリソース(画像はChromeの設定で止める)
+    prefs = get_fetch_profile(profile).chrome_prefs()
+    if prefs:
+        chrome_options.add_experimental_option('prefs', prefs)
+    return chrome_options
+
+
+def create_driver(options_factory=create_chrome_options, profile=None):
+    """
+    Chromeドライバーを1つ起動する
+
+    Args:
+        options_factory: Chromeオプションを返す関数
+        profile: 取得プロファイル名 / FetchProfile(省略時は環境変数 FETCH_PROFILE、無ければ full)
+
+    Returns:
+        webdriver.Chrome: 起動したドライバー
+    """
+    # ドライバーの場所(プロセス内・マニフェストにキャッシュ済みなら探し直さない)
+    resolver = get_default_resolver()
+    with span('driver.install'):
+        service = Service(resolver.resolve())
+    # ドライバーを起動
+    with span('browser.start'):
+        try:
+            driver = webdriver.Chrome(service=service, options=options_factory())
+        except SessionNotCreatedException:
+            # Chromeが更新されて保存済みのドライバーと合わなくなったときは1回だけ取り直す
+            if resolver.offline:
+                raise
+            logger.warning("ChromeDriverとChromeのバージョンが合わないので取り直します")
+            service = Service(resolver.resolve(refresh=True))
+            driver = webdriver.Chrome(service=service, options=options_factory())
+    # 取得プロファイルのURLブロックを設定
+    with span('fetch_profile.apply'):
+        get_fetch_profile(profile).apply(driver)
+    return driver
+
+
+class PooledSession:
+    """
+    プールが管理するブラウザ1つ分の情報
+
+    Attributes:
+        driver: Chromeドライバー
+        uses (int): 貸し出された回数
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class DriverPool:
+    """
+    固定サイズのWebDriverプール
+
+    起動済みのブラウザを貸し出し、返却時にCookie・ストレージを消して
+    次の利用者に渡す。max_uses回使ったブラウザや、クラッシュした
+    ブラウザは捨てて、次の貸し出し時に新しく起動する。
+
+    Args:
+        size (int): 同時に起動しておくブラウザの最大数
+        max_uses (int): 1つのブラウザを使い回す最大回数
+        driver_factory: ドライバーを起動する関数(テスト時の差し替え用)
+
+    Example:
+        >>> pool = DriverPool(size=2)
+        >>> with pool.lease() as driver:
+        ...     driver.get("https://www.coorikuya.com/")
+    """
+
+    def __init__(self, size=2, max_uses=50, driver_factory=create_driver):
+        if size < 1:
+            raise ValueError("sizeは1以上を指定してください")
+        if max_uses < 1:
+            raise ValueError("max_usesは1以上を指定してください")
+        self.size = size
+        self.max_uses = max_uses
+        self.driver_factory = driver_factory
+
+        # 空いているブラウザ(LIFO: 直近に使った温かいものから貸す)
+        self._idle = []
+        # 起動済みのブラウザ数(貸し出し中も含む)
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # 統計カウンター
+        self.hits = 0       # 起動済みブラウザを貸せた回数
+        self.misses = 0     # 新しく起動した回数
+        self.recycled = 0   # 使用回数上限・クラッシュで捨てた回数
+
+    def acquire(self):
+        """
+        ブラウザを1つ借りる(空きが無ければ返却を待つ)
+
+        Returns:
+            PooledSession: 貸し出したセッション
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("DriverPoolは既に閉じられています")
+                if self._idle:
+                    self.hits += 1
+                    return self._idle.pop()
+                if self._created < self.size:
+                    # 起動枠を先に確保してからロックの外で起動する
+                    self._created += 1
+                    self.misses += 1
+                    break
+                self._cond.wait()
+
+        try:
+            logger.info("ブラウザを新しく起動します")
+            return PooledSession(self.driver_factory())
+        except Exception:
+            # 起動に失敗したら枠を戻す
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, session, broken=False):
+        """
+        借りたブラウザを返す
+
+        Args:
+            session (PooledSession): acquire()で借りたセッション
+            broken (bool): 利用中にクラッシュした場合はTrue
+        """
+        session.uses += 1
+        if not broken and session.uses < self.max_uses and not self._closed:
+            # 次の利用者のためにCookie・ストレージを消す
+            # (ここで失敗したらブラウザが落ちていると判断する)
+            broken = not self._reset(session.driver)
+        else:
+            broken = True
+
+        if broken:
+            self._discard(session)
+            return
+
+        with self._cond:
+            if self._closed:
+                # 返却中にclose()された場合はここで閉じる
+                self._created -= 1
+                self._quit(session.driver)
+            else:
+                self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        """
+        with文でブラウザを借りる
+
+        Yields:
+            webdriver.Chrome: 借りたドライバー
+        """
+        session = self.acquire()
+        broken = False
+        try:
+            yield session.driver
+        except WebDriverException:
+            # WebDriverの例外で抜けた場合はブラウザの状態が分からないので捨てる
+            broken = True
+            raise
+        finally:
+            self.release(session, broken=broken)
+
+    def stats(self):
+        """
+        プールの統計情報を返す
+
+        Returns:
+            dict: size, created, idle, hits, misses, recycled, hit_ratio
+        """
+        with self._cond:
+            total = self.hits + self.misses
+            return {
+                'size': self.size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'hits': self.hits,
+                'misses': self.misses,
+                'recycled': self.recycled,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+    def close(self):
+        """空いているブラウザを全て閉じ、以後の貸し出しを止める"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for session in idle:
+            self._quit(session.driver)
+        logger.info(f"DriverPoolを閉じました: {self.stats()}")
+
+    def _discard(self, session):
+        """セッションを捨てて起動枠を空ける"""
+        self._quit(session.driver)
+        with self._cond:
+            self._created -= 1
+            self.recycled += 1
+            self._cond.notify()
+        logger.info(f"ブラウザを破棄しました(使用回数: {session.uses})")
+
+    @staticmethod
+    def _visited_origins(driver):
+        """
+        貸し出し中に訪れたオリジンを集める
+
+        タブの履歴(Page.getNavigationHistory)・今のページ・Cookieを持つドメイン
+        (他のサイトに埋め込まれていたものも含む)から集める。
+
+        Returns:
+            set: 'https://www.example.com' のようなオリジン
+        """
+        urls = [driver.current_url]
+        try:
+            history = driver.execute_cdp_cmd('Page.getNavigationHistory', {})
+            urls.extend(entry['url'] for entry in history.get('entries', []))
+        except Exception as e:
+            logger.debug(f"タブの履歴を取得できませんでした: {e}")
+        origins = set()
+        for url in urls:
+            parts = urlsplit(url)
+            if parts.scheme in ('http', 'https') and parts.hostname:
+                origins.add(f"{parts.scheme}://{parts.netloc.rpartition('@')[2].lower()}")
+        for cookie in driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', []):
+            host = cookie['domain'].lstrip('.').lower()
+            origins.update((f"https://{host}", f"http://{host}"))
+        return origins
+
+    @classmethod
+    def _reset(cls, driver):
+        """
+        Cookie・localStorage・sessionStorageを消して白紙ページに戻す
+
+        delete_all_cookies() やJavaScriptでの削除は今開いているオリジンの分しか消えないので、
+        Cookieは Network.clearBrowserCookies でブラウザ全体から、ストレージは貸し出し中に
+        訪れたオリジンごとに Storage.clearDataForOrigin で消す(オリジンに '*' は使えない)。
+
+        Returns:
+            bool: 成功したらTrue(ブラウザが落ちていればFalse)
+        """
+        try:
+            # sessionStorageはタブごとなので、今のオリジンの分はJavaScriptで消す
+            driver.execute_script(
+                "try { window.localStorage.clear(); } catch (e) {}"
+                "try { window.sessionStorage.clear(); } catch (e) {}"
+            )
+            origins = cls._visited_origins(driver)
+            # 全ドメインのCookie
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        except Exception as e:
+            logger.warning(f"ブラウザのリセットに失敗しました: {e}")
+            return False
+        # 訪れたオリジンごとのlocalStorage・IndexedDB・キャッシュなど
+        # (消せないオリジンがあってもブラウザは使えるので、記録だけして捨てない)
+        for origin in sorted(origins):
+            try:
+                driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            except Exception as e:
+                logger.warning(f"ストレージを消せませんでした: {origin} - {e}")
+        try:
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logger.warning(f"ブラウザのリセットに失敗しました: {e}")
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        """ドライバーを終了する(既に落ちていても例外を出さない)"""
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"ブラウザの終了に失敗しました: {e}")
+
+
+# プロセス全体で共有するデフォルトプール
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """
+    sctest.py / toku.py が共有するデフォルトプールを返す
+
+    ブラウザは実行モード(環境変数 RUN_MODE、run_mode.py参照)に合わせて起動する。
+
+    Returns:
+        DriverPool: 初回呼び出し時に作成されるプール
+    """
+    from run_mode import get_run_mode
+
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool(driver_factory=get_run_mode().driver_factory())
+            # プロセス終了時にブラウザを閉じる
+            atexit.register(_default_pool.close)
+        return _default_pool
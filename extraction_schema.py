@@ -0,0 +1,348 @@
+# === 宣言的な抽出スキーマ(toku.py の探索結果から作る) ===
+# toku.find_specific_elements はタイトル・日付・抜粋・カテゴリー・画像のセレクター候補を
+# 見つけるだけで、実際のスクレイパーでは毎回手で選び直していたので、
+# 「どの要素が1件分の記事か(container)」と「その中のどの要素が何の項目か(fields)」を
+# スキーマ(JSONにできる設定)にして、たくさんのページから型付きのレコードを取り出せるようにする
+# - infer_schema(): 候補のうち、記事1件ごとに1つずつ見つかるもの(被覆率が高いもの)を選ぶ
+# - compile_schema(): セレクターのコンパイル・レコード型の作成をスキーマごとに1回だけ行う
+# - 抽出: ページごとに SelectorIndex を1回作り、各セレクターは索引から引いて記事ごとに振り分ける
+# 例: python extraction_schema.py infer coorikuya_source.html --output schema.json
+#     python extraction_schema.py extract schema.json page1.html page2.html > records.ndjson
+
+# スキーマを変更できない値にするため
+from dataclasses import dataclass, asdict
+# 日付の型変換用
+from datetime import date, datetime
+# コンパイル結果をスキーマごとに使い回すため
+from functools import lru_cache
+# 型付きのレコードを作るため
+from collections import namedtuple
+# スキーマの保存・読み込み用
+import json
+# 日付らしい文字列を探すため
+import re
+# 画像・リンクのURLを絶対URLにするため
+from urllib.parse import urljoin
+# ログ出力用
+import logging
+
+from selector_index import SelectorIndex, compile_selector, UnsupportedSelector
+
+logger = logging.getLogger(__name__)
+
+# 記事一覧とみなす最小の件数
+MIN_RECORDS = 2
+# 項目として採用する最小の被覆率(記事のうち、その項目が見つかった割合)
+MIN_COVERAGE = 0.5
+# 項目の値の型
+FIELD_TYPES = ('text', 'list', 'datetime', 'url')
+# '2024年1月5日' '2024/01/05' '2024.1.5' のような日付
+_DATE_TEXT = re.compile(r'(\d{4})\s*[年/.\-]\s*(\d{1,2})\s*[月/.\-]\s*(\d{1,2})')
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    レコードの項目1つ分
+
+    Attributes:
+        name (str): 項目名(例: 'title')
+        selector (str): 記事の中で探すCSSセレクター
+        type (str): 'text'(最初の要素の文字) / 'list'(全要素の文字) /
+                    'datetime'(日付。attr があれば属性を優先) / 'url'(attr の値を絶対URLにする)
+        attr (str): 値を取る属性名(例: 'datetime', 'src'。省略時は文字)
+    """
+
+    name: str
+    selector: str
+    type: str = 'text'
+    attr: str = None
+
+
+@dataclass(frozen=True)
+class Schema:
+    """
+    1件分の記事(container)と、その中の項目(fields)の定義
+
+    変更できない(ハッシュできる)ので compile_schema() のキャッシュのキーにそのまま使える。
+
+    Attributes:
+        name (str): スキーマ名(レコード型の名前にもなる)
+        container (str): 記事1件分の要素のCSSセレクター
+        fields (tuple): Field のタプル
+    """
+
+    name: str
+    container: str
+    fields: tuple = ()
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'container': self.container,
+            'fields': [asdict(field) for field in self.fields],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['container'], tuple(Field(**field) for field in data['fields']))
+
+    def save(self, path):
+        """スキーマをJSONに保存する"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """save() したスキーマを読み込む"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def _group(elements, containers):
+    """
+    要素を、それを含む一番内側の記事ごとに振り分ける
+
+    Args:
+        elements: 要素のリスト(文書順)
+        containers: 記事の要素のリスト
+
+    Returns:
+        dict: 記事の番号 → その中の要素のリスト(文書順)
+    """
+    position = {id(el): i for i, el in enumerate(containers)}
+    groups = {}
+    for el in elements:
+        node = el.parent
+        while node is not None:
+            i = position.get(id(node))
+            if i is not None:
+                groups.setdefault(i, []).append(el)
+                break
+            node = node.parent
+    return groups
+
+
+def _text(element):
+    return element.get_text(' ', strip=True)
+
+
+def parse_date(value):
+    """
+    日付・日時の文字列を date / datetime にする
+
+    Args:
+        value (str): '2024-01-05T10:00:00+09:00' や '2024年1月5日' など
+
+    Returns:
+        date / datetime: 変換できなければNone
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        match = _DATE_TEXT.search(value)
+        if not match:
+            return None
+        try:
+            return date(*map(int, match.groups()))
+        except ValueError:
+            return None
+    # 時刻の無いISO形式は日付だけにする
+    return parsed.date() if len(value) <= 10 else parsed
+
+
+class CompiledSchema:
+    """
+    コンパイル済みのスキーマ(compile_schema() で作る)
+
+    Attributes:
+        schema (Schema): 元のスキーマ
+        record_type: 項目名 + 'url'(記事のあるページ)を持つ namedtuple
+    """
+
+    def __init__(self, schema):
+        for field in schema.fields:
+            if field.type not in FIELD_TYPES:
+                raise ValueError(f"{field.name}: type は {FIELD_TYPES} のどれかにしてください: {field.type}")
+            if field.type == 'url' and not field.attr:
+                raise ValueError(f"{field.name}: type='url' には attr が必要です")
+        self.schema = schema
+        # 索引で扱える構文かを先に確かめておく(扱えなければ soup.select に任せる)
+        for selector in (schema.container, *(field.selector for field in schema.fields)):
+            try:
+                compile_selector(selector)
+            except UnsupportedSelector:
+                logger.info(f"索引で扱えないセレクターなので soup.select で探します: {selector}")
+        self.record_type = namedtuple(
+            re.sub(r'\W', '_', schema.name).capitalize() or 'Record',
+            ('url',) + tuple(field.name for field in schema.fields),
+        )
+
+    def _value(self, field, elements, base_url):
+        """項目の型に合わせて値を取り出す"""
+        if field.type == 'list':
+            return [_text(el) for el in elements]
+        if not elements:
+            return None
+        first = elements[0]
+        if field.type == 'url':
+            value = first.get(field.attr)
+            return urljoin(base_url, value) if value else None
+        if field.type == 'datetime':
+            return parse_date((field.attr and first.get(field.attr)) or _text(first))
+        return first.get(field.attr) if field.attr else _text(first)
+
+    def extract(self, page, base_url=''):
+        """
+        1ページからレコードを取り出す(ジェネレーター)
+
+        Args:
+            page: SelectorIndex または BeautifulSoupオブジェクト
+            base_url (str): ページのURL(url型の項目を絶対URLにする基準)
+
+        Yields:
+            record_type: 記事1件分のレコード
+        """
+        index = page if isinstance(page, SelectorIndex) else SelectorIndex(page)
+        containers = index.select(self.schema.container)
+        if not containers:
+            return
+        groups = [_group(index.select(field.selector), containers) for field in self.schema.fields]
+        for i in range(len(containers)):
+            values = [self._value(field, group.get(i, []), base_url)
+                      for field, group in zip(self.schema.fields, groups)]
+            yield self.record_type(base_url, *values)
+
+
+@lru_cache(maxsize=64)
+def compile_schema(schema):
+    """
+    スキーマをコンパイルする(同じスキーマは使い回す)
+
+    Args:
+        schema (Schema): スキーマ
+
+    Returns:
+        CompiledSchema: コンパイル結果
+    """
+    return CompiledSchema(schema)
+
+
+def extract_records(pages, schema):
+    """
+    たくさんのページからレコードを取り出す(ジェネレーター)
+
+    Args:
+        pages: (URL, HTMLソース または BeautifulSoupオブジェクト) の並び
+        schema (Schema): スキーマ
+
+    Yields:
+        namedtuple: 記事1件分のレコード
+    """
+    from html_parsers import parse_html
+
+    compiled = compile_schema(schema)
+    for url, page in pages:
+        soup = parse_html(page) if isinstance(page, str) else page
+        yield from compiled.extract(soup, url)
+
+
+# 探索パターンの番号 → (項目名, 型, 属性)
+_FIELD_SECTIONS = (
+    ('2', 'title', 'text', None),
+    ('3', 'date', 'datetime', 'datetime'),
+    ('4', 'excerpt', 'text', None),
+    ('5', 'categories', 'list', None),
+)
+
+
+def _specificity(selector):
+    """セレクターの具体性(クラス・属性・idが多いほど、結合が多いほど具体的)"""
+    return selector.count('.') + selector.count('[') + selector.count('#') + len(selector.split())
+
+
+def infer_schema(index, report, name='articles'):
+    """
+    toku.py の探索結果から、記事1件ごとに1つずつ見つかる候補を選んでスキーマを作る
+
+    - container: パターン1の候補のうち、MIN_RECORDS 件以上見つかった最初のもの
+    - 各項目: 記事の中に見つかった割合(被覆率)が高く、記事の外にはみ出さず、具体的なもの
+
+    Args:
+        index (SelectorIndex): ページの索引
+        report: build_elements_report() のレポート(パターン1〜5)
+        name (str): スキーマ名
+
+    Returns:
+        Schema: スキーマ(記事一覧が見つからなければNone)
+    """
+    container = next((probe['selector'] for probe in report['1']['probes']
+                      if probe['count'] >= MIN_RECORDS), None)
+    if container is None:
+        return None
+    containers = index.select(container)
+    fields = []
+    for key, field_name, field_type, attr in _FIELD_SECTIONS:
+        best = None
+        for order, probe in enumerate(report[key]['probes']):
+            if not probe['count']:
+                continue
+            groups = _group(index.select(probe['selector']), containers)
+            coverage = len(groups) / len(containers)
+            inside = sum(len(group) for group in groups.values()) / probe['count']
+            score = (coverage, inside, _specificity(probe['selector']), -order)
+            if coverage >= MIN_COVERAGE and (best is None or score > best[0]):
+                best = (score, probe['selector'])
+        if best is not None:
+            fields.append(Field(field_name, best[1], field_type, attr))
+            if field_name == 'title':
+                # タイトルのリンク先を記事のURLにする('h2 a' のようにリンク自体ならその href)
+                link = f'{best[1]}[href]' if compile_selector(best[1]).groups[-1][-1].tag == 'a' \
+                    else f'{best[1]} a[href]'
+                fields.append(Field('link', link, 'url', 'href'))
+    # 記事の中の画像
+    if len(_group(index.by_tag.get('img', []), containers)) / len(containers) >= MIN_COVERAGE:
+        fields.append(Field('image', 'img', 'url', 'src'))
+    return Schema(name, container, tuple(fields))
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='抽出スキーマを作る・スキーマでレコードを取り出す')
+    commands = parser.add_subparsers(dest='command', required=True)
+    infer_parser = commands.add_parser('infer', help='保存済みHTMLから toku.py の探索でスキーマを作る')
+    infer_parser.add_argument('html')
+    infer_parser.add_argument('--url', default='https://www.coorikuya.com/')
+    infer_parser.add_argument('--output', default='schema.json')
+    extract_parser = commands.add_parser('extract', help='スキーマで複数のHTMLからレコードをNDJSONで出力する')
+    extract_parser.add_argument('schema')
+    extract_parser.add_argument('html', nargs='+')
+    args = parser.parse_args()
+
+    from html_parsers import parse_html
+
+    if args.command == 'infer':
+        from toku import build_elements_report
+        with open(args.html, encoding='utf-8') as f:
+            report = build_elements_report(parse_html(f.read()), args.url)
+        schema = Schema.from_dict(report['11']['schema']) if report['11']['schema'] else None
+        if schema is None:
+            sys.exit('記事一覧が見つからないのでスキーマを作れません')
+        schema.save(args.output)
+        print(json.dumps(schema.to_dict(), ensure_ascii=False, indent=2))
+    else:
+        schema = Schema.load(args.schema)
+
+        def pages():
+            for path in args.html:
+                with open(path, encoding='utf-8') as f:
+                    yield path, f.read()
+
+        for record in extract_records(pages(), schema):
+            print(json.dumps(record._asdict(), ensure_ascii=False, default=str))
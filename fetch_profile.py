@@ -0,0 +1,224 @@
+# === 読み込むリソースを絞る取得プロファイル ===
+# 構造の分析には画像・フォント・動画・広告/計測スクリプトは要らないので、
+# Chromeの設定(prefs)と DevTools の Network.setBlockedURLs で読み込まないようにする
+# - full      : 何も止めない(今までどおり。スクリーンショットも見たままになる)
+# - structure : 画像・フォント・動画/音声・計測/広告スクリプトを止める
+# - text      : structure に加えてCSSも止める(DOMだけ分かればよいとき)
+# 例: FETCH_PROFILE=structure python sctest.py
+#     python fetch_profile.py https://www.coorikuya.com/   (プロファイルごとの削減量を比較)
+
+# 環境変数でプロファイルを選べるようにするため
+import os
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 種類ごとに止めるURLのパターン(クエリ付きのURLにも当たるように2通り書く)
+_EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': ('mp4', 'webm', 'mov', 'm4v', 'mp3', 'm4a', 'ogg', 'wav'),
+    'stylesheet': ('css',),
+}
+RESOURCE_PATTERNS = {
+    kind: tuple(pattern for ext in extensions for pattern in (f'*.{ext}', f'*.{ext}?*'))
+    for kind, extensions in _EXTENSIONS.items()
+}
+
+# 計測・広告など、構造の分析に関係ない第三者スクリプトの配信元
+TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'connect.facebook.net',
+    'platform.twitter.com',
+    'static.hotjar.com',
+    'clarity.ms',
+    'cdn.amplitude.com',
+)
+
+# ページ内で読み込まれたリソースの量と読み込み時間を Performance API から集める
+# (Timing-Allow-Origin の無い他ドメインのリソースは transferSize が0になるので目安)
+_MEASURE_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const entry of resources) bytes += entry.transferSize;
+return {
+    resources: resources.length,
+    bytes: bytes,
+    load_ms: nav ? Math.round(nav.loadEventEnd || nav.duration) : null,
+};
+"""
+
+
+class FetchProfile:
+    """
+    読み込まないリソースの種類・配信元の組み合わせ
+
+    Args:
+        name (str): プロファイル名(レポートに記録する)
+        block (tuple): 止める種類('image' / 'font' / 'media' / 'stylesheet')
+        block_trackers (bool): TRACKER_DOMAINS のスクリプトを止めるか
+        block_domains (tuple): 追加で止める配信元のドメイン
+
+    Example:
+        >>> profile = FetchProfile('no-images', block=('image',))
+        >>> profile.apply(driver)
+    """
+
+    def __init__(self, name, block=(), block_trackers=False, block_domains=()):
+        unknown = set(block) - RESOURCE_PATTERNS.keys()
+        if unknown:
+            raise ValueError(f"止められる種類は {', '.join(RESOURCE_PATTERNS)} です: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.block = tuple(block)
+        self.block_trackers = block_trackers
+        self.block_domains = tuple(block_domains)
+
+    def __repr__(self):
+        return f"FetchProfile({self.name!r})"
+
+    def blocked_patterns(self):
+        """
+        Network.setBlockedURLs に渡すURLパターンを返す
+
+        Returns:
+            list: '*' をワイルドカードにしたURLパターン
+        """
+        patterns = [pattern for kind in self.block for pattern in RESOURCE_PATTERNS[kind]]
+        domains = (TRACKER_DOMAINS if self.block_trackers else ()) + self.block_domains
+        patterns += [f'*://{domain}/*' for domain in domains]
+        patterns += [f'*://*.{domain}/*' for domain in domains]
+        return patterns
+
+    def chrome_prefs(self):
+        """
+        Chromeの起動オプションに入れる設定を返す(画像はブラウザ自体で止める)
+
+        Returns:
+            dict: add_experimental_option('prefs', ...) に渡す設定
+        """
+        if 'image' in self.block:
+            return {'profile.managed_default_content_settings.images': 2}
+        return {}
+
+    def apply(self, driver):
+        """
+        起動したブラウザにURLのブロックを設定する(ブラウザ1つにつき1回)
+
+        Args:
+            driver: Chromeドライバー
+        """
+        patterns = self.blocked_patterns()
+        if patterns:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        # どのプロファイルで読み込んだかをレポートに書けるようにしておく
+        driver.fetch_profile = self
+        logger.debug(f"取得プロファイル {self.name}: {len(patterns)}パターンをブロック")
+
+
+# 用意しているプロファイル
+FETCH_PROFILES = {
+    'full': FetchProfile('full'),
+    'structure': FetchProfile('structure', block=('image', 'font', 'media'), block_trackers=True),
+    'text': FetchProfile('text', block=('image', 'font', 'media', 'stylesheet'), block_trackers=True),
+}
+DEFAULT_FETCH_PROFILE = 'full'
+
+
+def get_fetch_profile(profile=None):
+    """
+    プロファイル名(またはFetchProfile)からFetchProfileを返す
+
+    Args:
+        profile: プロファイル名 / FetchProfile(省略時は環境変数 FETCH_PROFILE、無ければ full)
+
+    Returns:
+        FetchProfile: 取得プロファイル
+    """
+    if isinstance(profile, FetchProfile):
+        return profile
+    name = profile or os.environ.get('FETCH_PROFILE') or DEFAULT_FETCH_PROFILE
+    if name not in FETCH_PROFILES:
+        raise ValueError(f"取得プロファイルは {', '.join(FETCH_PROFILES)} のどれかを指定してください: {name}")
+    return FETCH_PROFILES[name]
+
+
+def measure_page(driver):
+    """
+    今のページで実際に読み込んだ量と時間を返す
+
+    Args:
+        driver: Chromeドライバー
+
+    Returns:
+        dict: profile, resources, bytes, load_ms
+    """
+    profile = getattr(driver, 'fetch_profile', None)
+    measured = driver.execute_script(_MEASURE_SCRIPT)
+    measured['profile'] = profile.name if profile else DEFAULT_FETCH_PROFILE
+    return measured
+
+
+def compare_profiles(urls, profiles=('full', 'structure', 'text'), mode=None):
+    """
+    同じURLをプロファイルごとに読み込み、full と比べた削減量を返す
+
+    Args:
+        urls: 読み込むURLのリスト
+        profiles: 比べるプロファイル名(full は必ず含める)
+        mode: 実行モード(run_mode.pyのRunMode。省略時はヘッドレス)
+
+    Returns:
+        dict: URL → プロファイル名 → {'bytes', 'load_ms', 'bytes_saved', 'ms_saved', ...}
+    """
+    from driver_pool import DriverPool
+    from page_ready import wait_for_page
+    from run_mode import RunMode
+
+    mode = mode or RunMode('headless')
+    profiles = ('full',) + tuple(name for name in profiles if name != 'full')
+    results = {url: {} for url in urls}
+    for name in profiles:
+        pool = DriverPool(size=1, driver_factory=mode.driver_factory(profile=name))
+        try:
+            with pool.lease() as driver:
+                for url in urls:
+                    driver.get(url)
+                    wait_for_page(driver, url)
+                    results[url][name] = measure_page(driver)
+        finally:
+            pool.close()
+
+    for per_profile in results.values():
+        baseline = per_profile['full']
+        for measured in per_profile.values():
+            measured['bytes_saved'] = baseline['bytes'] - measured['bytes']
+            if baseline['load_ms'] is not None and measured['load_ms'] is not None:
+                measured['ms_saved'] = baseline['load_ms'] - measured['load_ms']
+            else:
+                measured['ms_saved'] = None
+    return results
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='取得プロファイルごとに読み込み量・時間の削減を比べる')
+    parser.add_argument('urls', nargs='*', default=['https://www.coorikuya.com/'], help='比べるURL')
+    parser.add_argument('--profiles', nargs='+', default=list(FETCH_PROFILES), choices=list(FETCH_PROFILES),
+                        help='比べるプロファイル')
+    args = parser.parse_args()
+
+    for url, per_profile in compare_profiles(args.urls, args.profiles).items():
+        print(url)
+        for name, measured in per_profile.items():
+            print(f"  {name:>9}: {measured['resources']:>4}件 {measured['bytes']:>10,}バイト "
+                  f"{measured['load_ms']}ms (削減 {measured['bytes_saved']:,}バイト / {measured['ms_saved']}ms)")
@@ -0,0 +1,226 @@
+# === ローカルHTTPフィクスチャサーバー ===
+# ネットワーク無しでバッチ処理などを試すための小さなWebサーバー
+# 例: python fixture_server.py site_fixture --pages 50
+
+# 標準ライブラリのHTTPサーバー
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+# ディレクトリ指定のハンドラーを作るため
+from functools import partial
+# サーバーを裏で動かすため
+import threading
+# ファイル操作用
+import os
+import shutil
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    """アクセスログを標準エラーに出さないハンドラー"""
+
+    def log_message(self, format, *args):
+        logger.debug("fixture: " + format, *args)
+
+
+class FixtureServer:
+    """
+    指定ディレクトリを配信するローカルHTTPサーバー
+
+    with文で使うと、ブロックを抜けた時に自動で停止する。
+
+    Args:
+        directory (str): 配信するディレクトリ
+        host (str): 待ち受けるホスト
+        port (int): 待ち受けるポート(0なら空いているポートを自動選択)
+
+    Example:
+        >>> with FixtureServer('site_fixture') as server:
+        ...     print(server.url('page_001.html'))
+    """
+
+    def __init__(self, directory, host='127.0.0.1', port=0):
+        self.directory = os.path.abspath(directory)
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """サーバーを別スレッドで起動する"""
+        handler = partial(_QuietHandler, directory=self.directory)
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        # port=0 の場合に実際に割り当てられたポートを記録
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"フィクスチャサーバー起動: {self.url()} ({self.directory})")
+        return self
+
+    def stop(self):
+        """サーバーを停止する"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            logger.info("フィクスチャサーバーを停止しました")
+
+    def url(self, path=''):
+        """
+        配信中のファイルのURLを返す
+
+        Args:
+            path (str): ディレクトリ内の相対パス
+
+        Returns:
+            str: http://host:port/path
+        """
+        return f"http://{self.host}:{self.port}/{path.lstrip('/')}"
+
+    def page_urls(self):
+        """
+        ディレクトリ内の全HTMLファイルのURLを返す
+
+        Returns:
+            list: URLのリスト(ファイル名順)
+        """
+        urls = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in sorted(files):
+                if name.endswith(('.html', '.htm')):
+                    rel = os.path.relpath(os.path.join(root, name), self.directory)
+                    urls.append(self.url(rel.replace(os.sep, '/')))
+        return sorted(urls)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def write_fixture_site(directory, pages=20, template='coorikuya_source.html'):
+    """
+    テスト用のサイト(互いにリンクしたHTMLページ群)を作成する
+
+    template のHTMLがあればそれを各ページの本文として使い、
+    無ければ簡単な記事一覧ページを生成する。
+
+    Args:
+        directory (str): 出力先ディレクトリ
+        pages (int): 作成するページ数
+        template (str): 本文に使うHTMLファイル
+
+    Returns:
+        list: 作成したファイル名のリスト
+    """
+    os.makedirs(directory, exist_ok=True)
+    body = None
+    if template and os.path.exists(template):
+        with open(template, encoding='utf-8') as f:
+            body = f.read()
+
+    names = [f"page_{i:03d}.html" for i in range(pages)]
+    for i, name in enumerate(names):
+        # 前後のページへのリンクでサイト内を巡回できるようにする
+        nav = ''.join(
+            f'<li><a href="{names[j]}">page {j}</a></li>'
+            for j in (i - 1, i + 1) if 0 <= j < pages
+        )
+        if body is None:
+            items = ''.join(
+                f'<article class="post"><h2 class="entry-title"><a href="{name}#p{k}">'
+                f'記事 {i}-{k}</a></h2><time datetime="2025-10-{k + 1:02d}">10/{k + 1}</time>'
+                f'<p class="excerpt">抜粋 {k}</p></article>'
+                for k in range(10)
+            )
+            html = (
+                f'<html><head><title>fixture {i}</title></head><body>'
+                f'<header class="site-header"><nav><ul>{nav}</ul></nav></header>'
+                f'<main class="content">{items}</main></body></html>'
+            )
+        else:
+            html = body.replace('<body', f'<body data-fixture-page="{i}"', 1)
+            html = html.replace('</body>', f'<nav class="fixture-nav"><ul>{nav}</ul></nav></body>', 1)
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    # 全ページへのリンクを持つ目次ページ
+    with open(os.path.join(directory, 'index.html'), 'w', encoding='utf-8') as f:
+        links = ''.join(f'<li><a href="{n}">{n}</a></li>' for n in names)
+        f.write(f'<html><head><title>fixture index</title></head><body><ul>{links}</ul></body></html>')
+    return names
+
+
+def write_large_page(path, megabytes=20):
+    """
+    巨大な商品一覧ページ(無限スクロールで読み込みきった状態を想定)を作成する
+
+    大量の商品カード(一意なid・data属性・リンク・画像)を、メモリに溜めずに少しずつ書き出す。
+    閉じタグを省略した<li>・<p>も混ぜて、パーサーの補完の違いも確かめられるようにする。
+
+    Args:
+        path (str): 出力先のHTMLファイル
+        megabytes (float): おおよそのファイルサイズ(MB)
+
+    Returns:
+        int: 書き出した商品カードの数
+    """
+    target = int(megabytes * 1024 * 1024)
+    cards = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(
+            '<!DOCTYPE html><html><head><title>巨大な商品一覧</title>'
+            '<meta name="description" content="ストリーミング解析の確認用">'
+            '<link rel="stylesheet" href="/style.css"></head><body>'
+            '<header class="site-header"><nav class="global-nav"><ul>'
+            + ''.join(f'<li><a href="/category/{i}/">カテゴリー {i}</a>' for i in range(12))
+            + '</ul></nav></header><main class="catalog"><h1>商品一覧</h1><ul class="product-list">'
+        )
+        written = f.tell()
+        while written < target:
+            block = []
+            for i in range(cards, cards + 500):
+                block.append(
+                    f'<li class="product-card card-variant-{i % 7}" id="product-{i}" '
+                    f'data-sku="SKU{i:08d}" data-price="{(i * 37) % 10000}">'
+                    f'<a class="product-link" href="/item/{i}/"><img src="/img/{i}.jpg" alt="商品 {i}" loading="lazy"></a>'
+                    f'<h2 class="product-title"><a href="/item/{i}/">商品名 {i}</a></h2>'
+                    f'<p class="price">{(i * 37) % 10000}円<p class="note">在庫あり'
+                    f'<a class="shop-link" href="https://shop{i % 50}.example.com/?ref={i}">販売店</a>'
+                )
+            cards += len(block)
+            f.write(''.join(block))
+            written = f.tell()
+        f.write('</ul></main><footer><p>&copy; fixture</p></footer></body></html>')
+    return cards
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='ローカルHTTPフィクスチャサーバー')
+    parser.add_argument('directory', help='配信するディレクトリ')
+    parser.add_argument('--pages', type=int, default=0, help='指定するとテスト用サイトを作り直す')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.pages:
+        shutil.rmtree(args.directory, ignore_errors=True)
+        write_fixture_site(args.directory, pages=args.pages)
+
+    with FixtureServer(args.directory, port=args.port) as server:
+        print(f"配信中: {server.url()}  (Ctrl+Cで停止)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,424 @@
+# === 頻出クラス名・ID・data属性のトップN(ヘビーヒッター) ===
+# 【6】や toku.py のパターン9では、全クラス名を普通の辞書で数えてから全件ソートして
+# 上位10件だけ表示していたが、巨大なページや数千ページ分をまとめて数えると
+# 辞書もソートもどんどん大きくなるので、メモリの上限を決められるカウンターにする
+# - exact : 普通の辞書で正確に数える(上位N件は全件ソートせずヒープで取り出す)
+# - approx: Space-Saving法。capacity 個の候補だけを覚え、あふれたら一番少ない候補と入れ替える
+#           (出現数が全体の 1/capacity を超えるものは必ず残り、数の誤差は error() 以下)
+# どちらも同じ add / top / merge を持つので、ページ内でもクロール全体でも同じように使える
+# 例: HEAVY_HITTERS_CAPACITY=1000 python batch_crawl.py urls.txt   (近似モード・候補1000個)
+#     python heavy_hitters.py coorikuya_source.html 50               (正確な結果との比較)
+
+# 上位N件をヒープで取り出すため
+import heapq
+# 出現数でソートするため
+from operator import itemgetter
+# 環境変数でモードを選ぶため
+import os
+# クロール全体の集計を複数スレッドから使うため
+import threading
+
+
+class ExactCounter(dict):
+    """
+    正確に数えるカウンター(項目 → 回数の辞書そのもの)
+
+    Example:
+        >>> counter = ExactCounter()
+        >>> counter.add('entry-title')
+        >>> counter.top(1)
+        [('entry-title', 1)]
+    """
+
+    approximate = False
+
+    def add(self, item, count=1):
+        """項目を count 回数える"""
+        self[item] = self.get(item, 0) + count
+
+    def error(self, item):
+        """数の誤差の上限(正確なので常に0)"""
+        return 0
+
+    def top(self, n=10):
+        """
+        出現回数の多い項目を返す(同数なら初出順。全件ソートはしない)
+
+        Args:
+            n (int): 返す件数
+
+        Returns:
+            list: (項目, 回数) のリスト
+        """
+        return heapq.nlargest(n, self.items(), key=itemgetter(1))
+
+    def top_guaranteed(self, n=10):
+        """確実な回数の多い項目を返す(正確なので top() と同じ)"""
+        return self.top(n)
+
+    def merge(self, other):
+        """別のカウンター(ページ・ワーカーごとの集計)を足し込む"""
+        for item, count in other.items():
+            self.add(item, count)
+        return self
+
+    def to_dict(self):
+        return {'mode': 'exact', 'counts': list(self.items())}
+
+
+class SpaceSavingCounter:
+    """
+    Space-Saving法でメモリを一定に保つ近似カウンター
+
+    覚えるのは capacity 個の候補だけ。新しい項目が来て満杯なら、一番少ない候補を追い出して
+    その回数+1から数え始める(追い出した回数が誤差として残る)。
+    そのため回数は実際より多めになることはあっても少なくなることはない。
+
+    Args:
+        capacity (int): 覚える候補の数(上位N件を求めるならNの数倍以上)
+
+    Example:
+        >>> counter = SpaceSavingCounter(capacity=1000)
+        >>> for cls in classes:
+        ...     counter.add(cls)
+        >>> counter.top(10)
+    """
+
+    approximate = True
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError(f"capacity は1以上にしてください: {capacity}")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # (回数, 順番, 項目) の最小ヒープ。add() で回数が増えても直さず、取り出すときに確かめる
+        self._heap = []
+        self._seq = 0
+        # 数えた回数の合計
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, item):
+        return item in self.counts
+
+    def items(self):
+        return self.counts.items()
+
+    def get(self, item, default=0):
+        return self.counts.get(item, default)
+
+    def _push(self, item, count):
+        self._seq += 1
+        heapq.heappush(self._heap, (count, self._seq, item))
+
+    def _pop_min(self):
+        """一番少ない候補を取り出す(古い回数のままのヒープの要素は積み直す)"""
+        while True:
+            count, _seq, item = heapq.heappop(self._heap)
+            current = self.counts[item]
+            if current == count:
+                return item, count
+            self._push(item, current)
+
+    def add(self, item, count=1):
+        """項目を count 回数える"""
+        self.total += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+        else:
+            evicted, floor = self._pop_min()
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[item] = floor + count
+            self.errors[item] = floor
+        self._push(item, counts[item])
+
+    def error(self, item):
+        """
+        項目の回数の誤差の上限を返す
+
+        Returns:
+            int: 実際の回数は get(item) - error(item) 以上 get(item) 以下
+        """
+        return self.errors.get(item, 0)
+
+    def top(self, n=10):
+        """
+        出現回数(推定)の多い項目を返す(同数なら先に候補になった順)
+
+        Args:
+            n (int): 返す件数
+
+        Returns:
+            list: (項目, 推定回数) のリスト
+        """
+        return heapq.nlargest(n, self.counts.items(), key=itemgetter(1))
+
+    def top_guaranteed(self, n=10):
+        """
+        誤差を引いた「少なくともこの回数」の多い項目を返す
+
+        重複の確認のように、実際より多く数えると間違いになる用途で使う。
+
+        Args:
+            n (int): 返す件数
+
+        Returns:
+            list: (項目, 回数の下限) のリスト
+        """
+        errors = self.errors
+        return heapq.nlargest(n, ((item, count - errors[item]) for item, count in self.counts.items()),
+                              key=itemgetter(1))
+
+    def _floor(self):
+        """覚えていない項目の回数の上限(満杯なら一番少ない候補の回数、空きがあれば0)"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """
+        別のカウンターを足し込む(ワーカーごと・ページごとの集計をまとめる)
+
+        両方の候補を合わせて回数と誤差を項目ごとに足し、多い順に capacity 個だけ残す
+        (mergeable summary のやり方)。片方に無い項目には、その側の覚えていない項目の回数の上限
+        (満杯なら一番少ない候補の回数)を回数にも誤差にも足すので、回数は実際以上・
+        get(item) - error(item) は実際以下のまま保たれる。
+        全体の1/capacity を超える項目はまとめる順番によらず残るが、それより少ない項目の回数は
+        順番によって変わることがある(同じ結果になるのは正確に数えるときだけ)。
+
+        Args:
+            other: ExactCounter / SpaceSavingCounter / 項目 → 回数の辞書
+
+        Returns:
+            SpaceSavingCounter: self
+        """
+        other_counts = dict(other.items())
+        other_errors = getattr(other, 'errors', {})
+        other_floor = other._floor() if isinstance(other, SpaceSavingCounter) else 0
+        floor = self._floor()
+        counts = {}
+        errors = {}
+        for item in self.counts.keys() | other_counts.keys():
+            counts[item] = self.counts.get(item, floor) + other_counts.get(item, other_floor)
+            errors[item] = self.errors.get(item, floor) + other_errors.get(item, other_floor)
+        # 同数なら項目の順にして、どちらから足しても同じ候補が残るようにする
+        kept = heapq.nsmallest(self.capacity, counts, key=lambda item: (-counts[item], item))
+        self.total += getattr(other, 'total', None) or sum(other_counts.values())
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self._heap = []
+        for item in kept:
+            self._push(item, counts[item])
+        return self
+
+    def to_dict(self):
+        return {
+            'mode': 'approx',
+            'capacity': self.capacity,
+            'total': self.total,
+            'counts': [[item, count, self.errors[item]] for item, count in self.counts.items()],
+        }
+
+
+def new_counter(capacity=None):
+    """
+    カウンターを作る
+
+    Args:
+        capacity (int): 近似モードの候補数(省略時は環境変数 HEAVY_HITTERS_CAPACITY。0・未設定なら正確に数える)
+
+    Returns:
+        ExactCounter / SpaceSavingCounter: カウンター
+    """
+    if capacity is None:
+        capacity = int(os.environ.get('HEAVY_HITTERS_CAPACITY') or 0)
+    return SpaceSavingCounter(capacity) if capacity else ExactCounter()
+
+
+def counter_from_items(items, capacity=None):
+    """
+    (項目, 回数) の並びからカウンターを作る(ブラウザ内抽出の結果の変換用)
+
+    Args:
+        items: (項目, 回数) の並び
+        capacity (int): new_counter() と同じ
+
+    Returns:
+        ExactCounter / SpaceSavingCounter: カウンター
+    """
+    counter = new_counter(capacity)
+    for item, count in items:
+        counter.add(item, count)
+    return counter
+
+
+def counter_from_dict(data):
+    """
+    to_dict() で保存したカウンターを元に戻す
+
+    Args:
+        data (dict): ExactCounter / SpaceSavingCounter の to_dict() の結果
+
+    Returns:
+        ExactCounter / SpaceSavingCounter: カウンター
+    """
+    if data['mode'] == 'exact':
+        return ExactCounter((item, count) for item, count in data['counts'])
+    counter = SpaceSavingCounter(data['capacity'])
+    for item, count, error in data['counts']:
+        counter.counts[item] = count
+        counter.errors[item] = error
+        counter._push(item, count)
+    counter.total = data['total']
+    return counter
+
+
+def copy_counter(counter):
+    """カウンターを複製する(元のカウンターを変えずにまとめ方を試すため)"""
+    return counter_from_dict(counter.to_dict())
+
+
+def check_merge_order(counters, capacity=None, n=10):
+    """
+    カウンターを何通りかの順番でまとめて、結果が同じになるか比べる
+
+    前から順・後ろから順・半分ずつまとめてから足す(A+(B+C) の形)の3通りを試す。
+
+    Args:
+        counters: まとめるカウンターのリスト(ワーカー・シャードごとの集計)
+        capacity (int): まとめ先のカウンターの候補数(new_counter() と同じ)
+        n (int): 上位として比べる件数
+
+    Returns:
+        dict: same_top(上位n件の項目と順位が同じか), same_counts(全候補の回数と誤差まで同じか),
+              max_difference(順番による回数の差の最大)
+    """
+    def merge_all(items):
+        result = new_counter(capacity)
+        for counter in items:
+            result.merge(copy_counter(counter))
+        return result
+
+    def merge_halves(items):
+        if len(items) <= 1:
+            return merge_all(items)
+        middle = len(items) // 2
+        return merge_all([merge_halves(items[:middle]), merge_halves(items[middle:])])
+
+    def ranking(result):
+        # 同数なら項目の順にして、足した順番による並びの違いを除く
+        return [item for item, _ in heapq.nsmallest(n, result.items(), key=lambda x: (-x[1], x[0]))]
+
+    counters = list(counters)
+    results = [merge_all(counters), merge_all(counters[::-1]), merge_halves(counters)]
+    tables = [{item: (count, result.error(item)) for item, count in result.items()} for result in results]
+    names = set().union(*tables)
+    max_difference = max(
+        (max(table.get(name, (0, 0))[0] for table in tables) - min(table.get(name, (0, 0))[0] for table in tables)
+         for name in names),
+        default=0,
+    )
+    return {
+        'same_top': all(ranking(result) == ranking(results[0]) for result in results),
+        'same_counts': all(table == tables[0] for table in tables),
+        'max_difference': max_difference,
+    }
+
+
+class FrequencyTally:
+    """
+    クロール全体のクラス名・ID・data属性の出現数を集める(複数スレッドから使える)
+
+    Args:
+        capacity (int): new_counter() と同じ(省略時は環境変数 HEAVY_HITTERS_CAPACITY)
+
+    Example:
+        >>> tally = FrequencyTally()
+        >>> tally.add_stats(stats)       # ページごとの DomStats
+        >>> tally.top(10)['classes']
+    """
+
+    KINDS = ('classes', 'ids', 'data_attributes')
+
+    def __init__(self, capacity=None):
+        self.counters = {kind: new_counter(capacity) for kind in self.KINDS}
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def add_stats(self, stats):
+        """
+        1ページ分の DomStats を足し込む
+
+        Args:
+            stats (DomStats): ページのDOM統計
+        """
+        with self._lock:
+            self.pages += 1
+            self.counters['classes'].merge(stats.class_counts)
+            self.counters['ids'].merge(stats.id_counts)
+            self.counters['data_attributes'].merge(stats.data_attribute_counts)
+
+    def merge(self, other):
+        """別の FrequencyTally(別ワーカー・別シャード)を足し込む"""
+        with self._lock:
+            self.pages += other.pages
+            for kind in self.KINDS:
+                self.counters[kind].merge(other.counters[kind])
+        return self
+
+    def top(self, n=10):
+        """
+        種類ごとの上位N件を返す
+
+        Returns:
+            dict: classes / ids / data_attributes → (項目, 回数) のリスト
+        """
+        with self._lock:
+            return {kind: counter.top(n) for kind, counter in self.counters.items()}
+
+    def stats(self):
+        """
+        集計の状況を返す
+
+        Returns:
+            dict: pages, approximate, tracked(種類 → 覚えている項目数)
+        """
+        with self._lock:
+            return {
+                'pages': self.pages,
+                'approximate': self.counters['classes'].approximate,
+                'tracked': {kind: len(counter) for kind, counter in self.counters.items()},
+            }
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import sys
+    from html_parsers import collect_stats
+
+    # 保存済みHTMLのクラス名を正確・近似の両方で数えて上位10件を比べる
+    path = sys.argv[1] if len(sys.argv) > 1 else 'coorikuya_source.html'
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with open(path, encoding='utf-8') as f:
+        exact = collect_stats(f.read()).class_counts
+    approx = SpaceSavingCounter(capacity).merge(exact)
+    print(f"{path}: クラス名 {len(exact)}種類 → 近似は {len(approx)}個だけ記憶")
+    for (cls, count), (approx_cls, approx_count) in zip(exact.top(10), approx.top(10)):
+        print(f"  {cls:30s} {count:5d}   {approx_cls:30s} {approx_count:5d} (誤差≦{approx.error(approx_cls)})")
+
+    # 3つのシャードに分けて数え、まとめる順番で結果が変わらないか確かめる
+    shards = [ExactCounter() for _ in range(3)]
+    for i, (cls, count) in enumerate(exact.items()):
+        shards[i % 3].add(cls, count)
+    for mode, shard_capacity in (('正確', 0), ('近似', capacity)):
+        check = check_merge_order([counter_from_items(shard.items(), shard_capacity) for shard in shards],
+                                  capacity=shard_capacity)
+        print(f"{mode}: 上位10件{'同じ' if check['same_top'] else '違う'} / "
+              f"全候補の回数{'同じ' if check['same_counts'] else '違う'} (順番による差は最大{check['max_difference']})")
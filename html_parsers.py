@@ -0,0 +1,250 @@
+# === HTMLパーサーの切り替え ===
+# driver.page_source の解析に使うパーサーを1か所で選べるようにする
+# - html.parser : 標準ライブラリ(Pythonだけで動くが一番遅い)
+# - lxml        : C拡張(libxml2)。BeautifulSoupの木を速く作れる
+# - selectolax  : C拡張(lexbor)。BeautifulSoupを使わず統計だけを最速で集める
+# 例: python html_parsers.py coorikuya_source.html  (一致確認とベンチマーク)
+
+# BeautifulSoupでHTML解析
+from bs4 import BeautifulSoup
+# インストール済みのパーサーを調べるため
+from bs4.builder import builder_registry
+# 環境変数でパーサーを固定できるようにするため
+import os
+# ログ出力用
+import logging
+
+from dom_stats import DomStatsCollector, walk_soup
+from link_frontier import classify_links
+
+logger = logging.getLogger(__name__)
+
+# BeautifulSoupの木を作れるパーサー(速い順)
+SOUP_BACKENDS = ('lxml', 'html.parser')
+# 統計を集められるパーサー(速い順)
+STATS_BACKENDS = ('selectolax', 'lxml', 'html.parser')
+
+
+def _is_installed(backend):
+    """パーサーが使えるかどうかを返す"""
+    if backend == 'selectolax':
+        try:
+            from selectolax.lexbor import LexborHTMLParser  # noqa: F401
+        except ImportError:
+            return False
+        return True
+    return builder_registry.lookup(backend) is not None
+
+
+def available_backends():
+    """
+    インストール済みのパーサー名を返す
+
+    Returns:
+        list: 使えるパーサー名(速い順)
+    """
+    return [backend for backend in STATS_BACKENDS if _is_installed(backend)]
+
+
+def _select(candidates):
+    """環境変数 HTML_PARSER の指定、無ければ候補の先頭で使えるものを返す"""
+    forced = os.environ.get('HTML_PARSER')
+    if forced and forced not in STATS_BACKENDS:
+        raise ValueError(f"HTML_PARSER={forced} は使えません(候補: {', '.join(STATS_BACKENDS)})")
+    if forced in candidates:
+        if not _is_installed(forced):
+            raise ValueError(f"HTML_PARSER={forced} はインストールされていません")
+        return forced
+    for backend in candidates:
+        if _is_installed(backend):
+            return backend
+    return 'html.parser'
+
+
+# 起動時に一度だけ選んでおく
+SOUP_BACKEND = _select(SOUP_BACKENDS)
+STATS_BACKEND = _select(STATS_BACKENDS)
+logger.debug(f"HTMLパーサー: soup={SOUP_BACKEND}, stats={STATS_BACKEND}")
+
+
+def parse_html(source, backend=None):
+    """
+    HTMLをBeautifulSoupで解析する
+
+    Args:
+        source (str): HTMLソース
+        backend (str): 'lxml' / 'html.parser'(省略時は起動時に選んだもの)
+
+    Returns:
+        BeautifulSoup: 解析結果
+    """
+    return BeautifulSoup(source, backend or SOUP_BACKEND)
+
+
+def _walk_selectolax(node, collector):
+    """selectolaxの木を1回たどり、collectorにイベントを送る"""
+    # 再帰だと深いページで上限に当たるので、スタックでたどる
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            # 子要素を全部処理し終わった目印
+            collector.end()
+            continue
+        tag = node.tag
+        if tag == '-text':
+            collector.text(node.text(deep=False))
+        elif tag[0] not in '-#_!':
+            # 値の無い属性(hidden など)はBeautifulSoupと同じく空文字にそろえる
+            attrs = {k: ('' if v is None else v) for k, v in node.attributes.items()}
+            collector.start(tag, attrs)
+            stack.append(None)
+            children = []
+            child = node.child
+            while child is not None:
+                children.append(child)
+                child = child.next
+            stack.extend(reversed(children))
+
+
+def walk_source(source, collector, backend=None):
+    """
+    HTMLソースを解析して1回たどり、collectorに start / text / end のイベントを送る
+
+    selectolax の場合はBeautifulSoupの木を作らずに直接たどる。
+
+    Args:
+        source (str): HTMLソース
+        collector: start / text / end を持つオブジェクト(DomStatsCollector など)
+        backend (str): パーサー名(省略時は起動時に選んだ最速のもの)
+    """
+    backend = backend or STATS_BACKEND
+    if backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        _walk_selectolax(LexborHTMLParser(source).root, collector)
+    else:
+        walk_soup(parse_html(source, backend), collector)
+
+
+def collect_stats(source, backend=None):
+    """
+    HTMLソースからDOM統計を集める
+
+    selectolax の場合はBeautifulSoupの木を作らずに直接集める。
+
+    Args:
+        source (str): HTMLソース
+        backend (str): パーサー名(省略時は起動時に選んだ最速のもの)
+
+    Returns:
+        DomStats: dom_stats.collect_dom_stats と同じ形の統計
+    """
+    collector = DomStatsCollector()
+    walk_source(source, collector, backend)
+    return collector.close()
+
+
+def section_counts(stats, base_url=None):
+    """
+    【1】〜【13】に表示する数をまとめる(パーサー間の一致確認用)
+
+    Args:
+        stats (DomStats): DOM統計
+        base_url (str): リンクの内部/外部を判定する基準のURL(【8】と同じ判定にする)
+
+    Returns:
+        dict: 項目名 → 数
+    """
+    links = stats.links if stats.links is not None else classify_links(stats.hrefs, base_url or '')
+    counts = {name: stats.count(name) for name in (
+        'article', 'section', 'ul', 'ol', 'img', 'form', 'input',
+        'textarea', 'select', 'button', 'table', 'script', 'style',
+        'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    )}
+    counts.update({
+        'has_header': stats.has_header,
+        'header_nav_links': stats.header_nav_links,
+        'has_main': stats.has_main,
+        'divs_with_class': stats.divs_with_class,
+        'id_count': stats.id_count,
+        'link_count': stats.link_count,
+        'internal_links': links['internal'],
+        'external_links': links['external'],
+        'fragment_links': links['fragment'],
+        'other_links': links['other'],
+        'data_attributes': len(stats.data_attributes),
+        'stylesheet_links': stats.stylesheet_links,
+        'top_classes': stats.top_classes(10),
+    })
+    return counts
+
+
+def check_conformance(source, backends=None):
+    """
+    全てのパーサーで【1】〜【13】の数が同じになるか確認する
+
+    Args:
+        source (str): HTMLソース
+        backends (list): 確認するパーサー(省略時はインストール済みの全て)
+
+    Returns:
+        dict: 一致しなかった項目 → {パーサー名: 値}(全て一致なら空)
+    """
+    backends = backends or available_backends()
+    results = {backend: section_counts(collect_stats(source, backend)) for backend in backends}
+    mismatches = {}
+    for key in results[backends[0]]:
+        values = {backend: counts[key] for backend, counts in results.items()}
+        if len({repr(v) for v in values.values()}) > 1:
+            mismatches[key] = values
+    return mismatches
+
+
+def benchmark(source, backends=None, repeat=20):
+    """
+    パーサーごとの解析時間(統計を集めるまで)を測る
+
+    Args:
+        source (str): HTMLソース
+        backends (list): 測るパーサー(省略時はインストール済みの全て)
+        repeat (int): 繰り返し回数
+
+    Returns:
+        dict: パーサー名 → 1ページあたりの秒数
+    """
+    import timeit
+    backends = backends or available_backends()
+    return {
+        backend: timeit.timeit(lambda: collect_stats(source, backend), number=repeat) / repeat
+        for backend in backends
+    }
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import sys
+
+    paths = sys.argv[1:] or ['coorikuya_source.html']
+    print(f"使えるパーサー: {', '.join(available_backends())} (選択: soup={SOUP_BACKEND}, stats={STATS_BACKEND})")
+    failed = False
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        print(f"\n{path} ({len(source):,}文字)")
+
+        # 一致確認
+        mismatches = check_conformance(source)
+        if mismatches:
+            failed = True
+            print("  ✗ パーサーによって数が違います:")
+            for key, values in mismatches.items():
+                print(f"    {key}: {values}")
+        else:
+            print("  ✓ 全パーサーで【1】〜【13】の数が一致しました")
+
+        # ベンチマーク
+        timings = benchmark(source)
+        slowest = max(timings.values())
+        for backend, seconds in sorted(timings.items(), key=lambda x: x[1]):
+            print(f"  {backend:12s}: {seconds * 1000:7.2f} ms/ページ ({slowest / seconds:.1f}倍)")
+    sys.exit(1 if failed else 0)
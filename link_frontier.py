@@ -0,0 +1,403 @@
+# === サイト内リンクの巡回キュー(フロンティア) ===
+# 【8】で href.startswith('http') だけで内部/外部を分けていたのをやめて、
+# ページのURLを基準に正規化してから判定し、内部リンクは巡回キューに入れる
+# - 正規化: 相対パスの解決・#以降の削除・ホスト名の小文字化・既定ポートの削除
+# - 重複排除: 少ないうちは普通のset、大きなサイトはBloomフィルター(省メモリ)
+# - 幅優先: 深さの浅いページから順に取り出す(max_depthより深いものは入れない)
+# - 礼儀正しく: 同じホストへのアクセスは delay 秒以上あける
+# - 再開可能: save()/load() でキューと既訪問を JSON に保存できる
+# 例: python link_frontier.py coorikuya_source.html https://www.coorikuya.com/
+
+# Bloomフィルターのハッシュ計算用
+import hashlib
+# Bloomフィルターを JSON に入れるため
+import base64
+# 状態の保存用
+import json
+# ビット数・ハッシュ数の計算用
+import math
+# ファイル操作用
+import os
+# 礼儀正しい間隔をあけるため
+import time
+# 幅優先のキュー
+from collections import deque
+# URLの分解・組み立て用
+from urllib.parse import urljoin, urlsplit, urlunsplit
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 巡回の対象にするスキーム
+CRAWLABLE_SCHEMES = ('http', 'https')
+# 省略できるポート番号
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# これより多くのURLを覚えるならBloomフィルターを使う
+EXACT_SEEN_LIMIT = 100_000
+
+
+def normalize_url(href, base):
+    """
+    hrefをページのURLを基準に絶対URLにして正規化する
+
+    Args:
+        href (str): <a>のhref
+        base (str): ページのURL(driver.current_url)
+
+    Returns:
+        str: 正規化したURL(http/https以外・空のhrefならNone)
+    """
+    if href is None:
+        return None
+    href = href.strip()
+    if not href:
+        return None
+    parts = urlsplit(urljoin(base, href))
+    scheme = parts.scheme.lower()
+    if scheme not in CRAWLABLE_SCHEMES or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+    # #以降は同じページなので落とす。空のパスは / にそろえる
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+def same_site(url, base):
+    """
+    2つのURLが同じホストかどうかを返す(www. の有無は同じとみなす)
+
+    Args:
+        url (str): 正規化したURL
+        base (str): 基準のURL
+
+    Returns:
+        bool: 同じホストならTrue
+    """
+    def host(value):
+        name = (urlsplit(value).hostname or '').lower()
+        return name[4:] if name.startswith('www.') else name
+    return host(url) == host(base)
+
+
+def classify_links(hrefs, base):
+    """
+    hrefを内部・外部・その他に分ける
+
+    Args:
+        hrefs: hrefのリスト
+        base (str): ページのURL
+
+    Returns:
+        dict: internal, external, fragment(同じページ内), other(mailto:等), unique_internal
+    """
+    classifier = LinkClassifier(base)
+    for href in hrefs:
+        classifier.add(href)
+    return classifier.counts()
+
+
+class LinkClassifier:
+    """
+    hrefを1件ずつ受け取って内部・外部・その他に分ける(hrefのリストを持たない)
+
+    巨大なページをストリーミングで解析するとき用。内部リンクの重複排除は
+    EXACT_SEEN_LIMIT 件までは普通のset、それを超えたらBloomフィルターに切り替える
+    (unique_internal がわずかに少なめになることがある)。
+
+    Args:
+        base (str): ページのURL
+        exact_limit (int): setで覚える内部リンクの上限
+
+    Example:
+        >>> classifier = LinkClassifier('https://www.coorikuya.com/')
+        >>> classifier.add('/about/')
+        >>> classifier.counts()['internal']
+        1
+    """
+
+    def __init__(self, base, exact_limit=EXACT_SEEN_LIMIT):
+        self.base = base
+        self.base_url = normalize_url(base, base)
+        if self.base_url is None:
+            # 保存済みHTML(file://)などは仮のホストを基準にして、相対リンクを内部とみなす
+            self.base = self.base_url = 'http://localhost/'
+        self.exact_limit = exact_limit
+        self._counts = {'internal': 0, 'external': 0, 'fragment': 0, 'other': 0}
+        self._unique = set()
+        self._unique_count = 0
+
+    def add(self, href):
+        """hrefを1件分類する"""
+        url = normalize_url(href, self.base)
+        if url is None:
+            self._counts['other'] += 1
+        elif '#' in href and url == self.base_url:
+            self._counts['fragment'] += 1
+        elif same_site(url, self.base):
+            self._counts['internal'] += 1
+            if url not in self._unique:
+                self._unique.add(url)
+                self._unique_count += 1
+                if isinstance(self._unique, set) and len(self._unique) > self.exact_limit:
+                    # 覚えたURLをBloomフィルターに移して、以後はメモリを増やさない
+                    bloom = BloomFilter(self.exact_limit * 10)
+                    for seen in self._unique:
+                        bloom.add(seen)
+                    self._unique = bloom
+        else:
+            self._counts['external'] += 1
+
+    def counts(self):
+        """
+        分類結果を返す
+
+        Returns:
+            dict: classify_links() と同じ形
+        """
+        return {**self._counts, 'unique_internal': self._unique_count}
+
+
+class BloomFilter:
+    """
+    省メモリの「見たことがあるか」判定(たまに見ていないものを見たと誤判定する)
+
+    Args:
+        capacity (int): 入れる予定の件数
+        error_rate (float): 誤判定の割合の目安
+
+    Example:
+        >>> seen = BloomFilter(1_000_000)
+        >>> seen.add('https://example.com/')
+        >>> 'https://example.com/' in seen
+        True
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        """1回のハッシュから hashes 個の位置を作る(ダブルハッシュ法)"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'count': self.count,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        bloom = cls(data['capacity'], data['error_rate'])
+        bloom.bits = bytearray(base64.b64decode(data['bits']))
+        bloom.count = data['count']
+        return bloom
+
+
+class CrawlFrontier:
+    """
+    幅優先のサイト内巡回キュー
+
+    Args:
+        start_url (str): 巡回を始めるURL(このホストのページだけをたどる)
+        max_depth (int): start_url からたどるリンクの深さの上限
+        max_pages (int): キューに入れるページ数の上限
+        delay (float): 同じホストへのアクセス間隔(秒)
+        expected_pages (int): 覚えるURL数の見込み(EXACT_SEEN_LIMITを超えればBloomフィルター)
+
+    Example:
+        >>> frontier = CrawlFrontier('https://www.coorikuya.com/', max_depth=2)
+        >>> while frontier:
+        ...     url, depth = frontier.pop()
+        ...     driver.get(url)
+        ...     frontier.add_links(hrefs, driver.current_url, depth)
+    """
+
+    def __init__(self, start_url, max_depth=2, max_pages=100, delay=1.0, expected_pages=None):
+        self.start_url = normalize_url(start_url, start_url)
+        if self.start_url is None:
+            raise ValueError(f"http/https のURLを指定してください: {start_url}")
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.delay = delay
+        expected = expected_pages or max_pages * 20
+        self.seen = set() if expected <= EXACT_SEEN_LIMIT else BloomFilter(expected)
+        self.queue = deque()
+        self.enqueued = 0
+        self.visited = 0
+        # ホストごとの前回アクセス時刻
+        self._last_access = {}
+        self.add(self.start_url, 0)
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add(self, url, depth):
+        """
+        正規化済みのURLをキューに入れる(見たことがある・深すぎる・多すぎるなら入れない)
+
+        Args:
+            url (str): 正規化したURL
+            depth (int): start_url からの深さ
+
+        Returns:
+            bool: キューに入れたらTrue
+        """
+        if depth > self.max_depth or self.enqueued >= self.max_pages:
+            return False
+        if url in self.seen or not same_site(url, self.start_url):
+            return False
+        self.seen.add(url)
+        self.queue.append((url, depth))
+        self.enqueued += 1
+        return True
+
+    def add_links(self, hrefs, base, depth):
+        """
+        ページ内のリンクを正規化してキューに入れる
+
+        Args:
+            hrefs: ページ内の<a>のhref
+            base (str): そのページのURL(リダイレクト後の driver.current_url)
+            depth (int): そのページの深さ(リンク先は depth + 1)
+
+        Returns:
+            int: 新しくキューに入れた件数
+        """
+        added = 0
+        for href in hrefs:
+            url = normalize_url(href, base)
+            if url is not None and self.add(url, depth + 1):
+                added += 1
+        return added
+
+    def pop(self):
+        """
+        次に訪問するURLを取り出す(同じホストへは delay 秒あけるまで待つ)
+
+        Returns:
+            tuple: (URL, 深さ)
+        """
+        url, depth = self.queue.popleft()
+        host = urlsplit(url).hostname
+        wait = self._last_access.get(host, 0) + self.delay - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_access[host] = time.monotonic()
+        self.visited += 1
+        return url, depth
+
+    def mark_seen(self, url):
+        """
+        リダイレクト先など、キューを通らずに訪問したURLを既訪問にする
+
+        Args:
+            url (str): 正規化したURL
+        """
+        if url not in self.seen:
+            self.seen.add(url)
+
+    def save(self, path):
+        """
+        キューと既訪問を JSON に保存する(途中で落ちても壊れないように一時ファイルから置き換える)
+
+        Args:
+            path (str): 保存先
+        """
+        seen = self.seen.to_dict() if isinstance(self.seen, BloomFilter) else sorted(self.seen)
+        state = {
+            'start_url': self.start_url,
+            'max_depth': self.max_depth,
+            'max_pages': self.max_pages,
+            'delay': self.delay,
+            'enqueued': self.enqueued,
+            'visited': self.visited,
+            'queue': list(self.queue),
+            'seen': seen,
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        save() した状態から再開する
+
+        Args:
+            path (str): 保存したファイル
+
+        Returns:
+            CrawlFrontier: 保存時点のキュー
+        """
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        frontier = cls(state['start_url'], max_depth=state['max_depth'],
+                       max_pages=state['max_pages'], delay=state['delay'])
+        seen = state['seen']
+        frontier.seen = BloomFilter.from_dict(seen) if isinstance(seen, dict) else set(seen)
+        frontier.queue = deque(tuple(item) for item in state['queue'])
+        frontier.enqueued = state['enqueued']
+        frontier.visited = state['visited']
+        logger.info(f"巡回を再開します: 残り{len(frontier.queue)}件 / 訪問済み{frontier.visited}件")
+        return frontier
+
+    def stats(self):
+        """
+        巡回の状況を返す
+
+        Returns:
+            dict: queued, enqueued, visited, seen, seen_type
+        """
+        return {
+            'queued': len(self.queue),
+            'enqueued': self.enqueued,
+            'visited': self.visited,
+            'seen': len(self.seen),
+            'seen_type': type(self.seen).__name__,
+        }
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import sys
+    from html_parsers import collect_stats
+
+    # 保存済みHTMLのリンクを分類して、次にたどるURLを表示する
+    path = sys.argv[1] if len(sys.argv) > 1 else 'coorikuya_source.html'
+    base = sys.argv[2] if len(sys.argv) > 2 else 'https://www.coorikuya.com/'
+    with open(path, encoding='utf-8') as f:
+        stats = collect_stats(f.read())
+    print(classify_links(stats.hrefs, base))
+    frontier = CrawlFrontier(base, max_depth=1, max_pages=1000, delay=0)
+    frontier.pop()
+    frontier.add_links(stats.hrefs, base, 0)
+    for url, depth in frontier.queue:
+        print(f"  depth={depth} {url}")
+    print(frontier.stats())
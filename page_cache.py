@@ -0,0 +1,341 @@
+# === ページの永続キャッシュ(内容アドレス方式) ===
+# 一度ブラウザで取得したページのHTMLをディスクに保存しておき、
+# 次回の実行ではブラウザを起動せずにそのHTMLを再分析する
+# - HTML本体は snapshot_store.py の圧縮スナップショット(内容のSHA-256がファイル名)をそのまま使い、
+#   同じページを2か所に保存しない(書き込みは artifacts.py の裏のワーカーが行う)
+# - URLごとの情報(ハッシュ・保存先・ETag・Last-Modified・取得日時)は index.json に保存
+# - ETag・Last-Modifiedは裏のスレッドでHEADリクエストして後から記録する(ブラウザを待たせない)
+# - TTL(有効期限)内ならそのまま使い、期限切れなら条件付きGETで変わっていないか確認する
+# - インデックスに載せたHTMLの合計サイズが上限(max_indexed_bytes)を超えたら、最後に使ってから
+#   一番時間が経ったものからインデックスを消す(LRU)。スナップショット本体は【14】の保存物でもあるので
+#   消さない → ディスクの使用量はこのキャッシュでは制限されない(snapshots/ の整理は別に行う)
+# 例: python page_cache.py            (キャッシュの中身と統計を表示)
+#     python page_cache.py --clear    (キャッシュを空にする)
+
+# インデックスの保存用
+import json
+# ファイル操作用
+import os
+# 複数スレッドから使っても壊れないようにするため
+import threading
+# 有効期限・最終使用日時の管理用
+import time
+# 条件付きGET(再検証)用
+import urllib.error
+import urllib.request
+# 検証子を裏で取得するため
+from concurrent.futures import ThreadPoolExecutor
+# プログラム終了時にインデックスを保存するため
+import atexit
+# ログ出力用
+import logging
+
+from artifacts import get_default_writer
+from snapshot_store import read_snapshot_file
+
+logger = logging.getLogger(__name__)
+
+# デフォルトの保存先・有効期限・サイズ上限
+DEFAULT_CACHE_DIR = '.page_cache'
+DEFAULT_TTL = 60 * 60
+DEFAULT_MAX_INDEXED_BYTES = 200 * 1024 * 1024
+
+# 再検証のリクエストに付けるUser-Agent
+USER_AGENT = 'Mozilla/5.0 (page_cache revalidation)'
+
+
+class PageCache:
+    """
+    URL → HTMLソース のディスクキャッシュ
+
+    Args:
+        directory (str): インデックスの保存先ディレクトリ
+        ttl (float): この秒数以内に取得したものは再検証せずに使う
+        max_indexed_bytes (int): インデックスに載せるHTMLの合計サイズの上限
+                                 (ディスク上のスナップショットの量の上限ではない)
+        revalidate (bool): 期限切れのとき条件付きGETで確認するか(Falseなら期限切れ=ミス)
+        timeout (float): 再検証・検証子取得のリクエストのタイムアウト秒数
+        writer (ArtifactWriter): HTMLを圧縮保存するワーカー(省略時は共有のワーカー)
+
+    Example:
+        >>> cache = PageCache()
+        >>> source = cache.lookup(url)
+        >>> if source is None:
+        ...     source = driver.page_source
+        ...     cache.store(url, source)
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_indexed_bytes=DEFAULT_MAX_INDEXED_BYTES,
+                 revalidate=True, timeout=10, writer=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_indexed_bytes = max_indexed_bytes
+        self.revalidate = revalidate
+        self.timeout = timeout
+        self.writer = writer
+        self._lock = threading.Lock()
+        # index.json の書き出しは本体・検証子のスレッド・終了時から同時に呼ばれるので別のロックで順番にする
+        self._save_lock = threading.Lock()
+        # 検証子を取得するスレッド(初めて必要になったときに作る)
+        self._validator_pool = None
+        self.index_path = os.path.join(directory, 'index.json')
+        os.makedirs(directory, exist_ok=True)
+        self.entries = self._load_index()
+        # 統計
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evicted = 0
+        self.bytes_saved = 0
+
+    def _load_index(self):
+        """index.json を読み込む(壊れていたら空から始める)"""
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"キャッシュのインデックスを読めないので作り直します: {e}")
+            return {}
+
+    def save(self):
+        """index.json を書き出す(途中で落ちても壊れないように一時ファイルから置き換える)"""
+        with self._save_lock:
+            # 書き出す順番と中身の新しさがずれないように、書き出しのロックを取ってから写す
+            with self._lock:
+                entries = {url: dict(entry) for url, entry in self.entries.items()}
+            tmp = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.index_path)
+
+    @staticmethod
+    def _read_blob(entry):
+        """スナップショットからHTMLを読む(まだ書き込み中・削除済みならNone)"""
+        try:
+            return read_snapshot_file(entry['path'])
+        except (KeyError, OSError, EOFError, ValueError):
+            return None
+
+    def _is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def _revalidate(self, url, entry):
+        """
+        条件付きGETでページが変わっていないか確認する
+
+        Returns:
+            bool: 変わっていなければ(304 Not Modified)True
+        """
+        headers = {'User-Agent': USER_AGENT}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if len(headers) == 1:
+            # 比べる手がかりが無い
+            return False
+        try:
+            request = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                # 200なら内容が変わった(新しい検証子は次に store するときに取り直す)
+                return response.status == 304
+        except urllib.error.HTTPError as e:
+            return e.code == 304
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.warning(f"キャッシュの再検証に失敗しました: {url} - {e}")
+            return False
+
+    def lookup(self, url):
+        """
+        キャッシュからHTMLソースを取り出す
+
+        - 有効期限内ならそのまま返す(ヒット)
+        - 期限切れなら条件付きGETで確認し、304なら期限を延ばして返す(ヒット)
+        - それ以外はNone(ミス。呼び出し側でブラウザから取得して store する)
+
+        Args:
+            url (str): ページのURL
+
+        Returns:
+            str: HTMLソース(ミスならNone)
+        """
+        with self._lock:
+            entry = self.entries.get(url)
+        source = None
+        if entry is not None:
+            if self._is_fresh(entry):
+                source = self._read_blob(entry)
+            elif self.revalidate and self._revalidate(url, entry):
+                source = self._read_blob(entry)
+                if source is not None:
+                    with self._lock:
+                        entry['fetched_at'] = time.time()
+                        self.revalidated += 1
+
+        with self._lock:
+            if source is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_saved += entry['size']
+            entry['last_used'] = time.time()
+        logger.info(f"キャッシュヒット: {url} ({entry['size']:,}バイト)")
+        return source
+
+    def _fetch_validators(self, url):
+        """HEADリクエストでETag・Last-Modifiedを取得する(取れなければ空)"""
+        try:
+            request = urllib.request.Request(url, method='HEAD', headers={'User-Agent': USER_AGENT})
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.debug(f"検証子を取得できませんでした: {url} - {e}")
+            return {}
+
+    def _store_validators(self, url, digest):
+        """裏のスレッドで検証子を取得し、同じ内容のままならインデックスに書き足す"""
+        validators = self._fetch_validators(url)
+        if not validators:
+            return
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None or entry['digest'] != digest:
+                return
+            entry['etag'] = validators.get('etag')
+            entry['last_modified'] = validators.get('last_modified')
+        self.save()
+
+    def store(self, url, source, validators=None):
+        """
+        ブラウザから取得したHTMLソースを保存する
+
+        HTMLはスナップショットとして裏で圧縮保存する(【14】の保存と同じファイルになる)。
+
+        Args:
+            url (str): ページのURL
+            source (str): HTMLソース
+            validators (dict): {'etag', 'last_modified'}(省略時は裏のスレッドでHEADリクエストして取得)
+
+        Returns:
+            tuple: (スナップショットのパス, 元のバイト数)
+        """
+        path, size, _ = (self.writer or get_default_writer()).save_snapshot(url, source)
+        digest = os.path.basename(path).split('.', 1)[0]
+
+        now = time.time()
+        with self._lock:
+            self.entries[url] = {
+                'digest': digest,
+                'path': path,
+                'size': size,
+                'etag': (validators or {}).get('etag'),
+                'last_modified': (validators or {}).get('last_modified'),
+                'fetched_at': now,
+                'last_used': now,
+            }
+            self._evict()
+            if validators is None:
+                if self._validator_pool is None:
+                    self._validator_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='page_cache')
+                self._validator_pool.submit(self._store_validators, url, digest)
+        self.save()
+        return path, size
+
+    def _evict(self):
+        """合計サイズが上限を超えていたら古いものから消す(ロックを取った状態で呼ぶ)"""
+        sizes = {entry['digest']: entry['size'] for entry in self.entries.values()}
+        total = sum(sizes.values())
+        # 最後に使ってから時間が経ったURLから順に消す(スナップショット本体は残す)
+        for url, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_indexed_bytes:
+                break
+            del self.entries[url]
+            self.evicted += 1
+            digest = entry['digest']
+            if not any(other['digest'] == digest for other in self.entries.values()):
+                total -= sizes[digest]
+
+    def clear(self):
+        """キャッシュを全て消す(スナップショット本体は残す)"""
+        with self._lock:
+            self.entries.clear()
+        self.save()
+
+    def stats(self):
+        """
+        キャッシュの利用状況を返す
+
+        Returns:
+            dict: entries, bytes, hits, misses, revalidated, evicted, hit_ratio, bytes_saved
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            sizes = {entry['digest']: entry['size'] for entry in self.entries.values()}
+            return {
+                'entries': len(self.entries),
+                'bytes': sum(sizes.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'evicted': self.evicted,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+            }
+
+
+# プログラム全体で共有するキャッシュ(get_default_cache()で取得)
+_default_cache = None
+
+
+def _close_default_cache():
+    """終了時にインデックス(最終使用日時など)を保存し、今回の統計を表示する"""
+    if _default_cache is not None:
+        _default_cache.save()
+        logger.info(f"ページキャッシュ: {_default_cache.stats()}")
+
+
+def get_default_cache():
+    """
+    共有のページキャッシュを返す(初回呼び出し時に作成)
+
+    環境変数 PAGE_CACHE_DIR で保存先、PAGE_CACHE_TTL で有効期限(秒)を変えられる。
+
+    Returns:
+        PageCache: 共有キャッシュ
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PageCache(
+            directory=os.environ.get('PAGE_CACHE_DIR', DEFAULT_CACHE_DIR),
+            ttl=float(os.environ.get('PAGE_CACHE_TTL', DEFAULT_TTL)),
+        )
+        atexit.register(_close_default_cache)
+    return _default_cache
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='ページキャッシュの中身を表示する')
+    parser.add_argument('--dir', default=DEFAULT_CACHE_DIR, help='キャッシュのディレクトリ')
+    parser.add_argument('--clear', action='store_true', help='キャッシュを空にする')
+    args = parser.parse_args()
+
+    cache = PageCache(args.dir)
+    if args.clear:
+        cache.clear()
+        print(f"キャッシュを空にしました: {args.dir}")
+    else:
+        now = time.time()
+        for url, entry in sorted(cache.entries.items()):
+            state = '有効' if cache._is_fresh(entry) else '期限切れ'
+            print(f"{url}")
+            print(f"  {entry['digest'][:12]} {entry['size']:,}バイト "
+                  f"取得から{now - entry['fetched_at']:.0f}秒 ({state}) ETag={entry['etag']}")
+        print(cache.stats())
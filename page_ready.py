@@ -0,0 +1,200 @@
+# === ページ読み込み完了の判定 ===
+# driver.get(url) の後の固定 time.sleep(3) の代わりに、
+# ページの状態を見て「もう解析してよいか」を判定する仕組み
+
+# 待機処理用
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
+# 経過時間の計測用
+import time
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReadyState:
+    """
+    document.readyState が 'complete' になるまで待つ
+
+    Args:
+        state (str): 待つ状態('interactive' なら DOM 構築完了で止める)
+    """
+
+    name = 'ready_state'
+
+    def __init__(self, state='complete'):
+        self.state = state
+
+    def wait(self, driver, wait):
+        """WebDriverWaitで条件を満たすまで待つ"""
+        accepted = ('interactive', 'complete') if self.state == 'interactive' else ('complete',)
+        wait.until(lambda d: d.execute_script('return document.readyState') in accepted)
+
+
+class NetworkIdle:
+    """
+    リソースの読み込み件数が一定時間増えなくなるまで待つ(ネットワークアイドル)
+
+    Performance API の resource エントリ数を数え、idle_ms の間
+    変化が無ければ「通信が落ち着いた」とみなす。
+
+    Args:
+        idle_ms (int): 変化が無いとみなす時間(ミリ秒)
+    """
+
+    name = 'network_idle'
+
+    def __init__(self, idle_ms=500):
+        self.idle_ms = idle_ms
+
+    def wait(self, driver, wait):
+        """WebDriverWaitで条件を満たすまで待つ"""
+        state = {'count': -1, 'since': time.monotonic()}
+
+        def is_idle(d):
+            count = d.execute_script(
+                "return performance.getEntriesByType('resource').length"
+            )
+            now = time.monotonic()
+            if count != state['count']:
+                state['count'] = count
+                state['since'] = now
+                return False
+            return (now - state['since']) * 1000 >= self.idle_ms
+
+        wait.until(is_idle)
+
+
+class DomQuiet:
+    """
+    DOMの変更(MutationObserver)が一定時間止まるまで待つ
+
+    無限スクロールや遅延描画のページで、JavaScriptによる
+    書き換えが終わったかどうかを判定する。
+
+    Args:
+        quiet_ms (int): 変更が無いとみなす時間(ミリ秒)
+    """
+
+    name = 'dom_quiet'
+
+    # ページ内に最後の変更時刻を記録する監視役を仕込むスクリプト
+    INSTALL_SCRIPT = """
+        if (!window.__domQuiet) {
+            window.__domQuiet = {last: performance.now()};
+            new MutationObserver(function () {
+                window.__domQuiet.last = performance.now();
+            }).observe(document, {childList: true, subtree: true, attributes: true});
+        }
+        return performance.now() - window.__domQuiet.last;
+    """
+
+    def __init__(self, quiet_ms=500):
+        self.quiet_ms = quiet_ms
+
+    def wait(self, driver, wait):
+        """WebDriverWaitで条件を満たすまで待つ"""
+        wait.until(lambda d: d.execute_script(self.INSTALL_SCRIPT) >= self.quiet_ms)
+
+
+class SelectorPresent:
+    """
+    指定したCSSセレクターの要素が現れるまで待つ
+
+    Args:
+        selector (str): 待つ要素のCSSセレクター(例: 'article, .post')
+    """
+
+    name = 'selector'
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.name = f'selector({selector})'
+
+    def wait(self, driver, wait):
+        """WebDriverWaitで条件を満たすまで待つ"""
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, self.selector)))
+
+
+# 何も指定しない場合の待ち方(読み込み完了 → DOMの書き換えが止まる)
+DEFAULT_STRATEGIES = (ReadyState(), DomQuiet())
+
+
+class ReadinessReport:
+    """
+    1つのURLの待機結果
+
+    Attributes:
+        url (str): 対象URL
+        timings (dict): 戦略名 → 待った秒数
+        timed_out (list): タイムアウトした戦略名
+        total (float): 待機の合計秒数
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.timings = {}
+        self.timed_out = []
+        self.total = 0.0
+
+    @property
+    def ready(self):
+        """全ての戦略がタイムアウトせずに終わったか"""
+        return not self.timed_out
+
+    def to_dict(self):
+        """JSONに変換しやすい辞書を返す"""
+        return {
+            'url': self.url,
+            'ready': self.ready,
+            'total': round(self.total, 3),
+            'timings': {k: round(v, 3) for k, v in self.timings.items()},
+            'timed_out': list(self.timed_out),
+        }
+
+    def __str__(self):
+        parts = ', '.join(f"{k}={v:.2f}s" for k, v in self.timings.items())
+        status = '完了' if self.ready else f"タイムアウト({', '.join(self.timed_out)})"
+        return f"{self.url}: {status} 合計{self.total:.2f}s [{parts}]"
+
+
+def wait_for_page(driver, url, strategies=DEFAULT_STRATEGIES, timeout=15, poll=0.1):
+    """
+    ページが解析できる状態になるまで待つ
+
+    戦略を順番に実行し、それぞれに掛かった時間を記録する。
+    タイムアウトしても例外にはせず、レポートに記録して次へ進む
+    (読み込みが遅いページでも、取れるところまでは解析するため)。
+
+    Args:
+        driver: Chromeドライバー(driver.get(url)の直後)
+        url (str): 対象URL(レポート用)
+        strategies: ReadyState / NetworkIdle / DomQuiet / SelectorPresent のリスト
+        timeout (float): 全戦略の合計の待ち時間の上限(秒)
+        poll (float): 条件を確認する間隔(秒)
+
+    Returns:
+        ReadinessReport: 戦略ごとの待ち時間
+    """
+    report = ReadinessReport(url)
+    start = time.monotonic()
+    for strategy in strategies:
+        # 残り時間だけ待つ(戦略ごとにtimeoutを使い切らないように)
+        remaining = max(timeout - (time.monotonic() - start), 0.001)
+        wait = WebDriverWait(driver, remaining, poll_frequency=poll)
+        began = time.monotonic()
+        try:
+            strategy.wait(driver, wait)
+        except TimeoutException:
+            report.timed_out.append(strategy.name)
+        report.timings[strategy.name] = time.monotonic() - began
+    report.total = time.monotonic() - start
+
+    if report.ready:
+        logger.info(f"読み込み完了: {report}")
+    else:
+        logger.warning(f"読み込み待ちタイムアウト: {report}")
+    return report
@@ -0,0 +1,256 @@
+# === 取得と解析を分けた2段のパイプライン ===
+# batch_crawl.py ではブラウザを借りたスレッドがそのまま BeautifulSoup の解析と【1】〜【15】の集計も
+# 行うので、解析(CPUを使いGILを取り合う)の間はブラウザも待たされ、コア数を増やしても速くならない
+# - 取得段: ブラウザのスレッドは開く・待つ・page_source・【15】の数え上げだけを行い、
+#           HTMLはバイト列のまま一時ファイル(Linuxならメモリ上の /dev/shm)に書いて次に渡す
+# - 解析段: ProcessPoolExecutor のプロセスが一時ファイルを読み、sctest の【1】〜【14】
+#           (必要なら toku のパターン1〜11も)を作って一時ファイルを消す
+# - 解析待ちが max_pending 件に達したら取得を止める(一時ファイルがたまり続けないように)
+# ブラウザは少なく(--workers)、解析はコア数だけ(--parse-workers)使える
+# 例: python batch_crawl.py urls.txt --workers 2 --parse-workers 8 --output results.ndjson
+#     PIPELINE_SPOOL_DIR=/tmp/spool python batch_crawl.py urls.txt --parse-workers 4 --elements
+
+# 解析段のプロセスプール
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+# 取得段に渡す関数の引数を固定するため
+from functools import partial
+# 一時ファイルの作成・削除用
+import os
+# 実行ごとの一時ディレクトリを最後にまとめて消すため
+import shutil
+# 一時ファイルの置き場所を決めるため
+import tempfile
+# 解析時間の計測用
+import time
+# ログ出力用
+import logging
+
+from page_ready import wait_for_page, DEFAULT_STRATEGIES
+from fetch_profile import measure_page
+from dom_extract import count_selectors
+from html_parsers import parse_html, collect_stats
+from snapshot_store import get_default_store
+from sctest import build_structure_report, SELENIUM_SELECTORS
+from toku import build_elements_report
+from batch_crawl import crawl_batch
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 解析段で作れるレポート
+ANALYSES = ('structure', 'elements')
+# メモリ上のファイルシステム(あれば一時ファイルをここに置く)
+SHM_DIR = '/dev/shm'
+
+
+def default_spool_dir():
+    """
+    一時ファイルの置き場所を返す
+
+    環境変数 PIPELINE_SPOOL_DIR があればそこ、無ければ /dev/shm(Linux)、それも無ければOSの一時ディレクトリ。
+
+    Returns:
+        str: ディレクトリ
+    """
+    directory = os.environ.get('PIPELINE_SPOOL_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        return directory
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        return SHM_DIR
+    return tempfile.gettempdir()
+
+
+def spool_html(source, directory=None):
+    """
+    HTMLソースをUTF-8のバイト列で一時ファイルに書く
+
+    Args:
+        source (str): HTMLソース
+        directory (str): 置き場所(省略時は default_spool_dir())
+
+    Returns:
+        tuple: (一時ファイルのパス, バイト数)
+    """
+    data = source.encode('utf-8')
+    fd, path = tempfile.mkstemp(prefix='page_', suffix='.html', dir=directory or default_spool_dir())
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    return path, len(data)
+
+
+def fetch_page(driver, url, ready_strategies=DEFAULT_STRATEGIES, spool_dir=None):
+    """
+    取得段: ページを開いてHTMLを一時ファイルに書くだけ(解析はしない)
+
+    ブラウザが要る【15】のセレクターの数え上げもここで行う(往復1回)。
+
+    Args:
+        driver: Chromeドライバー
+        url (str): 開くURL
+        ready_strategies: 読み込み完了の判定方法
+        spool_dir (str): 一時ファイルの置き場所
+
+    Returns:
+        dict: url, path, bytes, title, current_url, readiness, fetch, selector_counts
+              (解析段のプロセスにそのまま渡せる)
+    """
+    logger.info(f"アクセス中: {url}")
+    with span('driver.get', url=url):
+        driver.get(url)
+    with span('page.wait_ready'):
+        readiness = wait_for_page(driver, url, strategies=ready_strategies)
+    fetch = measure_page(driver)
+    title = driver.title
+    current_url = driver.current_url
+    with span('page_source') as s:
+        page_source = driver.page_source
+        s.set(chars=len(page_source))
+    try:
+        with span('section.15.selenium'):
+            selector_counts = count_selectors(driver, SELENIUM_SELECTORS.values())
+    except Exception as e:
+        selector_counts = {'error': str(e)}
+    with span('spool'):
+        path, size = spool_html(page_source, spool_dir)
+    return {
+        'url': url,
+        'path': path,
+        'bytes': size,
+        'title': title,
+        'current_url': current_url,
+        'readiness': readiness.to_dict(),
+        'fetch': fetch,
+        'selector_counts': selector_counts,
+    }
+
+
+def analyze_fetched(page, analyses=('structure',), snapshot=True):
+    """
+    解析段: 取得段が書いた一時ファイルを読んでレポートを作る(プロセスプールで実行する)
+
+    一時ファイルは読み終えたら(失敗しても)消す。
+
+    Args:
+        page (dict): fetch_page() の結果
+        analyses: 作るレポート('structure' = sctest の【1】〜【15】 / 'elements' = toku のパターン1〜11)
+        snapshot (bool): Trueなら【14】としてHTMLを圧縮保存する
+
+    Returns:
+        tuple: (レポート名 → Report.to_dict() の辞書, DomStats, 解析にかかった秒数)
+    """
+    started = time.monotonic()
+    try:
+        with open(page['path'], 'rb') as f:
+            source = f.read().decode('utf-8')
+    finally:
+        os.remove(page['path'])
+    url = page['url']
+    reports = {}
+
+    stats = collect_stats(source)
+    if 'structure' in analyses:
+        report = build_structure_report(stats, url, base_url=page['current_url'])
+        report.meta.update({
+            'title': page['title'],
+            'current_url': page['current_url'],
+            'readiness': page['readiness'],
+            'fetch': page['fetch'],
+            'extraction': 'source',
+            'pipeline': {'pid': os.getpid()},
+        })
+        # === 14. HTML全体を保存(このプロセスで圧縮する) ===
+        if snapshot:
+            saved = get_default_store().write(url, source)
+            report.add_section('14', 'HTMLソース保存', {'path': saved['path'], 'bytes': saved['bytes']})
+        # === 15. 取得段でブラウザ上のDOMを数えた結果 ===
+        counts = page['selector_counts']
+        if 'error' in counts:
+            selenium_data = counts
+        else:
+            selenium_data = {key: counts[selector] for key, selector in SELENIUM_SELECTORS.items()}
+        report.add_section('15', 'Selenium要素確認', selenium_data)
+        reports['structure'] = report.to_dict()
+    if 'elements' in analyses:
+        report = build_elements_report(parse_html(source), url)
+        report.meta['readiness'] = page['readiness']
+        report.meta['fetch'] = page['fetch']
+        reports['elements'] = report.to_dict()
+    return reports, stats, time.monotonic() - started
+
+
+def crawl_pipeline(urls, workers=2, parse_workers=None, per_host=2, retries=2, analyses=('structure',),
+                   mode=None, profile=None, pool=None, max_pending=None, tally=None, spool_dir=None):
+    """
+    ブラウザで取得し、プロセスプールで解析して、終わった順に結果を1件ずつ返す(ジェネレーター)
+
+    Args:
+        urls: 分析するURLのリスト
+        workers (int): ブラウザの数(取得段の並列数)
+        parse_workers (int): 解析段のプロセス数(省略時はCPU数)
+        per_host (int): ホストごとの同時アクセス数の上限
+        retries (int): 取得に失敗したときのリトライ回数(解析の失敗はやり直さない)
+        analyses: 作るレポート(ANALYSES のどれか)
+        mode (RunMode): 実行モード(crawl_batch と同じ)
+        profile: 取得プロファイル名(crawl_batch と同じ)
+        pool (DriverPool): 使うプール(crawl_batch と同じ)
+        max_pending (int): 解析待ちの上限(省略時は parse_workers の2倍)
+        tally (FrequencyTally): クロール全体のクラス名・ID・data属性を数える(省略時は数えない)
+        spool_dir (str): 一時ファイルの置き場所(省略時は default_spool_dir())
+
+    Yields:
+        dict: url, ok, attempts, elapsed(取得), analyze_elapsed と result(structure のレポート)・
+              elements(toku のレポート、analyses に含めたとき)または error
+    """
+    unknown = set(analyses) - set(ANALYSES)
+    if unknown:
+        raise ValueError(f"analyses は {ANALYSES} から選んでください: {sorted(unknown)}")
+    parse_workers = parse_workers or os.cpu_count() or 1
+    max_pending = max_pending or parse_workers * 2
+    # 実行ごとの一時ディレクトリ(途中でやめても最後にまとめて消せるように)
+    run_dir = tempfile.mkdtemp(prefix='pipeline_', dir=spool_dir or default_spool_dir())
+    fetch = partial(fetch_page, spool_dir=run_dir)
+    executor = ProcessPoolExecutor(max_workers=parse_workers)
+    # 解析中のFuture → 取得段の結果
+    analyzing = {}
+
+    def finish(future):
+        fetched = analyzing.pop(future)
+        record = {'url': fetched['url'], 'ok': True, 'attempts': fetched['attempts'], 'elapsed': fetched['elapsed']}
+        try:
+            reports, stats, elapsed = future.result()
+        except Exception as e:
+            logger.error(f"解析に失敗しました: {fetched['url']} - {e}")
+            record.update(ok=False, error=str(e))
+            return record
+        if tally is not None:
+            tally.add_stats(stats)
+        record['analyze_elapsed'] = round(elapsed, 3)
+        record['result'] = reports.get('structure')
+        if 'elements' in reports:
+            record['elements'] = reports['elements']
+        return record
+
+    fetched_pages = crawl_batch(urls, workers=workers, per_host=per_host, retries=retries, analyze=fetch,
+                                pool=pool, mode=mode, profile=profile)
+    try:
+        for fetched in fetched_pages:
+            if not fetched['ok']:
+                yield fetched
+                continue
+            future = executor.submit(analyze_fetched, fetched['result'], tuple(analyses))
+            analyzing[future] = fetched
+            # 解析待ちが上限に達したら、1件終わるまで次の取得を始めない
+            if len(analyzing) >= max_pending:
+                wait(analyzing, return_when=FIRST_COMPLETED)
+            for future in [f for f in analyzing if f.done()]:
+                yield finish(future)
+        while analyzing:
+            done, _ = wait(analyzing, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+    finally:
+        # 取得中のページ・解析中のページが終わるのを待ってから、残った一時ファイルをまとめて消す
+        fetched_pages.close()
+        executor.shutdown(cancel_futures=True)
+        shutil.rmtree(run_dir, ignore_errors=True)
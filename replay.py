@@ -0,0 +1,187 @@
+# === 保存済みHTMLのオフライン再分析(リプレイモード) ===
+# Chromeを起動せずに、保存してあるHTMLファイル(またはディレクトリ)に対して
+# sctest.py の【1】〜【13】と toku.py のパターン1〜9をそのまま実行する
+# 例: python replay.py coorikuya_source.html
+#     python replay.py snapshots/ --kind structure --output results.ndjson
+#     python replay.py page.html --base-url https://www.example.com/page
+# (snapshot_store.py が保存した .html.gz / .html.zst もそのまま読める。
+#  元のURLは同じディレクトリの manifest.ndjson から調べ、【8】の内部/外部リンクの判定に使う)
+
+# ファイル・ディレクトリの扱い用
+from pathlib import Path
+# 経過時間の計測用
+import time
+# ログ出力用
+import logging
+
+from html_parsers import parse_html, collect_stats
+from report import ConsoleSink, open_sink, emit_report
+from snapshot_store import read_snapshot_file, SnapshotStore, CODEC_SUFFIXES
+from sctest import build_structure_report, render_structure_report
+from toku import build_elements_report, render_elements_report
+
+logger = logging.getLogger(__name__)
+
+# 再分析するファイルの拡張子
+SNAPSHOT_SUFFIXES = ('.html', '.htm') + tuple(CODEC_SUFFIXES.values())
+# 引数を省略したときに再分析するファイルと、その取得元のURL
+DEFAULT_SOURCE = 'coorikuya_source.html'
+DEFAULT_SOURCE_URL = 'https://www.coorikuya.com/'
+
+
+def iter_snapshot_files(paths):
+    """
+    ファイル・ディレクトリの指定からHTMLファイルを列挙する
+
+    ディレクトリはサブディレクトリも含めて探し、ファイル名順に返す。
+
+    Args:
+        paths: ファイルまたはディレクトリのパスのリスト
+
+    Yields:
+        Path: HTMLファイル
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            for child in sorted(path.rglob('*')):
+                if child.is_file() and child.name.endswith(SNAPSHOT_SUFFIXES):
+                    yield child
+        elif path.is_file():
+            yield path
+        else:
+            logger.warning(f"見つかりません: {path}")
+
+
+def manifest_urls(directory):
+    """
+    スナップショットのディレクトリの manifest.ndjson から、ファイル名 → 元のURL の対応を作る
+
+    同じファイルを複数のURLで保存していれば、最後に保存したURLにする。
+
+    Args:
+        directory (Path): スナップショットのディレクトリ
+
+    Returns:
+        dict: ファイル名 → URL(マニフェストが無ければ空)
+    """
+    if not (directory / 'manifest.ndjson').is_file():
+        return {}
+    return {Path(record['path']).name: record['url'] for record in SnapshotStore(str(directory)).manifest()}
+
+
+def read_snapshot(path):
+    """
+    保存済みHTMLを読み込む(圧縮されていれば展開する)
+
+    Args:
+        path (Path): HTMLファイル
+
+    Returns:
+        str: HTMLソース
+    """
+    return read_snapshot_file(path)
+
+
+def replay_source(source, url, kinds=('structure', 'elements'), base_url=None):
+    """
+    HTMLソースを再分析する(ブラウザ不要)
+
+    Args:
+        source (str): HTMLソース
+        url (str): レポートに記録するURL
+        kinds: 'structure'(sctest.py) / 'elements'(toku.py) の組み合わせ
+        base_url (str): リンクの内部/外部を判定する基準のURL(省略時はurl)
+
+    Returns:
+        list: Reportのリスト(kindsの順)
+    """
+    reports = []
+    for kind in kinds:
+        started = time.perf_counter()
+        if kind == 'structure':
+            # 統計だけなら木を作らない最速のパーサーで集める
+            report = build_structure_report(collect_stats(source), url, base_url=base_url)
+        elif kind == 'elements':
+            # CSSセレクターを使うのでBeautifulSoupの木を作る
+            report = build_elements_report(parse_html(source), url)
+        else:
+            raise ValueError(f"kind は 'structure' か 'elements' を指定してください: {kind}")
+        report.meta.update({
+            'replay': True,
+            'elapsed': round(time.perf_counter() - started, 6),
+        })
+        reports.append(report)
+    return reports
+
+
+def replay(paths, kinds=('structure', 'elements'), base_url=None):
+    """
+    保存済みHTMLを順番に再分析する(ジェネレーター)
+
+    レポートのURLは manifest.ndjson に記録された元のURL(無ければ file:// のURL)にする。
+
+    Args:
+        paths: ファイルまたはディレクトリのパスのリスト
+        kinds: 'structure' / 'elements' の組み合わせ
+        base_url (str): 全ファイルに使う元のURL(省略時はマニフェストから調べる)
+
+    Yields:
+        Report: 1ファイル・1種類ごとの分析結果
+    """
+    # ディレクトリ → マニフェストの対応(ディレクトリごとに1回だけ読む)
+    manifests = {}
+    for path in iter_snapshot_files(paths):
+        if path.parent not in manifests:
+            manifests[path.parent] = manifest_urls(path.parent)
+        original = base_url or manifests[path.parent].get(path.name)
+        url = original or path.resolve().as_uri()
+        for report in replay_source(read_snapshot(path), url, kinds, base_url=original):
+            report.meta['source'] = str(path)
+            yield report
+
+
+def main(argv=None):
+    """
+    コマンドラインから実行する
+
+    Args:
+        argv (list): 引数のリスト(省略時は sys.argv)
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='保存済みHTMLをブラウザ無しで再分析する')
+    parser.add_argument('paths', nargs='*', help=f'HTMLファイルまたはディレクトリ(省略時は {DEFAULT_SOURCE})')
+    parser.add_argument('--base-url',
+                        help='ページの元のURL(【8】の内部/外部リンクの判定用。省略時は manifest.ndjson から調べる)')
+    parser.add_argument('--kind', choices=('structure', 'elements', 'both'), default='both',
+                        help='structure=sctest.py / elements=toku.py / both=両方')
+    parser.add_argument('--output', default='console',
+                        help='出力先(console / - / .ndjson / .json / .parquet)')
+    args = parser.parse_args(argv)
+    if not args.paths:
+        args.paths = [DEFAULT_SOURCE]
+        args.base_url = args.base_url or DEFAULT_SOURCE_URL
+
+    kinds = ('structure', 'elements') if args.kind == 'both' else (args.kind,)
+    if args.output == 'console':
+        # 種類ごとに今までと同じ表示をする
+        renderers = {'structure': render_structure_report, 'elements': render_elements_report}
+        sink = ConsoleSink(lambda report, out: renderers[report.kind](report, out=out))
+    else:
+        sink = open_sink(args.output)
+
+    started = time.perf_counter()
+    count = 0
+    try:
+        for report in replay(args.paths, kinds, base_url=args.base_url):
+            emit_report(report, [sink])
+            count += 1
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - started
+    logger.info(f"再分析完了: {count}件 {elapsed * 1000:.1f}ms ({elapsed * 1000 / max(count, 1):.2f}ms/件)")
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    main()
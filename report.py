@@ -0,0 +1,238 @@
+# === 分析結果のレポートと出力先(シンク) ===
+# analyze_site_structure / find_specific_elements の結果を print せずに
+# Reportオブジェクトにまとめ、出力先を差し替えられるようにする
+# - ConsoleSink : 今までと同じ画面表示(表示するときだけ整形する)
+# - JsonSink    : JSONファイル
+# - NdjsonSink  : 1行1レポートのNDJSON(バッチ処理のストリーム出力向け)
+# - ParquetSink : 列指向のParquet(pyarrowが必要)
+
+# 結果をJSONで書き出すため
+import json
+# 標準出力に書くため
+import sys
+# 作成日時の記録用
+import time
+
+
+class Report:
+    """
+    ページ1つ分の分析結果
+
+    Args:
+        kind (str): 'structure'(sctest.py) / 'elements'(toku.py)
+        url (str): 分析したURL
+
+    Attributes:
+        meta (dict): タイトル・現在のURL・待機時間などの付加情報
+        sections (dict): セクション番号 → {'title': 見出し, 'data': 内容}
+
+    Example:
+        >>> report = Report('structure', 'https://www.coorikuya.com/')
+        >>> report.add_section('5', 'リスト・アイテム構造', {'ul': 3, 'ol': 0})
+        >>> report['5']
+        {'ul': 3, 'ol': 0}
+    """
+
+    def __init__(self, kind, url):
+        self.kind = kind
+        self.url = url
+        self.created_at = time.time()
+        self.meta = {}
+        self.sections = {}
+
+    def add_section(self, key, title, data):
+        """
+        セクションを追加する
+
+        Args:
+            key (str): セクション番号(例: '1')
+            title (str): 見出し(例: '基本情報')
+            data (dict): JSONにできる内容
+        """
+        self.sections[key] = {'title': title, 'data': data}
+
+    def __getitem__(self, key):
+        return self.sections[key]['data']
+
+    def __contains__(self, key):
+        return key in self.sections
+
+    def to_dict(self):
+        """
+        JSONに変換しやすい辞書を返す
+
+        Returns:
+            dict: kind, url, created_at, meta, sections
+        """
+        return {
+            'kind': self.kind,
+            'url': self.url,
+            'created_at': self.created_at,
+            'meta': self.meta,
+            'sections': self.sections,
+        }
+
+
+def _as_dict(record):
+    """Reportでも辞書でも受け取れるようにする"""
+    return record.to_dict() if hasattr(record, 'to_dict') else record
+
+
+class ConsoleSink:
+    """
+    人が読むための画面表示
+
+    整形は emit() されたときに初めて行う(画面表示が不要なら整形コストも掛からない)。
+
+    Args:
+        render: (report, out) を受け取って表示する関数
+        stream: 出力先(省略時は標準出力)
+    """
+
+    def __init__(self, render, stream=None):
+        self.render = render
+        self.stream = stream
+
+    def emit(self, report):
+        self.render(report, out=self.stream or sys.stdout)
+
+    def close(self):
+        pass
+
+
+class JsonSink:
+    """
+    JSONファイルに書き出す(close() 時にレポートの配列として保存)
+
+    Args:
+        path (str): 出力ファイル
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+
+    def emit(self, report):
+        self.records.append(_as_dict(report))
+
+    def close(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=2)
+
+
+class NdjsonSink:
+    """
+    1行1レポートのNDJSONで書き出す(1件ごとにflushするのでストリームで読める)
+
+    Args:
+        target: ファイルパス、または書き込み可能なストリーム('-' は標準出力)
+    """
+
+    def __init__(self, target='-'):
+        if target == '-':
+            self.stream, self._owns = sys.stdout, False
+        elif isinstance(target, str):
+            self.stream, self._owns = open(target, 'w', encoding='utf-8'), True
+        else:
+            self.stream, self._owns = target, False
+
+    def emit(self, report):
+        self.stream.write(json.dumps(_as_dict(report), ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self._owns:
+            self.stream.close()
+
+
+def flatten(record, prefix=''):
+    """
+    入れ子の辞書を 'sections.5.data.ul' のような列名の1段の辞書にする
+
+    リストは1つの列にJSON文字列として入れる(列指向形式で扱いやすくするため)。
+
+    Args:
+        record (dict): 入れ子の辞書
+        prefix (str): 列名の前に付ける文字列
+
+    Returns:
+        dict: 列名 → 値
+    """
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (list, tuple, set)):
+            flat[name] = json.dumps(list(value), ensure_ascii=False)
+        else:
+            flat[name] = value
+    return flat
+
+
+class ParquetSink:
+    """
+    列指向のParquetファイルに書き出す(1レポート1行、close() 時に保存)
+
+    Args:
+        path (str): 出力ファイル(.parquet)。'.arrow' ならArrow IPC形式で保存
+    """
+
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("ParquetSink を使うには pyarrow をインストールしてください: pip install pyarrow")
+        self.path = path
+        self.rows = []
+
+    def emit(self, report):
+        self.rows.append(flatten(_as_dict(report)))
+
+    def close(self):
+        import pyarrow as pa
+        # レポートごとに列が違っても良いように全列をそろえる(無い値はnull)
+        names = list(dict.fromkeys(name for row in self.rows for name in row))
+        table = pa.table({name: [row.get(name) for row in self.rows] for name in names})
+        if self.path.endswith('.arrow'):
+            import pyarrow.feather as feather
+            feather.write_feather(table, self.path)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, self.path)
+
+
+def open_sink(target, render=None):
+    """
+    出力先の指定からシンクを作る
+
+    Args:
+        target (str): 'console' / '-' / 'xxx.json' / 'xxx.ndjson' / 'xxx.parquet' / 'xxx.arrow'
+        render: ConsoleSink で使う表示関数
+
+    Returns:
+        シンク(emit / close を持つオブジェクト)
+    """
+    if target == 'console':
+        if render is None:
+            raise ValueError("console には表示関数(render)が必要です")
+        return ConsoleSink(render)
+    if target == '-' or target.endswith(('.ndjson', '.jsonl')):
+        return NdjsonSink(target)
+    if target.endswith('.json'):
+        return JsonSink(target)
+    if target.endswith(('.parquet', '.arrow')):
+        return ParquetSink(target)
+    raise ValueError(f"出力先の形式が分かりません: {target}")
+
+
+def emit_report(report, sinks):
+    """
+    全てのシンクにレポートを渡す
+
+    Args:
+        report (Report): 分析結果
+        sinks: シンクのリスト
+    """
+    for sink in sinks:
+        sink.emit(report)
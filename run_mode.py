@@ -0,0 +1,157 @@
+# === 実行モード(ヘッドレス・画面あり・対話) ===
+# 今まで sctest.py は終了前に input() でEnterを待ち、toku.py は sleep(5) してから
+# ブラウザを返していたため、無人で大量に実行できなかった
+# - headless    : 画面を出さない・待たない(バッチのデフォルト)
+# - headed      : 画面を出すが待たない(1ページだけ実行するときのデフォルト)
+# - interactive : 画面を出し、Enterを押すまでブラウザを返さない(指定したときだけ)
+# 例: RUN_MODE=interactive python sctest.py
+#     python run_mode.py --pages 20    (フィクスチャサイトでheadless/headedの速度を比較)
+
+# 引数付きの関数を作るため
+from functools import partial
+# 環境変数でモードを選べるようにするため
+import os
+# 標準入力が端末かどうかの判定用
+import sys
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+# モード名の一覧
+RUN_MODES = ('headless', 'headed', 'interactive')
+# 1ページだけ実行するときのデフォルト(今までどおり画面で確認できる)
+DEFAULT_RUN_MODE = 'headed'
+# バッチ処理のデフォルト
+BATCH_RUN_MODE = 'headless'
+
+
+class RunMode:
+    """
+    ブラウザの起動方法と、分析後にブラウザを返すまでの振る舞い
+
+    Args:
+        name (str): 'headless' / 'headed' / 'interactive'
+
+    Attributes:
+        headless (bool): 画面を出さずに起動するか
+        interactive (bool): ブラウザを返す前にEnterを待つか
+
+    Example:
+        >>> mode = RunMode('headless')
+        >>> pool = DriverPool(driver_factory=mode.driver_factory())
+    """
+
+    def __init__(self, name):
+        if name not in RUN_MODES:
+            raise ValueError(f"実行モードは {', '.join(RUN_MODES)} のどれかを指定してください: {name}")
+        self.name = name
+        self.headless = name == 'headless'
+        self.interactive = name == 'interactive'
+
+    def __repr__(self):
+        return f"RunMode({self.name!r})"
+
+    def driver_factory(self, profile=None):
+        """
+        このモードでChromeを起動する関数を返す(DriverPoolのdriver_factory用)
+
+        Args:
+            profile: 取得プロファイル名 / FetchProfile(fetch_profile.py参照。省略時は環境変数 FETCH_PROFILE)
+
+        Returns:
+            function: 引数無しでドライバーを起動する関数
+        """
+        from driver_pool import create_driver, create_chrome_options
+        options_factory = partial(create_chrome_options, headless=self.headless, profile=profile)
+        return partial(create_driver, options_factory=options_factory, profile=profile)
+
+    def before_release(self, message="\nEnterキーを押すとブラウザをプールに返却します..."):
+        """
+        ブラウザを返す直前に呼ぶ(interactiveのときだけEnterを待つ)
+
+        標準入力が端末でなければ(パイプ・cronなど)待たずに進む。
+
+        Args:
+            message (str): 待つときに表示するメッセージ
+        """
+        if not self.interactive:
+            return
+        if not sys.stdin or not sys.stdin.isatty():
+            logger.info("標準入力が端末ではないので待たずに返却します")
+            return
+        input(message)
+
+
+def get_run_mode(default=DEFAULT_RUN_MODE):
+    """
+    環境変数 RUN_MODE(無ければ default)から実行モードを返す
+
+    Args:
+        default (str): 環境変数が無いときのモード名
+
+    Returns:
+        RunMode: 実行モード
+    """
+    return RunMode(os.environ.get('RUN_MODE') or default)
+
+
+def benchmark_modes(pages=20, workers=2, modes=('headless', 'headed'), directory='site_fixture'):
+    """
+    ローカルのフィクスチャサイトを各モードで分析し、1ページあたりの時間を比べる
+
+    モードごとに新しいプールを作るので、ブラウザの起動時間も含めた実際の費用になる。
+
+    Args:
+        pages (int): フィクスチャのページ数
+        workers (int): 並列数
+        modes: 比べるモード名
+        directory (str): フィクスチャサイトを作るディレクトリ
+
+    Returns:
+        dict: モード名 → {'pages', 'ok', 'elapsed', 'per_page'}
+    """
+    import time
+    from batch_crawl import crawl_batch
+    from driver_pool import DriverPool
+    from fixture_server import FixtureServer, write_fixture_site
+
+    write_fixture_site(directory, pages=pages)
+    results = {}
+    with FixtureServer(directory) as server:
+        urls = server.page_urls()
+        for name in modes:
+            pool = DriverPool(size=workers, driver_factory=RunMode(name).driver_factory())
+            started = time.monotonic()
+            try:
+                ok = sum(record['ok'] for record in crawl_batch(urls, workers=workers, pool=pool))
+            finally:
+                pool.close()
+            elapsed = time.monotonic() - started
+            results[name] = {
+                'pages': len(urls),
+                'ok': ok,
+                'elapsed': round(elapsed, 3),
+                'per_page': round(elapsed / max(len(urls), 1), 4),
+            }
+            logger.info(f"{name}: {ok}/{len(urls)}ページ {elapsed:.1f}秒 ({elapsed * 1000 / max(len(urls), 1):.0f}ms/ページ)")
+    return results
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='フィクスチャサイトで headless / headed の速度を比べる')
+    parser.add_argument('--pages', type=int, default=20, help='フィクスチャのページ数')
+    parser.add_argument('--workers', type=int, default=2, help='並列数(ブラウザの数)')
+    parser.add_argument('--dir', default='site_fixture', help='フィクスチャサイトを作るディレクトリ')
+    args = parser.parse_args()
+
+    results = benchmark_modes(pages=args.pages, workers=args.workers, directory=args.dir)
+    for name, result in results.items():
+        print(f"{name:>9}: {result['per_page'] * 1000:.0f}ms/ページ "
+              f"(合計{result['elapsed']:.1f}秒, 成功{result['ok']}/{result['pages']})")
+    if {'headless', 'headed'} <= results.keys() and results['headless']['per_page']:
+        print(f"headedはheadlessの{results['headed']['per_page'] / results['headless']['per_page']:.2f}倍")
@@ -12,16 +12,23 @@
 
 
 # 必要なライブラリをインポート
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+from selenium.common.exceptions import WebDriverException
 import logging
-from bs4 import BeautifulSoup
+from html_parsers import parse_html, collect_stats, section_counts
+from driver_pool import get_default_pool
+from page_ready import wait_for_page, DEFAULT_STRATEGIES
+from dom_stats import collect_dom_stats
+from report import Report, ConsoleSink, emit_report
+from dom_extract import extract_in_browser, count_selectors
+from page_cache import get_default_cache
+from artifacts import get_default_writer, screenshot_path
+from run_mode import get_run_mode
+from fetch_profile import measure_page
+from link_frontier import classify_links
+from change_detect import page_fingerprint
+from site_profile import page_profile
+from stream_stats import stream_stats, iter_text_chunks
+from tracing import span
 
 # ログ設定
 logging.basicConfig(
@@ -30,275 +37,558 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 【15】でブラウザ上のDOMに対して数えるセレクター
+SELENIUM_SELECTORS = {
+    'h1': 'h1',
+    # よくある記事リストのクラス名
+    'article_candidates': 'article, .post, .entry, .item',
+}
 
-def analyze_site_structure(url):
+# スクリーンショットの撮り方(保存先はURLごとに artifacts.screenshot_path で決め、裏で変換・保存する)
+SCREENSHOT_OPTIONS = {'full_page': False, 'max_width': None}
+
+
+def analyze_site_structure(url, pool=None, ready_strategies=DEFAULT_STRATEGIES, sinks=None,
+                           extraction='source', cache=None, mode=None):
     """
     サイトのHTML構造を詳しく分析する関数
     Args:
         url: 分析するURL
+        pool: ブラウザを借りるDriverPool(省略時は共有のデフォルトプール)
+        ready_strategies: 読み込み完了の判定方法(page_ready.pyの戦略のリスト)
+        sinks: 結果の出力先(report.pyのシンクのリスト。省略時は画面表示)
+        extraction: 'source'(page_sourceを解析) / 'browser'(ブラウザ内で一括集計) /
+                    'stream'(page_sourceを木にせずに解析。巨大なページ向け)
+        cache: ページキャッシュ(省略時は共有のデフォルトキャッシュ。Falseで使わない)
+        mode: 実行モード(run_mode.pyのRunMode。省略時は環境変数 RUN_MODE、無ければ画面あり・待ち無し)
+    Returns:
+        Report: 分析結果(エラー時はNone)
     """
-    # Chromeオプションを設定
-    chrome_options = Options()
-    
-    # ヘッドレスモードをオフ(画面を見ながら確認)
-    # chrome_options.add_argument('--headless')
-    
-    # その他の設定
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--window-size=1920,1080')
+    if mode is None:
+        mode = get_run_mode()
     
-    # User-Agent設定
-    chrome_options.add_argument(
-        'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    )
+    # キャッシュにあればブラウザを使わずに分析する
+    if cache is None:
+        cache = get_default_cache()
+    if cache:
+        with span('cache.lookup', url=url):
+            source = cache.lookup(url)
+        if source is not None:
+            return analyze_cached_page(url, source, cache, sinks=sinks)
     
-    # ドライバーを自動セットアップ
-    service = Service(ChromeDriverManager().install())
-    
-    # ドライバーを起動
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    # 起動済みのブラウザをプールから借りる
+    if pool is None:
+        pool = get_default_pool()
+    with span('pool.acquire'):
+        session = pool.acquire()
+    driver = session.driver
+    # ブラウザ自体が壊れたかどうか(壊れていたら返却時に捨てる)
+    broken = False
     
     try:
-        # サイトにアクセス
-        logger.info(f"アクセス中: {url}")
-        driver.get(url)
+        # 借りたブラウザで1ページ分を分析
+        with span('analyze_site_structure', url=url):
+            return analyze_page(driver, url, ready_strategies=ready_strategies, sinks=sinks,
+                                extraction=extraction, cache=cache or None)
         
-        # ページが完全に読み込まれるまで待機
-        time.sleep(3)
+    except Exception as e:
+        logger.error(f"エラーが発生しました: {e}")
+        import traceback
+        traceback.print_exc()
+        # WebDriverの例外ならブラウザが落ちている可能性がある
+        broken = isinstance(e, WebDriverException)
         
+    finally:
+        # ブラウザをプールに返す(Cookie等は返却時に消える。interactiveのときだけEnterを待つ)
+        mode.before_release()
+        with span('pool.release'):
+            pool.release(session, broken=broken)
+        logger.info(f"ブラウザをプールに返却しました: {pool.stats()}")
+
+
+def analyze_page(driver, url, ready_strategies=DEFAULT_STRATEGIES, sinks=None, extraction='source',
+                 cache=None, changes=None, tally=None, screenshot=True):
+    """
+    借りたブラウザで1ページ分のHTML構造を分析する
+    (エラーはそのまま呼び出し元に伝える。バッチ処理のリトライ判定用)
+    Args:
+        driver: Chromeドライバー
+        url: 分析するURL
+        ready_strategies: 読み込み完了の判定方法(page_ready.pyの戦略のリスト)
+        sinks: 結果の出力先(report.pyのシンクのリスト。省略時は画面表示)
+        extraction: 'source' = page_sourceを取得してPythonで解析(【14】でHTMLも圧縮して保存)
+                    'browser' = ブラウザ内で集計してexecute_script 1回で受け取る(HTMLは保存しない)
+                    'stream' = page_sourceを木にせずに少しずつ解析する(stream_stats.py。巨大なページ向け)
+        cache: 取得したHTMLを保存するページキャッシュ(省略時は保存しない。'browser'以外のとき)
+        changes: 前回と比べる change_detect.ChangeDetector(省略時は比べない。'source'のときのみ)
+                 前回とほぼ同じページは解析・保存・【15】を省略し、meta['change']だけのレポートを返す
+        tally: クロール全体のクラス名・ID・data属性を数える heavy_hitters.FrequencyTally(省略時は数えない)
+        screenshot (bool): スクリーンショットを撮るか(バッチ・サイト巡回では撮らない)
+    Returns:
+        Report: 【1】〜【15】の分析結果
+    """
+    if sinks is None:
+        sinks = [ConsoleSink(render_structure_report)]
+    if extraction not in ('source', 'browser', 'stream'):
+        raise ValueError(f"extraction は 'source' / 'browser' / 'stream' のどれかを指定してください: {extraction}")
+    if changes is not None and extraction != 'source':
+        raise ValueError("changes は extraction='source' のときだけ使えます(指紋にHTMLソースが必要)")
+    
+    # サイトにアクセス
+    logger.info(f"アクセス中: {url}")
+    with span('driver.get', url=url):
+        driver.get(url)
+    
+    # ページが解析できる状態になるまで待機(固定秒数ではなく状態を見る)
+    with span('page.wait_ready'):
+        readiness = wait_for_page(driver, url, strategies=ready_strategies)
+    # 取得プロファイル(fetch_profile.py)で実際に読み込んだ量と時間
+    fetch = measure_page(driver)
+    
+    if extraction == 'browser':
+        # 【1】〜【13】と【15】のセレクター数・タイトル・URLを1回の往復でまとめて取得
+        with span('browser.extract'):
+            extracted = extract_in_browser(driver, selectors=SELENIUM_SELECTORS.values(), include_links=True)
+        title = extracted.document_title
+        current_url = extracted.url
+        stats = extracted.stats
+        selector_counts = extracted.selector_counts
+        soup = None
+    else:
         # ページタイトルを取得
         title = driver.title
-        logger.info(f"ページタイトル: {title}")
-        
         # 現在のURLを取得(リダイレクトされていないか確認)
         current_url = driver.current_url
-        logger.info(f"現在のURL: {current_url}")
         
         # ページ全体のHTMLソースを取得
-        page_source = driver.page_source
-        
-        # BeautifulSoupで解析(見やすくするため)
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        print("\n" + "="*80)
-        print("【HTML構造分析開始】")
-        print("="*80)
-        
-        # === 1. 基本情報 ===
-        print("\n【1. 基本情報】")
-        print(f"タイトルタグ: {soup.title.string if soup.title else 'なし'}")
-        
-        # メタタグ情報
-        meta_description = soup.find('meta', attrs={'name': 'description'})
-        if meta_description:
-            print(f"Description: {meta_description.get('content', '')[:100]}...")
-        
-        # === 2. ヘッダー構造 ===
-        print("\n【2. ヘッダー構造】")
-        header = soup.find('header')
-        if header:
-            print("✓ <header>タグ: 存在します")
-            # ヘッダー内のクラス名を表示
-            if header.get('class'):
-                print(f"  - クラス名: {' '.join(header.get('class'))}")
-            # ヘッダー内のナビゲーション
-            nav = header.find('nav')
-            if nav:
-                print("  - <nav>タグ: 存在します")
-                nav_links = nav.find_all('a')
-                print(f"  - ナビゲーションリンク数: {len(nav_links)}個")
+        with span('page_source') as s:
+            page_source = driver.page_source
+            s.set(chars=len(page_source))
+        # 次回はブラウザ無しで分析できるようにキャッシュしておく(【14】のスナップショットも兼ねる)
+        snapshot = None
+        if cache is not None:
+            with span('cache.store'):
+                snapshot = cache.store(url, page_source)
+        
+        # 前回と比べて、ほぼ同じなら解析以降を省略する
+        if changes is not None:
+            with span('change.fingerprint'):
+                change = changes.check(url, page_fingerprint(page_source))
+            if change['status'] == 'unchanged':
+                logger.info(f"前回から変化が無いので分析を省略します: {url}")
+                report = Report('structure', url)
+                report.meta.update({
+                    'title': title,
+                    'current_url': current_url,
+                    'readiness': readiness.to_dict(),
+                    'fetch': fetch,
+                    'extraction': extraction,
+                    'change': {'status': 'unchanged', 'text_distance': change['text_distance']},
+                })
+                emit_report(report, sinks)
+                return report
+        
+        if extraction == 'stream':
+            # 木を作らずに少しずつトークンに分けて集計(hrefも覚えずにその場で分類する)
+            with span('stream_stats'):
+                stats = stream_stats(iter_text_chunks(page_source), base_url=current_url)
         else:
-            print("✗ <header>タグ: 見つかりません")
-        
-        # === 3. メインコンテンツ構造 ===
-        print("\n【3. メインコンテンツ構造】")
-        main = soup.find('main')
-        if main:
-            print("✓ <main>タグ: 存在します")
-            if main.get('class'):
-                print(f"  - クラス名: {' '.join(main.get('class'))}")
-        
-        # article タグ
-        articles = soup.find_all('article')
-        print(f"✓ <article>タグ: {len(articles)}個")
-        
-        # section タグ
-        sections = soup.find_all('section')
-        print(f"✓ <section>タグ: {len(sections)}個")
-        
-        # div要素(主要なクラス名を抽出)
-        divs_with_class = soup.find_all('div', class_=True)
-        print(f"✓ クラス付き<div>: {len(divs_with_class)}個")
-        
-        # === 4. 見出し構造 ===
-        print("\n【4. 見出し構造】")
-        for i in range(1, 7):
-            headings = soup.find_all(f'h{i}')
-            if headings:
-                print(f"<h{i}>タグ: {len(headings)}個")
-                # 最初の3つを表示
-                for j, h in enumerate(headings[:3], 1):
-                    print(f"  {j}. {h.get_text(strip=True)[:50]}")
-                if len(headings) > 3:
-                    print(f"  ... 他 {len(headings) - 3}個")
-        
-        # === 5. リスト構造 ===
-        print("\n【5. リスト・アイテム構造】")
-        ul_lists = soup.find_all('ul')
-        ol_lists = soup.find_all('ol')
-        print(f"<ul>タグ: {len(ul_lists)}個")
-        print(f"<ol>タグ: {len(ol_lists)}個")
-        
-        # よく使われるクラス名を抽出
-        print("\n【6. 頻出クラス名トップ10】")
-        class_counter = {}
-        for tag in soup.find_all(class_=True):
-            # クラス名を取得(複数ある場合はリスト)
-            classes = tag.get('class')
-            for cls in classes:
-                class_counter[cls] = class_counter.get(cls, 0) + 1
-        
-        # 出現回数でソート
-        sorted_classes = sorted(class_counter.items(), key=lambda x: x[1], reverse=True)
-        for i, (cls, count) in enumerate(sorted_classes[:10], 1):
-            print(f"{i:2d}. '{cls}' - {count}回")
-        
-        # === 7. ID属性 ===
-        print("\n【7. ID属性のある要素】")
-        elements_with_id = soup.find_all(id=True)
-        print(f"ID付き要素: {len(elements_with_id)}個")
-        for elem in elements_with_id[:10]:
-            print(f"  - #{elem.get('id')} ({elem.name})")
-        
-        # === 8. リンク構造 ===
-        print("\n【8. リンク構造】")
-        all_links = soup.find_all('a', href=True)
-        print(f"総リンク数: {len(all_links)}個")
-        
-        # 内部リンクと外部リンクを分類
-        internal_links = []
-        external_links = []
-        for link in all_links:
-            href = link.get('href')
-            if href.startswith('http'):
-                external_links.append(href)
-            else:
-                internal_links.append(href)
-        
-        print(f"  - 内部リンク: {len(internal_links)}個")
-        print(f"  - 外部リンク: {len(external_links)}個")
-        
-        # 最初の5つのリンクを表示
-        print("\n  最初の5つのリンク:")
-        for i, link in enumerate(all_links[:5], 1):
-            href = link.get('href', '')
-            text = link.get_text(strip=True)
-            print(f"  {i}. {text[:30]} -> {href[:50]}")
-        
-        # === 9. 画像 ===
-        print("\n【9. 画像要素】")
-        images = soup.find_all('img')
-        print(f"画像数: {len(images)}個")
-        
-        # 最初の3つの画像情報
-        print("  最初の3つの画像:")
-        for i, img in enumerate(images[:3], 1):
-            src = img.get('src', '')
-            alt = img.get('alt', '')
-            print(f"  {i}. alt='{alt[:30]}' src='{src[:50]}'")
-        
-        # === 10. フォーム要素 ===
-        print("\n【10. フォーム要素】")
-        forms = soup.find_all('form')
-        print(f"フォーム数: {len(forms)}個")
-        
-        input_fields = soup.find_all('input')
-        textareas = soup.find_all('textarea')
-        selects = soup.find_all('select')
-        buttons = soup.find_all('button')
-        
-        print(f"  - <input>: {len(input_fields)}個")
-        print(f"  - <textarea>: {len(textareas)}個")
-        print(f"  - <select>: {len(selects)}個")
-        print(f"  - <button>: {len(buttons)}個")
-        
-        # === 11. テーブル ===
-        print("\n【11. テーブル要素】")
-        tables = soup.find_all('table')
-        print(f"テーブル数: {len(tables)}個")
-        
-        # === 12. 特定のデータ属性 ===
-        print("\n【12. data-*属性】")
-        data_attributes = set()
-        for tag in soup.find_all():
-            for attr in tag.attrs:
-                if attr.startswith('data-'):
-                    data_attributes.add(attr)
-        
-        if data_attributes:
-            print(f"見つかったdata属性: {len(data_attributes)}種類")
-            for attr in sorted(data_attributes)[:10]:
-                print(f"  - {attr}")
-        else:
-            print("data属性は見つかりませんでした")
-        
-        # === 13. スクリプトとスタイル ===
-        print("\n【13. スクリプト・スタイル】")
-        scripts = soup.find_all('script')
-        styles = soup.find_all('style')
-        link_css = soup.find_all('link', rel='stylesheet')
-        
-        print(f"<script>タグ: {len(scripts)}個")
-        print(f"<style>タグ: {len(styles)}個")
-        print(f"外部CSS: {len(link_css)}個")
-        
-        # === 14. HTML全体を保存 ===
-        print("\n【14. HTMLソース保存】")
-        with open('coorikuya_source.html', 'w', encoding='utf-8') as f:
-            f.write(soup.prettify())
-        print("✓ HTMLソースを 'coorikuya_source.html' に保存しました")
-        
-        # === 15. 実際のSelenium要素も確認 ===
-        print("\n【15. Selenium要素確認】")
-        
-        # Seleniumで要素を直接検索してみる
-        try:
-            # h1タグ
-            h1_elements = driver.find_elements(By.TAG_NAME, 'h1')
-            print(f"Seleniumで取得したh1: {len(h1_elements)}個")
-            
-            # よくある記事リストのクラス名で検索
-            article_items = driver.find_elements(By.CSS_SELECTOR, 'article, .post, .entry, .item')
-            print(f"記事要素候補: {len(article_items)}個")
-            
-        except Exception as e:
-            print(f"Selenium要素検索エラー: {e}")
-        
-        print("\n" + "="*80)
-        print("【分析完了】")
-        print("="*80)
-        
-        # スクリーンショットを保存
-        driver.save_screenshot('coorikuya_screenshot.png')
-        logger.info("スクリーンショットを保存しました")
-        
+            # BeautifulSoupで解析(インストール済みで一番速いパーサーを使う)
+            with span('parse'):
+                soup = parse_html(page_source)
+            # 木を1回たどるだけで【1】〜【13】の数を集計
+            with span('dom_stats'):
+                stats = collect_dom_stats(soup)
+        selector_counts = None
+    logger.info(f"ページタイトル: {title}")
+    logger.info(f"現在のURL: {current_url}")
+    if tally is not None:
+        tally.add_stats(stats)
+    
+    # 【1】〜【13】をレポートにする
+    with span('sections.1-13'):
+        report = build_structure_report(stats, url, base_url=current_url)
+    report.meta.update({
+        'title': title,
+        'current_url': current_url,
+        'readiness': readiness.to_dict(),
+        'fetch': fetch,
+        'extraction': extraction,
+        'cache': 'miss' if cache is not None else None,
+    })
+    # 指紋と【1】〜【13】の数を保存し、前回からの差分を記録する
+    if changes is not None:
+        report.meta['change'] = {
+            'status': change['status'],
+            'text_distance': change['text_distance'],
+            'first_seen': change['first_seen'],
+            'diff': changes.update(url, change['fingerprint'], section_counts(stats, current_url)),
+        }
+    
+    # === 14. HTML全体を保存 ===
+    # 整形せずに取得したままのHTMLを裏で圧縮して保存(同じ内容なら書き込まない)
+    artifacts = get_default_writer()
+    if extraction != 'browser':
+        with span('section.14.snapshot'):
+            path, size = snapshot or artifacts.save_snapshot(url, page_source)[:2]
+        report.add_section('14', 'HTMLソース保存', {'path': path, 'bytes': size})
+    
+    # === 15. 実際のSelenium要素も確認 ===
+    # ブラウザ上のDOMで直接数える(複数のセレクターでも往復は1回)
+    try:
+        if selector_counts is None:
+            with span('section.15.selenium'):
+                selector_counts = count_selectors(driver, SELENIUM_SELECTORS.values())
+        selenium_data = {key: selector_counts[selector] for key, selector in SELENIUM_SELECTORS.items()}
     except Exception as e:
-        logger.error(f"エラーが発生しました: {e}")
-        import traceback
-        traceback.print_exc()
-        
-    finally:
-        # ブラウザを閉じる
-        input("\nEnterキーを押すとブラウザが閉じます...")
-        driver.quit()
-        logger.info("ブラウザを閉じました")
+        selenium_data = {'error': str(e)}
+    report.add_section('15', 'Selenium要素確認', selenium_data)
+    
+    # スクリーンショットを撮る(PNGのデコード・縮小・書き込みは裏で行う)
+    if screenshot:
+        shot_path = screenshot_path(url)
+        with span('screenshot'):
+            artifacts.save_screenshot(driver, shot_path, **SCREENSHOT_OPTIONS)
+        logger.info(f"スクリーンショットの保存を開始しました: {shot_path}")
+    
+    # 出力先(画面・JSONなど)に渡す
+    with span('emit'):
+        emit_report(report, sinks)
+    return report
+
+
+def analyze_cached_page(url, source, cache, sinks=None):
+    """
+    キャッシュのHTMLで1ページ分のHTML構造を分析する(ブラウザ不要)
+    ブラウザが必要な【14】【15】とスクリーンショットは行わない
+    Args:
+        url: 分析するURL
+        source: キャッシュから取り出したHTMLソース
+        cache: ページキャッシュ(統計の表示用)
+        sinks: 結果の出力先(report.pyのシンクのリスト。省略時は画面表示)
+    Returns:
+        Report: 【1】〜【13】の分析結果
+    """
+    if sinks is None:
+        sinks = [ConsoleSink(render_structure_report)]
+    
+    # 木を作らない最速のパーサーで【1】〜【13】の数を集計
+    stats = collect_stats(source)
+    report = build_structure_report(stats, url)
+    report.meta.update({
+        'title': stats.title,
+        'current_url': url,
+        'extraction': 'source',
+        'cache': 'hit',
+    })
+    logger.info(f"キャッシュから分析しました(ブラウザ未使用): {cache.stats()}")
+    
+    # 出力先(画面・JSONなど)に渡す
+    emit_report(report, sinks)
+    return report
+
+
+def build_structure_report(stats, url, base_url=None):
+    """
+    DOM統計から【1】〜【13】のレポートを作る(ブラウザ不要)
+    Args:
+        stats: dom_stats.DomStats
+        url: 分析したURL
+        base_url: リンクの内部/外部を判定する基準のURL(リダイレクト後のURL。省略時はurl)
+    Returns:
+        Report: 【1】〜【13】を入れたレポート
+    """
+    report = Report('structure', url)
+    # サイト全体の集計(site_profile.py)用の、クラス名・タグ名・data属性の一覧とテンプレートのSimHash
+    report.meta['profile'] = page_profile(stats)
+    
+    # === 1. 基本情報 ===
+    report.add_section('1', '基本情報', {
+        'title': stats.title,
+        'meta_description': stats.meta_description,
+    })
+    
+    # === 2. ヘッダー構造 ===
+    report.add_section('2', 'ヘッダー構造', {
+        'has_header': stats.has_header,
+        'classes': stats.header_classes,
+        'has_nav': stats.header_has_nav,
+        'nav_links': stats.header_nav_links,
+    })
+    
+    # === 3. メインコンテンツ構造 ===
+    report.add_section('3', 'メインコンテンツ構造', {
+        'has_main': stats.has_main,
+        'main_classes': stats.main_classes,
+        'articles': stats.count('article'),
+        'sections': stats.count('section'),
+        'divs_with_class': stats.divs_with_class,
+    })
+    
+    # === 4. 見出し構造 ===
+    report.add_section('4', '見出し構造', {
+        'headings': [
+            {'level': i, 'count': stats.heading_count(i), 'samples': stats.headings.get(i, [])}
+            for i in range(1, 7)
+        ],
+    })
+    
+    # === 5. リスト構造 ===
+    report.add_section('5', 'リスト・アイテム構造', {
+        'ul': stats.count('ul'),
+        'ol': stats.count('ol'),
+    })
+    
+    # === 6. 頻出クラス名 ===
+    # 全件ソートせずに上位10件だけ取り出す(approximate=True なら回数は Space-Saving法の推定値)
+    report.add_section('6', '頻出クラス名トップ10', {
+        'top_classes': stats.top_classes(10),
+        'approximate': stats.class_counts.approximate,
+    })
+    
+    # === 7. ID属性 ===
+    report.add_section('7', 'ID属性のある要素', {
+        'count': stats.id_count,
+        'samples': [{'id': elem_id, 'tag': name} for elem_id, name in stats.id_samples],
+        # 同じidが確実に2回以上使われているもの(多い順に5件)
+        # 近似カウンターの回数は多めなので、誤差を引いた下限で判定する(approximate=True なら回数は下限)
+        'duplicates': [{'id': elem_id, 'count': count}
+                       for elem_id, count in stats.id_counts.top_guaranteed(5) if count > 1],
+        'approximate': stats.id_counts.approximate,
+    })
+    
+    # === 8. リンク構造 ===
+    # ページのURLを基準に正規化してから内部/外部/ページ内/その他(mailto:等)に分ける
+    # ストリーミング解析ではhrefを覚えずに集計中に分類済み
+    links = stats.links if stats.links is not None else classify_links(stats.hrefs, base_url or url)
+    report.add_section('8', 'リンク構造', {
+        'count': stats.link_count,
+        'internal': links['internal'],
+        'external': links['external'],
+        'fragment': links['fragment'],
+        'other': links['other'],
+        'unique_internal': links['unique_internal'],
+        'samples': [{'text': text, 'href': href} for text, href in stats.link_samples],
+    })
+    
+    # === 9. 画像 ===
+    report.add_section('9', '画像要素', {
+        'count': stats.count('img'),
+        'samples': [{'alt': alt, 'src': src} for alt, src in stats.image_samples],
+    })
+    
+    # === 10. フォーム要素 ===
+    report.add_section('10', 'フォーム要素', {
+        name: stats.count(name) for name in ('form', 'input', 'textarea', 'select', 'button')
+    })
+    
+    # === 11. テーブル ===
+    report.add_section('11', 'テーブル要素', {'tables': stats.count('table')})
+    
+    # === 12. 特定のデータ属性 ===
+    report.add_section('12', 'data-*属性', {
+        'data_attributes': sorted(stats.data_attributes),
+        'top': stats.data_attribute_counts.top(10),
+    })
+    
+    # === 13. スクリプトとスタイル ===
+    report.add_section('13', 'スクリプト・スタイル', {
+        'scripts': stats.count('script'),
+        'styles': stats.count('style'),
+        'stylesheets': stats.stylesheet_links,
+    })
+    return report
+
+
+def render_structure_report(report, out=None):
+    """
+    レポートを今までと同じ形式で画面に表示する(ConsoleSink用)
+    Args:
+        report: build_structure_report / analyze_page の結果
+        out: 出力先(省略時は標準出力)
+    """
+    def p(*args, **kwargs):
+        print(*args, file=out, **kwargs)
+    
+    p("\n" + "="*80)
+    p("【HTML構造分析開始】")
+    p("="*80)
+    
+    # 前回から変化が無く分析を省略したページ
+    change = report.meta.get('change')
+    if change and change['status'] == 'unchanged':
+        p(f"\n前回から変化が無いので分析を省略しました: {report.url}")
+        return
+    if change and change['diff']:
+        p("\n【前回からの変化】")
+        for key, diff in change['diff'].items():
+            p(f"  - {key}: {diff['old']} → {diff['new']}")
+    
+    # === 1. 基本情報 ===
+    data = report['1']
+    p("\n【1. 基本情報】")
+    p(f"タイトルタグ: {data['title'] if data['title'] is not None else 'なし'}")
+    
+    # メタタグ情報
+    if data['meta_description'] is not None:
+        p(f"Description: {data['meta_description'][:100]}...")
+    
+    # === 2. ヘッダー構造 ===
+    data = report['2']
+    p("\n【2. ヘッダー構造】")
+    if data['has_header']:
+        p("✓ <header>タグ: 存在します")
+        # ヘッダー内のクラス名を表示
+        if data['classes']:
+            p(f"  - クラス名: {' '.join(data['classes'])}")
+        # ヘッダー内のナビゲーション
+        if data['has_nav']:
+            p("  - <nav>タグ: 存在します")
+            p(f"  - ナビゲーションリンク数: {data['nav_links']}個")
+    else:
+        p("✗ <header>タグ: 見つかりません")
+    
+    # === 3. メインコンテンツ構造 ===
+    data = report['3']
+    p("\n【3. メインコンテンツ構造】")
+    if data['has_main']:
+        p("✓ <main>タグ: 存在します")
+        if data['main_classes']:
+            p(f"  - クラス名: {' '.join(data['main_classes'])}")
+    
+    # article タグ
+    p(f"✓ <article>タグ: {data['articles']}個")
+    
+    # section タグ
+    p(f"✓ <section>タグ: {data['sections']}個")
+    
+    # div要素(主要なクラス名を抽出)
+    p(f"✓ クラス付き<div>: {data['divs_with_class']}個")
+    
+    # === 4. 見出し構造 ===
+    p("\n【4. 見出し構造】")
+    for heading in report['4']['headings']:
+        count = heading['count']
+        if count:
+            p(f"<h{heading['level']}>タグ: {count}個")
+            # 最初の3つを表示
+            for j, text in enumerate(heading['samples'], 1):
+                p(f"  {j}. {text[:50]}")
+            if count > 3:
+                p(f"  ... 他 {count - 3}個")
+    
+    # === 5. リスト構造 ===
+    data = report['5']
+    p("\n【5. リスト・アイテム構造】")
+    p(f"<ul>タグ: {data['ul']}個")
+    p(f"<ol>タグ: {data['ol']}個")
+    
+    # よく使われるクラス名
+    p("\n【6. 頻出クラス名トップ10】" + ("(近似)" if report['6']['approximate'] else ""))
+    for i, (cls, count) in enumerate(report['6']['top_classes'], 1):
+        p(f"{i:2d}. '{cls}' - {count}回")
+    
+    # === 7. ID属性 ===
+    data = report['7']
+    p("\n【7. ID属性のある要素】")
+    p(f"ID付き要素: {data['count']}個")
+    for sample in data['samples']:
+        p(f"  - #{sample['id']} ({sample['tag']})")
+    if data['duplicates']:
+        p("  重複しているID:" + ("(近似。少なくともこの回数)" if data.get('approximate') else ""))
+        for dup in data['duplicates']:
+            p(f"  - #{dup['id']} ({dup['count']}回)")
+    
+    # === 8. リンク構造 ===
+    data = report['8']
+    p("\n【8. リンク構造】")
+    p(f"総リンク数: {data['count']}個")
+    
+    # 内部リンクと外部リンクの数
+    p(f"  - 内部リンク: {data['internal']}個 (重複を除くと{data['unique_internal']}個)")
+    p(f"  - 外部リンク: {data['external']}個")
+    p(f"  - ページ内リンク(#): {data['fragment']}個")
+    p(f"  - その他(mailto:・tel:・javascript:など): {data['other']}個")
+    
+    # 最初の5つのリンクを表示
+    p("\n  最初の5つのリンク:")
+    for i, sample in enumerate(data['samples'], 1):
+        p(f"  {i}. {sample['text'][:30]} -> {sample['href'][:50]}")
+    
+    # === 9. 画像 ===
+    data = report['9']
+    p("\n【9. 画像要素】")
+    p(f"画像数: {data['count']}個")
+    
+    # 最初の3つの画像情報
+    p("  最初の3つの画像:")
+    for i, sample in enumerate(data['samples'], 1):
+        p(f"  {i}. alt='{sample['alt'][:30]}' src='{sample['src'][:50]}'")
+    
+    # === 10. フォーム要素 ===
+    data = report['10']
+    p("\n【10. フォーム要素】")
+    p(f"フォーム数: {data['form']}個")
+    
+    p(f"  - <input>: {data['input']}個")
+    p(f"  - <textarea>: {data['textarea']}個")
+    p(f"  - <select>: {data['select']}個")
+    p(f"  - <button>: {data['button']}個")
+    
+    # === 11. テーブル ===
+    p("\n【11. テーブル要素】")
+    p(f"テーブル数: {report['11']['tables']}個")
+    
+    # === 12. 特定のデータ属性 ===
+    data_attributes = report['12']['data_attributes']
+    p("\n【12. data-*属性】")
+    if data_attributes:
+        p(f"見つかったdata属性: {len(data_attributes)}種類")
+        # 出現回数の多い順に10件
+        for attr, count in report['12']['top']:
+            p(f"  - {attr} ({count}回)")
+    else:
+        p("data属性は見つかりませんでした")
+    
+    # === 13. スクリプトとスタイル ===
+    data = report['13']
+    p("\n【13. スクリプト・スタイル】")
+    p(f"<script>タグ: {data['scripts']}個")
+    p(f"<style>タグ: {data['styles']}個")
+    p(f"外部CSS: {data['stylesheets']}個")
+    
+    # === 14. HTML全体を保存 ===
+    if '14' in report:
+        p("\n【14. HTMLソース保存】")
+        p(f"✓ HTMLソースを '{report['14']['path']}' に保存しました")
+    
+    # === 15. 実際のSelenium要素も確認 ===
+    if '15' in report:
+        data = report['15']
+        p("\n【15. Selenium要素確認】")
+        if 'error' in data:
+            p(f"Selenium要素検索エラー: {data['error']}")
+        else:
+            p(f"Seleniumで取得したh1: {data['h1']}個")
+            p(f"記事要素候補: {data['article_candidates']}個")
+    
+    p("\n" + "="*80)
+    p("【分析完了】")
+    p("="*80)
 
 
 # 実行
 if __name__ == "__main__":
-    # 対象URL
-    target_url = "https://www.coorikuya.com/"
+    import sys
     
-    # 構造分析を実行
-    analyze_site_structure(target_url)
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # URLリスト/サイトマップを渡された場合はバッチで並列分析
+        # 例: python sctest.py urls.txt --workers 4
+        from batch_crawl import main
+        main(sys.argv[1:])
+    else:
+        # 対象URL
+        target_url = "https://www.coorikuya.com/"
+        
+        # 構造分析を実行
+        analyze_site_structure(target_url)
\ No newline at end of file
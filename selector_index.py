@@ -0,0 +1,300 @@
+# === CSSセレクターの一括評価(インデックス方式) ===
+# toku.py は約35個のCSSセレクターを soup.select で1つずつ検索していて、
+# そのたびにページ全体をたどり直している。ここでは木を1回だけたどって
+# タグ名・クラス名・id・属性ごとの索引を作り、全セレクターを索引から答える
+# 例: python selector_index.py coorikuya_source.html  (soup.selectとの一致確認とベンチマーク)
+#     python selector_index.py coorikuya_source.html --scale 30  (body を30倍にした大きなページで計測)
+
+# 正規表現でセレクターを分解するため
+import re
+# コンパイル済みセレクターを使い回すため
+from functools import lru_cache
+# BeautifulSoupのノード種別の判定用
+from bs4 import BeautifulSoup
+
+
+class UnsupportedSelector(ValueError):
+    """索引で扱えないセレクター(soup.selectに任せる)"""
+
+
+# 複合セレクター1つ分: tag / .class / #id / [attr op "value"]
+_TOKEN = re.compile(
+    r'(?P<tag>^[a-zA-Z][\w-]*|^\*)'
+    r'|\.(?P<cls>[\w-]+)'
+    r'|#(?P<id>[\w-]+)'
+    r'|\[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[*^$~|]?=)\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'|(?P<bare>[^\]\s]+))\s*)?\]'
+)
+
+
+class Compound:
+    """
+    複合セレクター1つ分(例: 'h2.entry-title' や 'a[rel="tag"]')
+
+    Attributes:
+        tag (str): タグ名(指定なし・'*' ならNone)
+        classes (tuple): 全て持っている必要があるクラス名
+        ids (tuple): id(通常は0か1個)
+        attrs (tuple): (属性名, 演算子, 値) のタプル。演算子がNoneなら属性の有無だけ
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tag = None
+        classes, ids, attrs = [], [], []
+        pos = 0
+        while pos < len(text):
+            match = _TOKEN.match(text, pos)
+            if not match or match.end() == pos:
+                raise UnsupportedSelector(text)
+            if match.group('tag'):
+                self.tag = None if match.group('tag') == '*' else match.group('tag').lower()
+            elif match.group('cls'):
+                classes.append(match.group('cls'))
+            elif match.group('id'):
+                ids.append(match.group('id'))
+            else:
+                value = next((v for v in match.group('dq', 'sq', 'bare') if v is not None), None)
+                attrs.append((match.group('attr').lower(), match.group('op'), value))
+            pos = match.end()
+        self.classes = tuple(classes)
+        self.ids = tuple(ids)
+        self.attrs = tuple(attrs)
+
+    def matches(self, el):
+        """要素がこの複合セレクターに一致するか"""
+        if self.tag is not None and el.name != self.tag:
+            return False
+        attrs = el.attrs
+        if self.classes:
+            have = attrs.get('class') or ()
+            if isinstance(have, str):
+                have = have.split()
+            if not all(cls in have for cls in self.classes):
+                return False
+        for elem_id in self.ids:
+            if attrs.get('id') != elem_id:
+                return False
+        for name, op, value in self.attrs:
+            if name not in attrs:
+                return False
+            if op is None:
+                continue
+            have = attrs[name]
+            # class や rel のような複数値属性は空白でつないだ文字列で比べる(soupsieveと同じ)
+            if not isinstance(have, str):
+                have = ' '.join(have)
+            if not _compare(op, have, value):
+                return False
+        return True
+
+
+def _compare(op, have, value):
+    """属性セレクターの演算子で値を比べる"""
+    if op == '=':
+        return have == value
+    if op == '*=':
+        return bool(value) and value in have
+    if op == '^=':
+        return bool(value) and have.startswith(value)
+    if op == '$=':
+        return bool(value) and have.endswith(value)
+    if op == '~=':
+        return value in have.split()
+    if op == '|=':
+        return have == value or have.startswith(value + '-')
+    return False
+
+
+class CompiledSelector:
+    """
+    子孫結合子(空白)とカンマ区切りだけからなるセレクターをコンパイルしたもの
+
+    Attributes:
+        selector (str): 元のセレクター
+        groups (list): カンマ区切りごとの Compound のリスト(左が祖先)
+    """
+
+    def __init__(self, selector):
+        self.selector = selector
+        self.groups = []
+        for part in selector.split(','):
+            part = part.strip()
+            # 子・兄弟の結合子や疑似クラスは扱わない
+            if not part or re.search(r'[>+~:]', re.sub(r'\[[^\]]*\]', '', part)):
+                raise UnsupportedSelector(selector)
+            # 属性値の中の空白で分割しないように [...] を先に取り出す
+            compounds = re.findall(r'(?:[^\s\[]|\[[^\]]*\])+', part)
+            self.groups.append([Compound(text) for text in compounds])
+
+
+@lru_cache(maxsize=1024)
+def compile_selector(selector):
+    """
+    セレクターをコンパイルする(同じ文字列は使い回す)
+
+    Args:
+        selector (str): CSSセレクター
+
+    Returns:
+        CompiledSelector: コンパイル結果
+
+    Raises:
+        UnsupportedSelector: 索引で扱えない構文の場合
+    """
+    return CompiledSelector(selector)
+
+
+class SelectorIndex:
+    """
+    ページ1つ分の索引(タグ名・クラス名・id・属性名 → 要素のリスト)
+
+    索引の作成は木を1回たどるだけ。各リストは文書順に並ぶので、
+    select() の結果は soup.select と同じ順番になる。
+
+    Args:
+        soup: BeautifulSoupオブジェクト
+
+    Example:
+        >>> index = SelectorIndex(soup)
+        >>> len(index.select('h2.entry-title')) == len(soup.select('h2.entry-title'))
+        True
+    """
+
+    def __init__(self, soup):
+        self.soup = soup
+        self.elements = []
+        self.by_tag = {}
+        self.by_class = {}
+        self.by_id = {}
+        self.by_attr = {}
+        self._position = {}
+        self._cache = {}
+        for position, el in enumerate(soup.find_all(True)):
+            self.elements.append(el)
+            self._position[id(el)] = position
+            self.by_tag.setdefault(el.name, []).append(el)
+            for name, value in el.attrs.items():
+                self.by_attr.setdefault(name, []).append(el)
+                if name == 'class':
+                    for cls in (value.split() if isinstance(value, str) else value):
+                        bucket = self.by_class.setdefault(cls, [])
+                        # 同じクラスを2回書いた要素を重複させない
+                        if not bucket or bucket[-1] is not el:
+                            bucket.append(el)
+                elif name == 'id':
+                    self.by_id.setdefault(value, []).append(el)
+
+    def _candidates(self, compound):
+        """複合セレクターに一致しうる要素のうち、一番短い索引のリストを返す"""
+        lists = []
+        if compound.tag is not None:
+            lists.append(self.by_tag.get(compound.tag, []))
+        for cls in compound.classes:
+            lists.append(self.by_class.get(cls, []))
+        for elem_id in compound.ids:
+            lists.append(self.by_id.get(elem_id, []))
+        for name, _op, _value in compound.attrs:
+            lists.append(self.by_attr.get(name, []))
+        return min(lists, key=len) if lists else self.elements
+
+    @staticmethod
+    def _has_ancestors(el, compounds):
+        """右から順に、祖先が残りの複合セレクターに一致するか確かめる"""
+        node = el.parent
+        for compound in reversed(compounds):
+            while node is not None and not isinstance(node, BeautifulSoup):
+                if compound.matches(node):
+                    break
+                node = node.parent
+            else:
+                return False
+            node = node.parent
+        return True
+
+    def select(self, selector):
+        """
+        CSSセレクターに一致する要素を文書順で返す(soup.select と同じ結果)
+
+        索引で扱えない構文は soup.select で検索する。
+
+        Args:
+            selector (str): CSSセレクター
+
+        Returns:
+            list: 一致した要素
+        """
+        if selector in self._cache:
+            return self._cache[selector]
+        try:
+            compiled = compile_selector(selector)
+        except UnsupportedSelector:
+            result = self.soup.select(selector)
+        else:
+            result = []
+            seen = set()
+            for compounds in compiled.groups:
+                last = compounds[-1]
+                for el in self._candidates(last):
+                    if id(el) in seen or not last.matches(el):
+                        continue
+                    if len(compounds) > 1 and not self._has_ancestors(el, compounds[:-1]):
+                        continue
+                    seen.add(id(el))
+                    result.append(el)
+            if len(compiled.groups) > 1:
+                # カンマ区切りは文書順に並べ直す
+                result.sort(key=lambda el: self._position[id(el)])
+        self._cache[selector] = result
+        return result
+
+    def select_all(self, selectors):
+        """
+        複数のセレクターをまとめて評価する
+
+        Args:
+            selectors: CSSセレクターのリスト
+
+        Returns:
+            dict: セレクター → 一致した要素のリスト
+        """
+        return {selector: self.select(selector) for selector in selectors}
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+    import timeit
+    from html_parsers import parse_html
+    from toku import ARTICLE_PATTERNS, TITLE_PATTERNS, DATE_PATTERNS, CONTENT_PATTERNS, CATEGORY_PATTERNS
+
+    parser = argparse.ArgumentParser(description='索引による一括評価と soup.select の比較')
+    parser.add_argument('paths', nargs='*', default=['coorikuya_source.html'], help='HTMLファイル')
+    parser.add_argument('--scale', type=int, default=1, help='body の中身を何倍にして計測するか')
+    parser.add_argument('--repeat', type=int, default=20, help='計測の繰り返し回数')
+    args = parser.parse_args()
+
+    selectors = ARTICLE_PATTERNS + TITLE_PATTERNS + DATE_PATTERNS + CONTENT_PATTERNS + CATEGORY_PATTERNS
+    for path in args.paths:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        if args.scale > 1 and '<body' in source:
+            # 大きなページを作る: body の中身を繰り返す
+            head, body = source.split('<body', 1)
+            body = body.split('>', 1)[1].replace('</html>', '').replace('</body>', '')
+            source = f"{head}<body>{body * args.scale}</body></html>"
+        soup = parse_html(source)
+
+        # soup.select と件数・要素が同じか確認
+        index = SelectorIndex(soup)
+        for selector in selectors:
+            expected = soup.select(selector)
+            actual = index.select(selector)
+            assert [id(el) for el in expected] == [id(el) for el in actual], f"不一致: {selector}"
+
+        repeat = args.repeat
+        legacy = timeit.timeit(lambda: [soup.select(s) for s in selectors], number=repeat) / repeat
+        indexed = timeit.timeit(lambda: SelectorIndex(soup).select_all(selectors), number=repeat) / repeat
+        print(f"{path}: セレクター {len(selectors)}個, 要素 {len(index.elements)}個 (全て soup.select と一致)")
+        print(f"  soup.select を個別に実行: {legacy * 1000:.2f} ms/ページ")
+        print(f"  索引を作って一括評価    : {indexed * 1000:.2f} ms/ページ")
+        print(f"  速度比: {legacy / indexed:.1f}倍")
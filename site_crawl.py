@@ -0,0 +1,137 @@
+# === サイト内の幅優先クロール ===
+# 開始URLから内部リンクを深さ max_depth までたどり、各ページを analyze_page で分析する
+# - リンクは link_frontier.py で正規化・重複排除してから巡回キューに入れる
+# - 同じホストへのアクセスは --delay 秒あける
+# - --state を付けると1ページごとにキューを保存し、次回はその続きから再開する
+# 例: python site_crawl.py https://www.coorikuya.com/ --depth 2 --max-pages 50 --output pages.ndjson
+#     python site_crawl.py --state crawl_state.json   (中断したクロールの再開)
+
+# ファイル操作用
+import os
+# 経過時間の計測用
+import time
+# ログ出力用
+import logging
+
+from driver_pool import DriverPool
+from heavy_hitters import FrequencyTally
+from site_profile import SiteProfile
+from link_frontier import CrawlFrontier, normalize_url
+from report import open_sink
+from run_mode import get_run_mode, BATCH_RUN_MODE
+from sctest import analyze_page
+
+logger = logging.getLogger(__name__)
+
+# ページ内の全リンクのhrefを1回の往復で受け取るスクリプト
+HREFS_SCRIPT = "return Array.from(document.querySelectorAll('a[href]'), a => a.getAttribute('href'));"
+
+
+def crawl_site(frontier, pool=None, extraction='source', state_path=None, tally=None):
+    """
+    巡回キューが空になるまでページを分析し、結果を1件ずつ返す(ジェネレーター)
+
+    Args:
+        frontier (CrawlFrontier): 巡回キュー(開始URL・深さ・件数の上限・間隔を持つ)
+        pool (DriverPool): 使うプール(省略時はブラウザ1つのプールを作って最後に閉じる)
+        extraction: 'source' / 'browser' / 'stream'(analyze_page と同じ)
+        state_path (str): 1ページごとにキューを保存するファイル(省略時は保存しない)
+        tally (FrequencyTally): サイト全体のクラス名・ID・data属性を数える(省略時は数えない)
+
+    Yields:
+        dict: url, depth, ok, elapsed, links_added と result または error
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(size=1, driver_factory=get_run_mode(BATCH_RUN_MODE).driver_factory())
+    try:
+        while frontier:
+            url, depth = frontier.pop()
+            started = time.monotonic()
+            try:
+                with pool.lease() as driver:
+                    report = analyze_page(driver, url, sinks=(), extraction=extraction, tally=tally,
+                                          screenshot=False)
+                    # リダイレクト後のURLを基準にリンクを解決する
+                    current_url = driver.current_url
+                    hrefs = driver.execute_script(HREFS_SCRIPT)
+            except Exception as e:
+                logger.warning(f"失敗: {url} - {e}")
+                record = {'url': url, 'depth': depth, 'ok': False, 'error': str(e)}
+            else:
+                redirected = normalize_url(current_url, current_url)
+                if redirected:
+                    frontier.mark_seen(redirected)
+                added = frontier.add_links(hrefs, current_url, depth)
+                record = {
+                    'url': url,
+                    'depth': depth,
+                    'ok': True,
+                    'links_added': added,
+                    'result': report.to_dict(),
+                }
+            record['elapsed'] = round(time.monotonic() - started, 3)
+            if state_path:
+                frontier.save(state_path)
+            yield record
+    finally:
+        if own_pool:
+            pool.close()
+
+
+def main(argv=None):
+    """
+    コマンドラインから実行する
+
+    Args:
+        argv (list): 引数のリスト(省略時は sys.argv)
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='サイト内リンクを幅優先でたどって各ページを分析する')
+    parser.add_argument('start_url', nargs='?', help='開始URL(--state の続きから再開する場合は省略可)')
+    parser.add_argument('--depth', type=int, default=2, help='たどるリンクの深さの上限')
+    parser.add_argument('--max-pages', type=int, default=100, help='分析するページ数の上限')
+    parser.add_argument('--delay', type=float, default=1.0, help='同じホストへのアクセス間隔(秒)')
+    parser.add_argument('--state', help='巡回キューの保存先(あれば続きから再開する)')
+    parser.add_argument('--output', default='-',
+                        help='結果の出力先(- は標準出力のNDJSON。.ndjson / .json / .parquet も指定可)')
+    parser.add_argument('--extraction', choices=('source', 'browser', 'stream'), default='source',
+                        help='source=page_sourceを解析 / browser=ブラウザ内で一括集計(往復1回) / '
+                             'stream=木を作らずに少しずつ解析(巨大なページ向け)')
+    parser.add_argument('--site-profile', metavar='PATH',
+                        help='全ページをまとめたサイトのプロファイル(共通クラス名・テンプレート)を保存する')
+    args = parser.parse_args(argv)
+
+    if args.state and os.path.exists(args.state):
+        frontier = CrawlFrontier.load(args.state)
+    elif args.start_url:
+        frontier = CrawlFrontier(args.start_url, max_depth=args.depth, max_pages=args.max_pages,
+                                 delay=args.delay)
+    else:
+        parser.error('start_url または保存済みの --state を指定してください')
+
+    sink = open_sink(args.output)
+    tally = FrequencyTally()
+    profile = SiteProfile() if args.site_profile else None
+    started = time.monotonic()
+    ok = 0
+    try:
+        for record in crawl_site(frontier, extraction=args.extraction, state_path=args.state, tally=tally):
+            ok += record['ok']
+            sink.emit(record)
+            if profile is not None:
+                profile.add_report(record)
+    finally:
+        sink.close()
+        if profile is not None:
+            profile.write(args.site_profile)
+
+    elapsed = time.monotonic() - started
+    logger.info(f"クロール完了: {ok}ページ成功 {elapsed:.1f}秒 {frontier.stats()}")
+    logger.info(f"サイト全体の頻出クラス名: {tally.top(10)['classes']} {tally.stats()}")
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    main()
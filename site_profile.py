@@ -0,0 +1,347 @@
+# === サイト全体のプロファイル(複数ページの集計) ===
+# analyze_site_structure は1ページずつ独立しているので、
+# 「9割のページに出てくるクラス名・data属性は何か」「どんなテンプレートがあるか」が分からない。
+# ページごとのレポート(meta['profile'])を1件ずつ受け取り、サイト全体の集計にまとめる
+# - 出現ページ数: クラス名・タグ名・data属性ごとに「何ページに出てきたか」を数える
+#                 (heavy_hitters のカウンター。HEAVY_HITTERS_CAPACITY があればメモリ一定の近似)
+# - テンプレート: クラス名・タグ名・data属性の集合のSimHashが近いページを同じテンプレートとみなす
+# - merge() で並列ワーカー・シャードごとの集計をまとめられる。正確に数えるときは足し算だけなので
+#   どの順番でまとめても同じ結果になる。近似のときは多く出てくるものは順番によらず残るが、
+#   少ないものの数は順番で変わることがある(heavy_hitters.check_merge_order() で確かめられる)
+# 例: python batch_crawl.py urls.txt --output pages.ndjson --site-profile site_profile.json
+#     python site_profile.py shard1.ndjson shard2.ndjson --output site_profile.json
+#     python site_profile.py part1.json part2.json --output site_profile.json   (保存した集計同士をまとめる)
+
+# 上位N件を取り出すため
+import heapq
+# 集計の保存・読み込み用
+import json
+# クラス名の中の数字をそろえるため
+import re
+# 複数スレッドから足し込んでも壊れないようにするため
+import threading
+# ログ出力用
+import logging
+
+from change_detect import simhash_features, hamming
+from heavy_hitters import new_counter, counter_from_dict
+
+logger = logging.getLogger(__name__)
+
+# この割合以上のページに出てくるものを「共通」とみなす
+DEFAULT_COMMON_RATIO = 0.9
+# テンプレートのSimHashがこのビット数以下の違いなら同じテンプレートとみなす
+TEMPLATE_DISTANCE = 8
+# テンプレートごとに覚えておくURLの例の数
+TEMPLATE_SAMPLES = 3
+# 'wp-image-123' や 'postid-45' のようなページごとに違う番号
+_DIGITS = re.compile(r'\d+')
+
+
+def page_profile(stats):
+    """
+    1ページ分のDOM統計から、サイト全体の集計に使う情報を取り出す
+
+    Args:
+        stats (DomStats): ページのDOM統計
+
+    Returns:
+        dict: template(16進のSimHash), classes, tags, data_attributes(いずれも重複無しで名前順)
+    """
+    classes = sorted(cls for cls, _count in stats.class_counts.items())
+    tags = sorted(stats.tag_counts)
+    data_attributes = sorted(stats.data_attributes)
+    # 数ではなく「あるかどうか」で作るので、記事の件数が違うだけの一覧ページは同じ値に近くなる
+    # クラス名の番号は # にそろえる(記事IDなどで同じテンプレートが別の値にならないように)
+    features = {f'tag:{name}': 1 for name in tags}
+    features.update((f'class:{_DIGITS.sub("#", cls)}', 1) for cls in classes)
+    features.update((f'data:{attr}', 1) for attr in data_attributes)
+    return {
+        'template': format(simhash_features(features), '016x'),
+        'classes': classes,
+        'tags': tags,
+        'data_attributes': data_attributes,
+    }
+
+
+class SiteProfile:
+    """
+    ページごとのプロファイルを足し込んでサイト全体の集計を作る
+
+    Args:
+        capacity (int): 出現ページ数のカウンターの候補数(heavy_hitters.new_counter() と同じ)
+
+    Example:
+        >>> profile = SiteProfile()
+        >>> for record in records:            # batch_crawl の結果やレポート
+        ...     profile.add_report(record)
+        >>> profile.common('classes')         # 9割以上のページに出てくるクラス名
+        >>> profile.write('site_profile.json')
+    """
+
+    KINDS = ('classes', 'tags', 'data_attributes')
+
+    def __init__(self, capacity=None):
+        self.pages = 0
+        # プロファイルが無く集計に入れなかったレポート(失敗・差分クロールで省略など)
+        self.skipped = 0
+        self.document_counts = {kind: new_counter(capacity) for kind in self.KINDS}
+        # テンプレートのSimHash → {'pages': ページ数, 'samples': URLの例}
+        self.templates = {}
+        self._lock = threading.Lock()
+
+    def add_profile(self, url, profile):
+        """
+        1ページ分のプロファイルを足し込む
+
+        Args:
+            url (str): ページのURL
+            profile (dict): page_profile() の結果
+        """
+        with self._lock:
+            self.pages += 1
+            for kind in self.KINDS:
+                counter = self.document_counts[kind]
+                for name in profile[kind]:
+                    counter.add(name)
+            self._add_template(profile['template'], 1, [url])
+
+    def _add_template(self, key, pages, samples):
+        entry = self.templates.setdefault(key, {'pages': 0, 'samples': []})
+        entry['pages'] += pages
+        # 順番に関係なく同じ結果になるように、URLの小さいものから残す
+        entry['samples'] = sorted(set(entry['samples']) | set(samples))[:TEMPLATE_SAMPLES]
+
+    def add_report(self, report):
+        """
+        レポート(Report・辞書)または batch_crawl / site_crawl の結果1件を足し込む
+
+        Args:
+            report: Report / Report.to_dict() / {'ok', 'result', ...} の辞書
+
+        Returns:
+            bool: 集計に入れたらTrue(プロファイルが無ければFalse)
+        """
+        if hasattr(report, 'to_dict'):
+            report = report.to_dict()
+        if 'result' in report or 'ok' in report:
+            report = report.get('result') or {}
+        profile = report.get('meta', {}).get('profile')
+        if profile is None:
+            with self._lock:
+                self.skipped += 1
+            return False
+        self.add_profile(report.get('url'), profile)
+        return True
+
+    def merge(self, other):
+        """
+        別の SiteProfile(別ワーカー・別シャード)を足し込む
+
+        Args:
+            other (SiteProfile): 足し込む集計
+
+        Returns:
+            SiteProfile: self
+        """
+        with self._lock:
+            self.pages += other.pages
+            self.skipped += other.skipped
+            for kind in self.KINDS:
+                self.document_counts[kind].merge(other.document_counts[kind])
+            for key, entry in other.templates.items():
+                self._add_template(key, entry['pages'], entry['samples'])
+        return self
+
+    def common(self, kind, ratio=DEFAULT_COMMON_RATIO):
+        """
+        ratio 以上の割合のページに出てくるものを返す
+
+        近似モードのページ数は実際より多いことがあるので、誤差を引いた下限
+        (top_guaranteed と同じ)で判定し、確実に ratio 以上のものだけを返す。
+
+        Args:
+            kind (str): 'classes' / 'tags' / 'data_attributes'
+            ratio (float): ページの割合(0〜1)
+
+        Returns:
+            list: (名前, ページ数の下限, 割合) のリスト(多い順)
+        """
+        with self._lock:
+            if not self.pages:
+                return []
+            counter = self.document_counts[kind]
+            threshold = ratio * self.pages
+            lower = ((name, pages - counter.error(name)) for name, pages in counter.items())
+            items = sorted(((name, pages) for name, pages in lower if pages >= threshold),
+                           key=lambda x: (-x[1], x[0]))
+            return [(name, pages, round(pages / self.pages, 3)) for name, pages in items]
+
+    def template_clusters(self, distance=TEMPLATE_DISTANCE):
+        """
+        SimHashの近いテンプレートをまとめる
+
+        ページ数の多いものから順に、代表との距離が distance 以下ならそのグループに入れる。
+        集計の中身だけで決まるので、merge() の順番が違っても同じグループになる。
+
+        Args:
+            distance (int): 同じテンプレートとみなすハミング距離
+
+        Returns:
+            list: {'template', 'pages', 'share', 'variants', 'samples'} のリスト(ページ数の多い順)
+        """
+        with self._lock:
+            entries = sorted(self.templates.items(), key=lambda item: (-item[1]['pages'], item[0]))
+            pages = self.pages
+        clusters = []
+        for key, entry in entries:
+            value = int(key, 16)
+            for cluster in clusters:
+                if hamming(cluster['_value'], value) <= distance:
+                    break
+            else:
+                cluster = {'_value': value, 'template': key, 'pages': 0, 'variants': 0, 'samples': []}
+                clusters.append(cluster)
+            cluster['pages'] += entry['pages']
+            cluster['variants'] += 1
+            cluster['samples'] = sorted(set(cluster['samples']) | set(entry['samples']))[:TEMPLATE_SAMPLES]
+        for cluster in clusters:
+            del cluster['_value']
+            cluster['share'] = round(cluster['pages'] / pages, 3) if pages else 0.0
+        clusters.sort(key=lambda cluster: (-cluster['pages'], cluster['template']))
+        return clusters
+
+    def summary(self, ratio=DEFAULT_COMMON_RATIO, top=20):
+        """
+        サイト全体のプロファイルを返す
+
+        Args:
+            ratio (float): 「共通」とみなすページの割合
+            top (int): 種類ごとに出す上位の件数
+
+        Returns:
+            dict: pages, skipped, approximate, common, top, templates
+                  (approximate なら top のページ数は上限、common のページ数は下限)
+        """
+        with self._lock:
+            pages = self.pages
+            # 同数なら名前順にして、足し込んだ順番に関係なく同じ結果にする
+            tops = {kind: heapq.nsmallest(top, counter.items(), key=lambda x: (-x[1], x[0]))
+                    for kind, counter in self.document_counts.items()}
+        return {
+            'pages': pages,
+            'skipped': self.skipped,
+            'approximate': self.document_counts['classes'].approximate,
+            'common_ratio': ratio,
+            'common': {kind: self.common(kind, ratio) for kind in self.KINDS},
+            'top': {
+                kind: [(name, count, round(count / pages, 3) if pages else 0.0) for name, count in items]
+                for kind, items in tops.items()
+            },
+            'templates': self.template_clusters(),
+        }
+
+    def to_dict(self):
+        """あとで merge() できるように集計の中身を辞書にする"""
+        with self._lock:
+            return {
+                'pages': self.pages,
+                'skipped': self.skipped,
+                'document_counts': {kind: counter.to_dict() for kind, counter in self.document_counts.items()},
+                'templates': {key: dict(entry) for key, entry in self.templates.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        """to_dict() の結果から元に戻す"""
+        profile = cls()
+        profile.pages = data['pages']
+        profile.skipped = data['skipped']
+        profile.document_counts = {kind: counter_from_dict(data['document_counts'][kind]) for kind in cls.KINDS}
+        profile.templates = {key: dict(entry) for key, entry in data['templates'].items()}
+        return profile
+
+    def write(self, path, ratio=DEFAULT_COMMON_RATIO):
+        """
+        プロファイル(summary)と、あとでまとめ直すための中身(state)をJSONに保存する
+
+        Args:
+            path (str): 出力先
+            ratio (float): 「共通」とみなすページの割合
+        """
+        data = {'summary': self.summary(ratio), 'state': self.to_dict()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        logger.info(f"サイトプロファイルを保存しました: {path} ({self.pages}ページ)")
+
+    @classmethod
+    def load(cls, path):
+        """write() で保存したファイルから元に戻す"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f)['state'])
+
+
+def iter_records(path):
+    """
+    NDJSONのファイルからレコードを1件ずつ返す(全体を読み込まない)
+
+    Args:
+        path (str): batch_crawl / site_crawl の出力
+
+    Yields:
+        dict: レコード
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    """
+    コマンドラインから実行する
+
+    Args:
+        argv (list): 引数のリスト(省略時は sys.argv)
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='複数ページのレポートからサイト全体のプロファイルを作る')
+    parser.add_argument('inputs', nargs='+',
+                        help='batch_crawl / site_crawl の出力(.ndjson・.json)または保存済みのプロファイル')
+    parser.add_argument('--output', default='site_profile.json', help='プロファイルの保存先')
+    parser.add_argument('--ratio', type=float, default=DEFAULT_COMMON_RATIO,
+                        help='「共通」とみなすページの割合(0〜1)')
+    args = parser.parse_args(argv)
+
+    profile = SiteProfile()
+    for path in args.inputs:
+        if not path.endswith('.json'):
+            for record in iter_records(path):
+                profile.add_report(record)
+            continue
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and 'state' in data:
+            # 保存済みのプロファイルならそのまま足し込む(シャードの集計をまとめる)
+            profile.merge(SiteProfile.from_dict(data['state']))
+        else:
+            # JsonSink の出力(レポートの配列)
+            for record in data:
+                profile.add_report(record)
+    profile.write(args.output, args.ratio)
+
+    summary = profile.summary(args.ratio)
+    print(f"{summary['pages']}ページ(プロファイル無し {summary['skipped']}件)")
+    print(f"{args.ratio:.0%}以上のページにあるクラス名:")
+    for name, pages, share in summary['common']['classes'][:20]:
+        print(f"  {name:30s} {pages:5d}ページ ({share:.0%})")
+    print(f"テンプレート: {len(summary['templates'])}種類")
+    for cluster in summary['templates'][:10]:
+        print(f"  {cluster['template']} {cluster['pages']:5d}ページ ({cluster['share']:.0%}) 例: {cluster['samples'][0]}")
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,283 @@
+# === HTMLスナップショットの保存(圧縮・重複排除) ===
+# soup.prettify() で整形し直したHTMLを固定のファイル名で上書きする代わりに、
+# driver.page_source をそのまま少しずつ圧縮しながらディスクに書く
+# - ファイル名は内容のSHA-256(同じ内容のページは1つだけ保存)
+# - 圧縮は zstd(zstandardがあれば)、無ければ gzip
+# - いつ・どのURLを・どのファイルに保存したかは manifest.ndjson に1行ずつ追記
+# 例: python snapshot_store.py            (マニフェストの一覧と合計サイズを表示)
+
+# 内容のハッシュ計算用
+import hashlib
+# gzip圧縮用(標準ライブラリ)
+import gzip
+# マニフェストの書き出し用
+import json
+# ファイル操作用
+import os
+# 複数スレッドから使っても壊れないようにするため
+import threading
+# 保存日時の記録用
+import time
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+# デフォルトの保存先
+DEFAULT_SNAPSHOT_DIR = 'snapshots'
+# 一度にエンコード・圧縮する文字数(大きなページでもメモリを食わないように)
+CHUNK_CHARS = 1024 * 1024
+# 圧縮方式ごとのファイルの拡張子
+CODEC_SUFFIXES = {'zstd': '.html.zst', 'gzip': '.html.gz'}
+
+
+def _zstd_installed():
+    """zstandardが使えるかどうかを返す"""
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def default_codec():
+    """
+    使える圧縮方式のうち一番良いものを返す
+
+    Returns:
+        str: 'zstd' / 'gzip'
+    """
+    return 'zstd' if _zstd_installed() else 'gzip'
+
+
+def _iter_chunks(source):
+    """HTMLソースをUTF-8のバイト列に少しずつ変換して返す"""
+    for start in range(0, len(source), CHUNK_CHARS):
+        yield source[start:start + CHUNK_CHARS].encode('utf-8')
+
+
+def _open_compressed(path, codec, mode):
+    """圧縮ファイルをバイナリのファイルオブジェクトとして開く"""
+    if codec == 'zstd':
+        import zstandard
+        raw = open(path, mode)
+        if 'r' in mode:
+            return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+    if codec == 'gzip':
+        return gzip.open(path, mode, compresslevel=6)
+    raise ValueError(f"codec は 'zstd' か 'gzip' を指定してください: {codec}")
+
+
+def codec_for_path(path):
+    """
+    ファイル名から圧縮方式を判定する
+
+    Args:
+        path (str): スナップショットのパス
+
+    Returns:
+        str: 'zstd' / 'gzip'(圧縮されていなければNone)
+    """
+    for codec, suffix in CODEC_SUFFIXES.items():
+        if str(path).endswith(suffix):
+            return codec
+    return None
+
+
+def open_snapshot(path):
+    """
+    スナップショット(圧縮・非圧縮どちらでも)をバイナリで開く(少しずつ読むとき用)
+
+    Args:
+        path (str): スナップショットのパス
+
+    Returns:
+        ファイルオブジェクト: 展開済みのUTF-8のバイト列を読める
+    """
+    codec = codec_for_path(path)
+    if codec is None:
+        return open(path, 'rb')
+    return _open_compressed(path, codec, 'rb')
+
+
+def read_snapshot_file(path):
+    """
+    スナップショット(圧縮・非圧縮どちらでも)を読み込む
+
+    Args:
+        path (str): スナップショットのパス
+
+    Returns:
+        str: HTMLソース
+    """
+    if codec_for_path(path) is None:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    with open_snapshot(path) as f:
+        return f.read().decode('utf-8')
+
+
+class SnapshotStore:
+    """
+    内容のハッシュをファイル名にしたHTMLスナップショットの保存先
+
+    Args:
+        directory (str): 保存先ディレクトリ
+        codec (str): 'zstd' / 'gzip'(省略時は使える中で一番良いもの)
+
+    Example:
+        >>> store = SnapshotStore()
+        >>> saved = store.write(url, driver.page_source)
+        >>> saved['path']
+        'snapshots/3f2a....html.gz'
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR, codec=None):
+        self.directory = directory
+        self.codec = codec or default_codec()
+        if self.codec not in CODEC_SUFFIXES:
+            raise ValueError(f"codec は 'zstd' か 'gzip' を指定してください: {self.codec}")
+        self.manifest_path = os.path.join(directory, 'manifest.ndjson')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, digest):
+        """ハッシュからスナップショットのパスを返す"""
+        return os.path.join(self.directory, digest + CODEC_SUFFIXES[self.codec])
+
+    @staticmethod
+    def digest(source):
+        """
+        HTMLソースのハッシュと元のサイズを計算する(圧縮はしない)
+
+        Args:
+            source (str): HTMLソース
+
+        Returns:
+            tuple: (SHA-256の16進文字列, UTF-8でのバイト数)
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        for chunk in _iter_chunks(source):
+            hasher.update(chunk)
+            size += len(chunk)
+        return hasher.hexdigest(), size
+
+    def write(self, url, source, hashed=None):
+        """
+        HTMLソースを圧縮して保存し、マニフェストに記録する
+
+        先にハッシュだけを計算し、同じ内容が保存済みなら圧縮も書き込みもしない。
+
+        Args:
+            url (str): ページのURL
+            source (str): HTMLソース(driver.page_source そのまま)
+            hashed (tuple): digest() の結果(計算済みなら渡すと計算し直さない)
+
+        Returns:
+            dict: マニフェストに書いた1行(path, digest, bytes, stored_bytes, deduplicated など)
+        """
+        # 1回目: ハッシュと元のサイズだけを計算(圧縮はしない)
+        digest, size = hashed or self.digest(source)
+        path = self.path_for(digest)
+
+        deduplicated = os.path.exists(path)
+        if not deduplicated:
+            # 2回目: 少しずつ圧縮しながら一時ファイルに書き、最後に名前を付け替える
+            # 解析段のプロセス(parse_pipeline.py)から同時に書いても重ならないようにプロセスIDも付ける
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with _open_compressed(tmp, self.codec, 'wb') as f:
+                for chunk in _iter_chunks(source):
+                    f.write(chunk)
+            os.replace(tmp, path)
+
+        record = {
+            'url': url,
+            'digest': digest,
+            'path': path,
+            'codec': self.codec,
+            'bytes': size,
+            'stored_bytes': os.path.getsize(path),
+            'deduplicated': deduplicated,
+            'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self._lock:
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        logger.info(f"スナップショットを保存しました: {path} "
+                    f"({size:,} → {record['stored_bytes']:,}バイト{' 重複のため書き込み無し' if deduplicated else ''})")
+        return record
+
+    def manifest(self):
+        """
+        マニフェストを読み込む
+
+        Returns:
+            list: 保存した記録(dict)のリスト(古い順)
+        """
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def latest(self, url):
+        """
+        URLの最新のスナップショットの記録を返す
+
+        Args:
+            url (str): ページのURL
+
+        Returns:
+            dict: マニフェストの1行(無ければNone)
+        """
+        for record in reversed(self.manifest()):
+            if record['url'] == url:
+                return record
+        return None
+
+
+# プログラム全体で共有する保存先(get_default_store()で取得)
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """
+    共有のスナップショット保存先を返す(初回呼び出し時に作成)
+
+    環境変数 SNAPSHOT_DIR で保存先、SNAPSHOT_CODEC で圧縮方式を変えられる。
+
+    Returns:
+        SnapshotStore: 共有の保存先
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SnapshotStore(
+                directory=os.environ.get('SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR),
+                codec=os.environ.get('SNAPSHOT_CODEC') or None,
+            )
+    return _default_store
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='保存済みスナップショットの一覧を表示する')
+    parser.add_argument('--dir', default=DEFAULT_SNAPSHOT_DIR, help='スナップショットのディレクトリ')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.dir)
+    records = store.manifest()
+    for record in records:
+        mark = ' (重複)' if record['deduplicated'] else ''
+        print(f"{record['saved_at']} {record['digest'][:12]} "
+              f"{record['bytes']:,} → {record['stored_bytes']:,}バイト{mark} {record['url']}")
+    # 実際にディスクにある量と、毎回そのまま保存した場合の量を比べる
+    stored = {record['digest']: record['stored_bytes'] for record in records}
+    raw = sum(record['bytes'] for record in records)
+    print(f"保存{len(records)}回 / ファイル{len(stored)}個: "
+          f"{sum(stored.values()):,}バイト(そのまま保存なら{raw:,}バイト)")
@@ -0,0 +1,437 @@
+# === 巨大なページのストリーミング解析(木を作らない) ===
+# 【1】〜【13】の集計は page_source の文字列全体・BeautifulSoupの木(元のHTMLの何倍ものメモリ)・
+# 全リンクのhref一覧を同時に持つので、無限スクロールや商品一覧の数十MBのページではメモリが足りなくなる
+# ここではHTMLを少しずつトークンに分け、開始タグ・テキスト・終了タグのイベントが来るたびに
+# DomStatsCollector の数を更新する(木は作らない)
+# - トークナイザー: lxml の target パーサー(libxml2が閉じタグの補完もする)、
+#                   無ければ標準ライブラリの html.parser(開いている要素のスタックで補完する)
+# - hrefは覚えずにその場で内部/外部を分類し、クラス名・id・data属性は上限付きのカウンターで数える
+# - memory_limit を指定すると tracemalloc で解析中のメモリを測り、超えたら MemoryLimitExceeded で止める
+# 例: python stream_stats.py --megabytes 50             (巨大なフィクスチャで木を作る解析とメモリを比較)
+#     python stream_stats.py                            (2MBのフィクスチャですぐに比較)
+#     python stream_stats.py snapshots/xxx.html.gz --limit-mb 64
+
+# 標準ライブラリのトークナイザー(lxmlが無いとき用)
+from html.parser import HTMLParser
+# バイト列を少しずつ文字列にするため
+import codecs
+# 環境変数でカウンターの候補数を変えられるようにするため
+import os
+# 解析中のメモリを測るため
+import tracemalloc
+# ログ出力用
+import logging
+
+from dom_stats import DomStatsCollector
+from snapshot_store import open_snapshot
+
+logger = logging.getLogger(__name__)
+
+# 1回に渡す文字数
+DEFAULT_CHUNK_CHARS = 64 * 1024
+# クラス名・id・data属性のカウンターの候補数(環境変数 HEAVY_HITTERS_CAPACITY が無いとき)
+DEFAULT_STREAM_CAPACITY = 1000
+# トークナイザー(速い順)
+TOKENIZERS = ('lxml', 'html.parser')
+# 終了タグの無い要素
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+))
+# 開始タグ → (その前に閉じる要素, そこより外は探さない要素)
+# 開いている要素を内側から探し、閉じる要素が見つかればそこまで閉じる(<li>の中の閉じていない<p>ごと閉じる)
+IMPLIED_END = {
+    'li': (frozenset(('li',)), frozenset(('ul', 'ol', 'menu'))),
+    'dt': (frozenset(('dt', 'dd')), frozenset(('dl',))),
+    'dd': (frozenset(('dt', 'dd')), frozenset(('dl',))),
+    'option': (frozenset(('option',)), frozenset(('select', 'datalist', 'optgroup'))),
+    'tr': (frozenset(('tr',)), frozenset(('table', 'thead', 'tbody', 'tfoot'))),
+    'td': (frozenset(('td', 'th')), frozenset(('tr', 'table'))),
+    'th': (frozenset(('td', 'th')), frozenset(('tr', 'table'))),
+}
+# 開いている<p>を閉じる開始タグ
+P_CLOSERS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'div', 'dl', 'fieldset', 'footer', 'form',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'ul',
+))
+# <p>を探すときにそこより外は探さない要素
+P_BOUNDARIES = P_CLOSERS | frozenset(('body', 'html', 'button', 'td', 'th', 'caption', 'dd', 'dt'))
+_P_RULE = (frozenset(('p',)), P_BOUNDARIES - {'p'})
+
+
+class MemoryLimitExceeded(RuntimeError):
+    """解析中のメモリが memory_limit を超えたときのエラー"""
+
+
+def default_tokenizer():
+    """
+    使えるトークナイザーのうち一番速いものを返す
+
+    Returns:
+        str: 'lxml' / 'html.parser'
+    """
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        return 'html.parser'
+    return 'lxml'
+
+
+class _LxmlTarget:
+    """lxml のパーサーのイベントを collector に渡す(木は作らない)"""
+
+    def __init__(self, collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag, dict(attrib))
+
+    def end(self, tag):
+        self.collector.end()
+
+    def data(self, data):
+        self.collector.text(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+
+class _StackTokenizer(HTMLParser):
+    """
+    標準ライブラリの HTMLParser のイベントを collector に渡す
+
+    HTMLParser は閉じタグを補完しないので、開いている要素のスタックを持って
+    終了タグの無い要素・省略された閉じタグ(<li>・<p>など)を補う。
+    """
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        self.open_elements = []
+
+    def _pop(self):
+        self.open_elements.pop()
+        self.collector.end()
+
+    def _close_implied(self, rule):
+        """開始タグで暗黙に閉じられる要素を閉じる"""
+        targets, boundaries = rule
+        open_elements = self.open_elements
+        for i in range(len(open_elements) - 1, -1, -1):
+            name = open_elements[i]
+            if name in targets:
+                while len(open_elements) > i:
+                    self._pop()
+                return
+            if name in boundaries:
+                return
+
+    def handle_starttag(self, tag, attrs):
+        if self.open_elements:
+            if tag in P_CLOSERS:
+                self._close_implied(_P_RULE)
+            rule = IMPLIED_END.get(tag)
+            if rule is not None:
+                self._close_implied(rule)
+        # 同じ属性が2回あれば最初のものを使う・値の無い属性は空文字にする(BeautifulSoupと同じ)
+        self.collector.start(tag, {name: value or '' for name, value in reversed(attrs)})
+        if tag in VOID_ELEMENTS:
+            self.collector.end()
+        else:
+            self.open_elements.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._pop()
+
+    def handle_endtag(self, tag):
+        # 開いていない要素の終了タグは無視する
+        if tag in self.open_elements:
+            while self.open_elements[-1] != tag:
+                self._pop()
+            self._pop()
+
+    def handle_data(self, data):
+        self.collector.text(data)
+
+    def finish(self):
+        self.close()
+        while self.open_elements:
+            self._pop()
+
+
+class StreamAnalyzer:
+    """
+    HTMLを少しずつ受け取り、木を作らずにDOM統計を集める
+
+    Args:
+        base_url (str): ページのURL(リンクをその場で内部/外部に分類する基準。省略時は file:// 扱い)
+        tokenizer (str): 'lxml' / 'html.parser'(省略時は default_tokenizer())
+        capacity (int): クラス名・id・data属性のカウンターの候補数
+                        (省略時は環境変数 HEAVY_HITTERS_CAPACITY、無ければ DEFAULT_STREAM_CAPACITY)
+        memory_limit (int): 解析中に増やしてよいメモリのバイト数(超えたら MemoryLimitExceeded)
+        measure (bool): Trueなら memory_limit が無くても peak_memory を測る
+
+    Attributes:
+        chars (int): 受け取った文字数
+        peak_memory (int): 解析中に増えたメモリの最大バイト数(測っていなければNone)
+
+    Example:
+        >>> analyzer = StreamAnalyzer(base_url=url, memory_limit=64 * 2**20)
+        >>> for chunk in iter_file_chunks('huge.html'):
+        ...     analyzer.feed(chunk)
+        >>> stats = analyzer.close()
+    """
+
+    def __init__(self, base_url=None, tokenizer=None, capacity=None, memory_limit=None, measure=False):
+        if capacity is None:
+            capacity = int(os.environ.get('HEAVY_HITTERS_CAPACITY') or DEFAULT_STREAM_CAPACITY)
+        self.collector = DomStatsCollector(base_url=base_url or '', capacity=capacity)
+        self.tokenizer = tokenizer or default_tokenizer()
+        if self.tokenizer == 'lxml':
+            from lxml import etree
+            # huge_tree: 数MBを超えるテキスト・深い入れ子でもlibxml2の安全上の制限で止めない
+            self._parser = etree.HTMLParser(target=_LxmlTarget(self.collector), huge_tree=True)
+        elif self.tokenizer == 'html.parser':
+            self._parser = _StackTokenizer(self.collector)
+        else:
+            raise ValueError(f"tokenizer は {', '.join(TOKENIZERS)} のどれかを指定してください: {self.tokenizer}")
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.memory_limit = memory_limit
+        self.chars = 0
+        self.peak_memory = None
+        # 自分で tracemalloc を始めたときだけ最後に止める
+        self._started_tracing = False
+        if memory_limit or measure:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+            self.peak_memory = 0
+
+    def feed(self, chunk):
+        """
+        HTMLの続きを渡す
+
+        Args:
+            chunk: 文字列またはUTF-8のバイト列
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self.chars += len(chunk)
+        self._parser.feed(chunk)
+        self._check_memory()
+
+    def _check_memory(self):
+        """解析中に増えたメモリの最大値を更新し、上限を超えていたら止める"""
+        if self.peak_memory is None:
+            return
+        self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1] - self._baseline)
+        if self.memory_limit and self.peak_memory > self.memory_limit:
+            self._stop_tracing()
+            raise MemoryLimitExceeded(
+                f"解析中のメモリが上限を超えました: {self.peak_memory:,} > {self.memory_limit:,}バイト "
+                f"({self.chars:,}文字まで解析)")
+
+    def _stop_tracing(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def close(self):
+        """
+        解析を終えて結果を返す
+
+        Returns:
+            DomStats: 集計結果(stats.links に分類済みのリンク数。hrefs は空)
+        """
+        try:
+            rest = self._decoder.decode(b'', final=True)
+            if rest:
+                self._parser.feed(rest)
+            if self.tokenizer == 'lxml':
+                self._parser.close()
+            else:
+                self._parser.finish()
+            stats = self.collector.close()
+            self._check_memory()
+            return stats
+        finally:
+            self._stop_tracing()
+
+
+def iter_text_chunks(source, size=DEFAULT_CHUNK_CHARS):
+    """
+    メモリにある文字列を少しずつ返す(driver.page_source を木にせずに解析するとき用)
+
+    Args:
+        source (str): HTMLソース
+        size (int): 1回の文字数
+
+    Yields:
+        str: 一部分
+    """
+    for start in range(0, len(source), size):
+        yield source[start:start + size]
+
+
+def iter_file_chunks(path, size=DEFAULT_CHUNK_CHARS):
+    """
+    HTMLファイル・スナップショット(.html.gz / .html.zst)を少しずつ読む
+
+    Args:
+        path (str): ファイルのパス
+        size (int): 1回のバイト数
+
+    Yields:
+        bytes: 展開済みのUTF-8のバイト列
+    """
+    with open_snapshot(path) as f:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def stream_stats(chunks, base_url=None, **options):
+    """
+    HTMLの断片の並びから木を作らずにDOM統計を集める
+
+    Args:
+        chunks: 文字列またはUTF-8のバイト列の並び
+        base_url (str): ページのURL
+        **options: StreamAnalyzer の tokenizer / capacity / memory_limit / measure
+
+    Returns:
+        DomStats: 集計結果
+    """
+    analyzer = StreamAnalyzer(base_url=base_url, **options)
+    for chunk in chunks:
+        analyzer.feed(chunk)
+    return analyzer.close()
+
+
+def analyze_file(path, url=None, base_url=None, memory_limit=None, tokenizer=None):
+    """
+    保存済みの巨大なHTMLを木を作らずに【1】〜【13】のレポートにする
+
+    Args:
+        path (str): HTMLファイル・スナップショットのパス
+        url (str): ページのURL(省略時は file://パス)
+        base_url (str): リンクの内部/外部を判定する基準(省略時は url)
+        memory_limit (int): 解析中に増やしてよいメモリのバイト数
+        tokenizer (str): 'lxml' / 'html.parser'
+
+    Returns:
+        Report: 【1】〜【13】(meta['stream'] に文字数・トークナイザー・メモリの最大値)
+    """
+    from sctest import build_structure_report
+
+    url = url or f'file://{os.path.abspath(path)}'
+    analyzer = StreamAnalyzer(base_url=base_url or url, tokenizer=tokenizer, memory_limit=memory_limit,
+                              measure=True)
+    for chunk in iter_file_chunks(path):
+        analyzer.feed(chunk)
+    stats = analyzer.close()
+    report = build_structure_report(stats, url, base_url=base_url or url)
+    report.meta['extraction'] = 'stream'
+    report.meta['stream'] = {
+        'chars': analyzer.chars,
+        'tokenizer': analyzer.tokenizer,
+        'peak_memory': analyzer.peak_memory,
+    }
+    return report
+
+
+def compare_memory(path, tokenizer=None, memory_limit=None):
+    """
+    同じファイルを「文字列全体 + 木」と「ストリーミング」で解析し、メモリの最大値・時間・数の一致を比べる
+
+    Args:
+        path (str): HTMLファイル
+        tokenizer (str): ストリーミングのトークナイザー
+        memory_limit (int): ストリーミングのメモリの上限
+
+    Returns:
+        dict: 'tree' / 'stream' → {'peak_memory', 'seconds'} と mismatches(一致しなかった項目)
+    """
+    import time
+    from html_parsers import collect_stats, section_counts, STATS_BACKEND
+
+    results = {}
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        tree_stats = collect_stats(source)
+        del source
+        results['tree'] = {
+            'backend': STATS_BACKEND,
+            'peak_memory': tracemalloc.get_traced_memory()[1],
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+    finally:
+        tracemalloc.stop()
+
+    started = time.perf_counter()
+    analyzer = StreamAnalyzer(base_url='http://localhost/', tokenizer=tokenizer, memory_limit=memory_limit,
+                              measure=True)
+    for chunk in iter_file_chunks(path):
+        analyzer.feed(chunk)
+    stream = analyzer.close()
+    results['stream'] = {
+        'backend': analyzer.tokenizer,
+        'peak_memory': analyzer.peak_memory,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+    # 近似カウンターの上位は同数の並びが変わりうるので、クラス名の上位は比べない
+    expected, actual = section_counts(tree_stats, 'http://localhost/'), section_counts(stream)
+    results['mismatches'] = {
+        key: {'tree': expected[key], 'stream': actual[key]}
+        for key in expected if key != 'top_classes' and expected[key] != actual[key]
+    }
+    return results
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+    import shutil
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='巨大なHTMLを木を作らずに解析し、メモリを比べる')
+    parser.add_argument('path', nargs='?', help='HTMLファイル(省略時は一時ディレクトリにフィクスチャを作って最後に消す)')
+    parser.add_argument('--megabytes', type=float, default=2, help='フィクスチャの大きさ(MB)')
+    parser.add_argument('--limit-mb', type=float, default=None, help='ストリーミング解析のメモリの上限(MB)')
+    parser.add_argument('--tokenizer', choices=TOKENIZERS, default=None)
+    args = parser.parse_args()
+
+    path = args.path
+    fixture_dir = None
+    if path is None:
+        from fixture_server import write_large_page
+        fixture_dir = tempfile.mkdtemp(prefix='stream_stats_')
+        path = os.path.join(fixture_dir, 'large_fixture.html')
+        cards = write_large_page(path, megabytes=args.megabytes)
+        print(f"{path}: 商品カード {cards:,}件 {os.path.getsize(path) / 2**20:.1f}MB")
+    limit = int(args.limit_mb * 2**20) if args.limit_mb else None
+    try:
+        results = compare_memory(path, tokenizer=args.tokenizer, memory_limit=limit)
+    finally:
+        if fixture_dir is not None:
+            shutil.rmtree(fixture_dir, ignore_errors=True)
+    for name in ('tree', 'stream'):
+        result = results[name]
+        print(f"{name:>6} ({result['backend']}): 最大 {result['peak_memory'] / 2**20:.1f}MB  {result['seconds']}秒")
+    print(f"ストリーミングのメモリは {results['tree']['peak_memory'] / max(results['stream']['peak_memory'], 1):.0f}分の1")
+    print(f"【1】〜【13】の数の不一致: {results['mismatches'] or 'なし'}")
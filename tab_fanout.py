@@ -0,0 +1,467 @@
+# === 1つのブラウザの複数タブで並列に読み込む(タブ多重化) ===
+# sctest.py / toku.py(と batch_crawl.py の workers)はURLごと・ワーカーごとに webdriver.Chrome を
+# 起動するので、同時に読み込むページ数だけブラウザ本体(1つ数百MB)のメモリが要る
+# ここでは1つのブラウザに driver.switch_to.new_window('tab') でN個のタブを開き、
+# - 各タブで読み込みを始めるだけ(location.href を変えて待たない)にして、N個のページを同時に読み込ませる
+# - 1つのドライバーで順番にタブを見て回り、読み込みが終わったタブから分析してすぐ次のURLを読み込ませる
+# compare_fanout() で「URLごとにブラウザ」と「1つのブラウザのタブ」の1ページあたりのメモリとページ/秒を比べる
+# 例: python tab_fanout.py --tabs 4 --pages 20              (フィクスチャサイトで比較)
+#     python tab_fanout.py https://a.example/ https://b.example/ --tabs 2
+
+# 読み込み待ちのURLのキュー
+from collections import deque
+# URLごとにブラウザを起動する比較用
+from concurrent.futures import ThreadPoolExecutor
+# 引数付きの関数を作るため
+from functools import partial
+# /proc からメモリ使用量を読むため
+import os
+# メモリ使用量を裏で測るため
+import threading
+# 経過時間の計測用
+import time
+# ログ出力用
+import logging
+
+from selenium.common.exceptions import WebDriverException
+
+from driver_pool import create_driver, create_chrome_options
+from page_ready import wait_for_page, DomQuiet
+from html_parsers import collect_stats
+from dom_extract import count_selectors
+from report import Report
+from artifacts import get_default_writer
+from sctest import build_structure_report, SELENIUM_SELECTORS
+
+logger = logging.getLogger(__name__)
+
+# 裏のタブの読み込み・タイマーを遅らせないための起動オプション
+BACKGROUND_TAB_FLAGS = (
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+)
+# 読み込みを始める(前の文書に目印を付けてから移動する。待たずにすぐ返る)
+NAVIGATE_SCRIPT = "window.__tabFanoutStale = true; window.location.href = arguments[0];"
+# 新しい文書に切り替わり、読み込みが終わったか(目印が無い = 新しい文書)
+LOADED_SCRIPT = "return window.__tabFanoutStale === undefined && document.readyState === 'complete';"
+# 読み込み完了後に待つ戦略(DOMの変化が落ち着くまで。readyState は LOADED_SCRIPT で確認済み)
+TAB_STRATEGIES = (DomQuiet(),)
+
+
+def create_tab_options(headless=True, profile=None):
+    """
+    タブ多重化用のChromeオプションを作成する
+
+    create_chrome_options() に、裏のタブを遅らせないオプションと
+    pageLoadStrategy='none'(タブの切り替え・スクリプト実行で読み込み完了を待たない)を足す。
+
+    Args:
+        headless (bool): Trueなら画面を出さずに起動する
+        profile: 取得プロファイル名 / FetchProfile
+
+    Returns:
+        Options: 設定済みのChromeオプション
+    """
+    options = create_chrome_options(headless=headless, profile=profile)
+    for flag in BACKGROUND_TAB_FLAGS:
+        options.add_argument(flag)
+    options.page_load_strategy = 'none'
+    return options
+
+
+def create_tab_driver(headless=True, profile=None):
+    """
+    タブ多重化用のChromeドライバーを起動する
+
+    Returns:
+        webdriver.Chrome: 起動したドライバー
+    """
+    return create_driver(options_factory=partial(create_tab_options, headless=headless, profile=profile),
+                         profile=profile)
+
+
+def analyze_loaded(driver, url, readiness):
+    """
+    読み込み済みのタブで【1】〜【15】を分析する(driver.get はしない。スクリーンショットは撮らない)
+
+    Args:
+        driver: 分析するタブに切り替え済みのChromeドライバー
+        url (str): 分析するURL
+        readiness (ReadinessReport): 待機結果
+
+    Returns:
+        Report: 分析結果
+    """
+    title = driver.title
+    current_url = driver.current_url
+    page_source = driver.page_source
+    report = build_structure_report(collect_stats(page_source), url, base_url=current_url)
+    profile = getattr(driver, 'fetch_profile', None)
+    report.meta.update({
+        'title': title,
+        'current_url': current_url,
+        'readiness': readiness.to_dict(),
+        'fetch_profile': profile.name if profile else None,
+        'extraction': 'source',
+    })
+    path, size, _ = get_default_writer().save_snapshot(url, page_source)
+    report.add_section('14', 'HTMLソース保存', {'path': path, 'bytes': size})
+    try:
+        counts = count_selectors(driver, SELENIUM_SELECTORS.values())
+        selenium_data = {key: counts[selector] for key, selector in SELENIUM_SELECTORS.items()}
+    except Exception as e:
+        selenium_data = {'error': str(e)}
+    report.add_section('15', 'Selenium要素確認', selenium_data)
+    return report
+
+
+class TabFanout:
+    """
+    1つのブラウザでN個のタブを開き、URLを同時に読み込ませて終わったタブから分析する
+
+    ドライバーは1つなので、操作(切り替え・スクリプト実行・分析)は順番に行うが、
+    ページの読み込み自体はブラウザの中で全タブ同時に進む。
+    create_tab_driver() で起動したドライバー(pageLoadStrategy='none')を使うこと。
+
+    Args:
+        driver: Chromeドライバー
+        tabs (int): 同時に開くタブの数
+
+    Example:
+        >>> driver = create_tab_driver()
+        >>> for record in TabFanout(driver, tabs=4).run(urls):
+        ...     print(record['url'], record['ok'])
+    """
+
+    def __init__(self, driver, tabs=4):
+        if tabs < 1:
+            raise ValueError("tabsは1以上を指定してください")
+        self.driver = driver
+        self.handles = [driver.current_window_handle]
+        # CDPのURLブロックはタブごとの設定なので、新しいタブにも同じ取得プロファイルを設定する
+        profile = getattr(driver, 'fetch_profile', None)
+        for _ in range(tabs - 1):
+            driver.switch_to.new_window('tab')
+            if profile is not None:
+                profile.apply(driver)
+            self.handles.append(driver.current_window_handle)
+
+    def _start(self, handle, url):
+        """タブで読み込みを始める(待たない)"""
+        self.driver.switch_to.window(handle)
+        self.driver.execute_script(NAVIGATE_SCRIPT, url)
+
+    def _loaded(self, handle):
+        """タブの読み込みが終わったか"""
+        self.driver.switch_to.window(handle)
+        return self.driver.execute_script(LOADED_SCRIPT)
+
+    def run(self, urls, analyze=analyze_loaded, timeout=30, poll=0.05, strategies=TAB_STRATEGIES):
+        """
+        URLを全タブで読み込み、終わった順に分析結果を1件ずつ返す(ジェネレーター)
+
+        読み込みが timeout 秒を超えたタブは、その時点の内容で分析する(wait_for_page と同じく失敗にはしない)。
+        分析中に例外が出たページは ok=False の結果にして、残りのURLは続ける。
+
+        Args:
+            urls: 分析するURLのリスト
+            analyze: (driver, url, readiness) を受け取ってReportを返す関数
+            timeout (float): 1ページの読み込みを待つ最大秒数
+            poll (float): どのタブも終わっていないときに待つ秒数
+            strategies: 読み込み完了後に wait_for_page で待つ戦略
+
+        Yields:
+            dict: url, ok, tab, elapsed と result または error
+        """
+        pending = deque(urls)
+        # タブ → (URL, 読み込み開始時刻)
+        active = {}
+
+        def start_next(handle):
+            """空いたタブで次のURLの読み込みを始める(始められなかったURLの結果を返す)"""
+            failed = []
+            while pending:
+                url = pending.popleft()
+                try:
+                    self._start(handle, url)
+                except WebDriverException as e:
+                    failed.append({'url': url, 'ok': False, 'tab': self.handles.index(handle), 'elapsed': 0.0,
+                                   'error': str(e)})
+                    continue
+                active[handle] = (url, time.monotonic())
+                break
+            return failed
+
+        for handle in self.handles:
+            yield from start_next(handle)
+
+        while active:
+            progressed = False
+            for handle, (url, started) in list(active.items()):
+                try:
+                    loaded = self._loaded(handle)
+                except WebDriverException:
+                    # 読み込みの途中でスクリプトが実行できないことがあるので、まだ終わっていないとみなす
+                    loaded = False
+                waited = time.monotonic() - started
+                if not loaded and waited < timeout:
+                    continue
+                progressed = True
+                del active[handle]
+                record = {'url': url, 'tab': self.handles.index(handle)}
+                try:
+                    readiness = wait_for_page(self.driver, url, strategies=strategies,
+                                              timeout=max(timeout - waited, 1))
+                    readiness.timings['tab_load'] = waited
+                    readiness.total += waited
+                    if not loaded:
+                        readiness.timed_out.append('tab_load')
+                    report = analyze(self.driver, url, readiness)
+                    record.update(ok=True, result=report.to_dict() if isinstance(report, Report) else report)
+                except Exception as e:
+                    # 分析・保存の失敗(WebDriver以外の例外も)はそのページだけの失敗にして、残りのタブを続ける
+                    logger.warning(f"失敗: {url} - {e}")
+                    record.update(ok=False, error=str(e))
+                record['elapsed'] = round(time.monotonic() - started, 3)
+                yield record
+                # 空いたタブですぐ次のURLを読み込ませる
+                yield from start_next(handle)
+            if not progressed:
+                time.sleep(poll)
+
+
+def _parent_map():
+    """/proc から 親プロセスID → 子プロセスIDのリスト を作る"""
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', encoding='utf-8', errors='replace') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 2番目の項目(コマンド名)は空白や括弧を含むことがあるので、最後の ')' の後から読む
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _process_memory(pid):
+    """1プロセスのメモリ(PSS。読めなければRSS)のバイト数"""
+    for path, key in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith(key):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return 0
+
+
+def tree_memory(pids):
+    """
+    プロセスとその子孫全体のメモリ使用量を返す
+
+    Linuxでは /proc の PSS(共有部分をプロセス数で割った量)を足すので、Chromeの複数プロセスを
+    足しても共有ライブラリを重複して数えない。/proc が無ければ psutil のRSSの合計(重複あり)。
+
+    Args:
+        pids: ChromeDriverなど、根になるプロセスIDの並び
+
+    Returns:
+        int: バイト数(測れなければNone)
+    """
+    pids = list(pids)
+    if os.path.isdir('/proc'):
+        children = _parent_map()
+        stack, total = pids, 0
+        while stack:
+            pid = stack.pop()
+            total += _process_memory(pid)
+            stack.extend(children.get(pid, ()))
+        return total
+    try:
+        import psutil
+    except ImportError:
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            process = psutil.Process(pid)
+            total += sum(p.memory_info().rss for p in [process, *process.children(recursive=True)])
+        except psutil.Error:
+            continue
+    return total
+
+
+class MemorySampler:
+    """
+    ブラウザ(ChromeDriverとその子孫)のメモリ使用量を裏で定期的に測り、最大値を記録する
+
+    Args:
+        interval (float): 測る間隔(秒)
+
+    Example:
+        >>> with MemorySampler() as sampler:
+        ...     sampler.track(driver)
+        ...     ...
+        >>> sampler.peak
+    """
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self.samples = 0
+        self._pids = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+
+    def track(self, driver):
+        """ドライバーのプロセスを測る対象に加える"""
+        with self._lock:
+            self._pids.add(driver.service.process.pid)
+        self.sample()
+
+    def untrack(self, driver):
+        """ドライバーを終了する前に測る対象から外す"""
+        self.sample()
+        with self._lock:
+            self._pids.discard(driver.service.process.pid)
+
+    def sample(self):
+        """今のメモリ使用量を測る"""
+        with self._lock:
+            pids = list(self._pids)
+        used = tree_memory(pids) if pids else 0
+        with self._lock:
+            self.samples += 1
+            if used is not None and used > self.peak:
+                self.peak = used
+        return used
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def _analyze_in_new_browser(url, sampler, headless=True, profile=None):
+    """比較用: URLごとにブラウザを起動して分析し、終了する(sctest.py と同じ使い方)"""
+    driver = create_driver(options_factory=partial(create_chrome_options, headless=headless, profile=profile),
+                           profile=profile)
+    sampler.track(driver)
+    try:
+        driver.get(url)
+        readiness = wait_for_page(driver, url)
+        analyze_loaded(driver, url, readiness)
+    finally:
+        sampler.untrack(driver)
+        driver.quit()
+
+
+def compare_fanout(urls, tabs=4, headless=True, profile=None):
+    """
+    同じURLを「URLごとにブラウザ(同時にtabs個)」と「1つのブラウザのtabs個のタブ」で分析して比べる
+
+    Args:
+        urls: 分析するURLのリスト
+        tabs (int): 同時に読み込むページ数(ブラウザの数 / タブの数)
+        headless (bool): Trueなら画面を出さずに起動する
+        profile: 取得プロファイル名
+
+    Returns:
+        dict: 'browser_per_url' / 'tabs' → {'pages', 'ok', 'elapsed', 'pages_per_second',
+              'peak_memory', 'memory_per_page'}
+    """
+    concurrent = max(min(tabs, len(urls)), 1)
+    results = {}
+
+    def summarize(name, ok, elapsed, sampler):
+        results[name] = {
+            'pages': len(urls),
+            'ok': ok,
+            'elapsed': round(elapsed, 3),
+            'pages_per_second': round(len(urls) / elapsed, 3) if elapsed else None,
+            'peak_memory': sampler.peak,
+            # 同時に読み込んでいるページ1つあたりのメモリ
+            'memory_per_page': sampler.peak // concurrent,
+        }
+        logger.info(f"{name}: {ok}/{len(urls)}ページ {elapsed:.1f}秒 最大{sampler.peak / 2**20:.0f}MB")
+
+    with MemorySampler() as sampler:
+        started = time.monotonic()
+        ok = 0
+        with ThreadPoolExecutor(max_workers=concurrent) as executor:
+            futures = [executor.submit(_analyze_in_new_browser, url, sampler, headless, profile) for url in urls]
+            for future in futures:
+                try:
+                    future.result()
+                    ok += 1
+                except Exception as e:
+                    logger.warning(f"失敗: {e}")
+        summarize('browser_per_url', ok, time.monotonic() - started, sampler)
+
+    with MemorySampler() as sampler:
+        started = time.monotonic()
+        driver = create_tab_driver(headless=headless, profile=profile)
+        sampler.track(driver)
+        try:
+            ok = sum(record['ok'] for record in TabFanout(driver, tabs=concurrent).run(urls))
+        finally:
+            sampler.untrack(driver)
+            driver.quit()
+        summarize('tabs', ok, time.monotonic() - started, sampler)
+    return results
+
+
+# このファイルが直接実行された場合のみ実行
+if __name__ == "__main__":
+    import argparse
+    import shutil
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='URLごとのブラウザと1つのブラウザの複数タブで、メモリと速度を比べる')
+    parser.add_argument('urls', nargs='*', help='分析するURL(省略時はフィクスチャサイト)')
+    parser.add_argument('--tabs', type=int, default=4, help='同時に読み込むページ数(ブラウザ / タブの数)')
+    parser.add_argument('--pages', type=int, default=20, help='フィクスチャのページ数')
+    parser.add_argument('--dir', default=None,
+                        help='フィクスチャサイトを作るディレクトリ(省略時は一時ディレクトリに作って最後に消す)')
+    parser.add_argument('--headed', action='store_true', help='画面ありで起動する')
+    parser.add_argument('--profile', default=None, help='取得プロファイル名')
+    args = parser.parse_args()
+
+    def report(results):
+        for name, result in results.items():
+            print(f"{name:>15}: {result['pages_per_second']}ページ/秒 "
+                  f"最大{result['peak_memory'] / 2**20:.0f}MB (1ページあたり{result['memory_per_page'] / 2**20:.0f}MB) "
+                  f"成功{result['ok']}/{result['pages']}")
+        per_url, tabs = results['browser_per_url'], results['tabs']
+        if tabs['memory_per_page']:
+            print(f"タブ多重化で1ページあたりのメモリは {per_url['memory_per_page'] / tabs['memory_per_page']:.1f}分の1")
+
+    if args.urls:
+        report(compare_fanout(args.urls, tabs=args.tabs, headless=not args.headed, profile=args.profile))
+    else:
+        from fixture_server import FixtureServer, write_fixture_site
+        fixture_dir = args.dir or tempfile.mkdtemp(prefix='tab_fanout_')
+        try:
+            write_fixture_site(fixture_dir, pages=args.pages)
+            with FixtureServer(fixture_dir) as server:
+                report(compare_fanout(server.page_urls(), tabs=args.tabs, headless=not args.headed,
+                                      profile=args.profile))
+        finally:
+            if args.dir is None:
+                shutil.rmtree(fixture_dir, ignore_errors=True)
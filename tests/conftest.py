@@ -0,0 +1,38 @@
+# === テスト共通の設定 ===
+# リポジトリ直下のモジュール(sctest.py・html_parsers.py など)をそのまま import できるようにする
+
+# パスの操作用
+import os
+# import の検索先に追加するため
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# リポジトリに入っている保存済みのページ
+SAMPLE_PAGE = os.path.join(ROOT, 'coorikuya_source.html')
+SAMPLE_URL = 'https://www.coorikuya.com/'
+
+# 閉じタグの省略・引用符の無い属性・余計な閉じタグなど、パーサーによって扱いが分かれやすいHTML
+MALFORMED = {
+    'unclosed_li': '<ul><li>a<li>b<li>c</ul><ol><li>x</ol>',
+    'unclosed_p': '<main class="m"><p>one<p>two<div class="x">d</div></main>',
+    'missing_end_div': '<div class="a"><div class="b"><article>t</article>',
+    'unquoted_attrs': '<div class=card data-sku=12 id=x1><a href=/a>a</a><a href=http://e.com/>e</a></div>',
+    'stray_end': '</span><div class="c">x</div></b></div><h1>T</h1>',
+    'uppercase': '<DIV CLASS="Up"><H2>x</H2><IMG SRC=a.png></DIV>',
+    'valueless': '<input disabled><select><option selected>o</select><button hidden>b</button>',
+    'comment_script': '<!-- <div class="no"> --><script>if (a<b) {"</div>"}</script><div class="yes"></div>',
+    'header_nav': '<header class="h"><nav><a href="/a">a</a><a href="/b">b</a></nav></header>',
+    'table': '<table><tr><td>1<td>2<tr><td>3</table><form><textarea>t</textarea></form>',
+}
+
+
+@pytest.fixture(scope='session')
+def sample_source():
+    """coorikuya_source.html の中身"""
+    with open(SAMPLE_PAGE, encoding='utf-8') as f:
+        return f.read()
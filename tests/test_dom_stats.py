@@ -0,0 +1,73 @@
+# === DOM統計の1パス集計(dom_stats.py) ===
+# find_all を何度も呼ぶ旧方式と同じ数・サンプルになることを確かめる
+
+import pytest
+
+bs4 = pytest.importorskip('bs4')
+
+from dom_stats import DomStatsCollector, _legacy_sweeps, collect_dom_stats, walk_soup  # noqa: E402
+from link_frontier import classify_links  # noqa: E402
+
+from conftest import SAMPLE_URL  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def sample_soup(sample_source):
+    return bs4.BeautifulSoup(sample_source, 'html.parser')
+
+
+def test_matches_legacy_sweeps(sample_soup):
+    stats = collect_dom_stats(sample_soup)
+    counts, divs, classes, ids, links, data_attrs, css = _legacy_sweeps(sample_soup)
+    assert {name: stats.count(name) for name in counts} == counts
+    assert stats.divs_with_class == divs
+    assert dict(stats.class_counts) == classes
+    assert stats.id_count == ids
+    assert stats.link_count == links
+    assert stats.data_attributes == data_attrs
+    assert stats.stylesheet_links == css
+
+
+def test_samples_match_get_text(sample_soup):
+    stats = collect_dom_stats(sample_soup)
+    assert stats.title == sample_soup.title.string
+    for level in range(1, 7):
+        expected = [h.get_text(strip=True) for h in sample_soup.find_all(f'h{level}')[:3]]
+        assert stats.headings.get(level, []) == expected
+    expected = [(a.get_text(strip=True), a['href']) for a in sample_soup.find_all('a', href=True)[:5]]
+    assert stats.link_samples == expected
+
+
+def test_header_nav_and_main():
+    soup = bs4.BeautifulSoup(
+        '<header class="site top"><nav><a href="/a">A</a><a href="/b">B</a></nav></header>'
+        '<nav><a href="/c">C</a></nav><header><nav><a href="/d">D</a></nav></header>'
+        '<main class="content"><h2> x <b>y</b> </h2></main>',
+        'html.parser',
+    )
+    stats = collect_dom_stats(soup)
+    assert stats.has_header and stats.header_classes == ['site', 'top']
+    # 最初の<header>内の<nav>だけを数える
+    assert stats.header_has_nav and stats.header_nav_links == 2
+    assert stats.has_main and stats.main_classes == ['content']
+    assert stats.headings[2] == ['xy']
+
+
+def test_base_url_classifies_while_collecting(sample_soup):
+    collector = DomStatsCollector(base_url=SAMPLE_URL)
+    walk_soup(sample_soup, collector)
+    streamed = collector.close()
+    stats = collect_dom_stats(sample_soup)
+    assert streamed.hrefs == []
+    assert streamed.links == classify_links(stats.hrefs, SAMPLE_URL)
+
+
+def test_capacity_bounds_class_counts(sample_soup):
+    # ページのクラス名は46種類なので、候補数を小さくして近似させる
+    collector = DomStatsCollector(capacity=16)
+    walk_soup(sample_soup, collector)
+    approx = collector.close()
+    exact = collect_dom_stats(sample_soup)
+    assert approx.tag_counts == exact.tag_counts
+    for name, count in approx.top_classes(16):
+        assert count - approx.class_counts.error(name) <= exact.class_counts[name] <= count
@@ -0,0 +1,131 @@
+# === 頻出項目のカウンター(heavy_hitters.py) ===
+# Space-Saving法の誤差の範囲と、まとめ(merge)たあとも範囲が保たれることを確かめる
+
+# 再現できる乱数の並びを作るため
+import random
+# 正確な回数(正解)を数えるため
+from collections import Counter
+
+import pytest
+
+from heavy_hitters import (ExactCounter, SpaceSavingCounter, check_merge_order, copy_counter,
+                           counter_from_dict, new_counter)
+
+CAPACITY = 20
+
+
+def _stream(seed, length=5000, kinds=300):
+    """少数の項目が多く出る(ジップ分布に近い)並びを作る"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(kinds)]
+    return [f'c{index}' for index in rng.choices(range(kinds), weights, k=length)]
+
+
+def _assert_bounds(counter, truth):
+    total = sum(truth.values())
+    assert counter.total == total
+    for item, count in counter.items():
+        assert count - counter.error(item) <= truth[item] <= count, item
+    # 全体の1/capacity を超える項目は必ず残る
+    for item, true_count in truth.items():
+        if true_count > total / counter.capacity:
+            assert item in counter, item
+
+
+def test_exact_counter_top():
+    counter = ExactCounter()
+    for item in ['b', 'a', 'b', 'c', 'a', 'b']:
+        counter.add(item)
+    assert counter.top(2) == [('b', 3), ('a', 2)]
+    assert counter.top_guaranteed(2) == counter.top(2)
+    assert counter.error('b') == 0
+
+
+def test_new_counter_mode(monkeypatch):
+    monkeypatch.delenv('HEAVY_HITTERS_CAPACITY', raising=False)
+    assert isinstance(new_counter(), ExactCounter)
+    monkeypatch.setenv('HEAVY_HITTERS_CAPACITY', '8')
+    assert new_counter().capacity == 8
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_space_saving_bounds(seed):
+    items = _stream(seed)
+    counter = SpaceSavingCounter(CAPACITY)
+    for item in items:
+        counter.add(item)
+    assert len(counter) == CAPACITY
+    _assert_bounds(counter, Counter(items))
+
+
+def test_top_guaranteed_is_lower_bound():
+    items = _stream(7)
+    truth = Counter(items)
+    counter = SpaceSavingCounter(CAPACITY)
+    for item in items:
+        counter.add(item)
+    guaranteed = counter.top_guaranteed(CAPACITY)
+    assert [count for _, count in guaranteed] == sorted((count for _, count in guaranteed), reverse=True)
+    for item, lower in guaranteed:
+        assert lower == counter.get(item) - counter.error(item)
+        assert lower <= truth[item]
+
+
+@pytest.mark.parametrize('order', ['forward', 'backward', 'halves'])
+def test_merge_keeps_bounds(order):
+    shards = [_stream(seed, length=2000) for seed in range(6)]
+    counters = []
+    for items in shards:
+        counter = SpaceSavingCounter(CAPACITY)
+        for item in items:
+            counter.add(item)
+        counters.append(counter)
+    if order == 'backward':
+        counters.reverse()
+    if order == 'halves':
+        left, right = SpaceSavingCounter(CAPACITY), SpaceSavingCounter(CAPACITY)
+        for counter in counters[:3]:
+            left.merge(counter)
+        for counter in counters[3:]:
+            right.merge(counter)
+        counters = [left, right]
+    merged = SpaceSavingCounter(CAPACITY)
+    for counter in counters:
+        merged.merge(counter)
+    _assert_bounds(merged, Counter(item for items in shards for item in items))
+
+
+def test_merge_exact_into_approx():
+    items = _stream(3)
+    exact = ExactCounter()
+    for item in items:
+        exact.add(item)
+    merged = SpaceSavingCounter(CAPACITY).merge(exact)
+    _assert_bounds(merged, Counter(items))
+
+
+def test_check_merge_order():
+    shards = [_stream(seed, length=1000) for seed in range(5)]
+    exact = []
+    for items in shards:
+        counter = ExactCounter()
+        for item in items:
+            counter.add(item)
+        exact.append(counter)
+    result = check_merge_order(exact)
+    assert result['same_top'] and result['same_counts'] and result['max_difference'] == 0
+    # 近似でも、はっきり多い上位の項目は順番によらず同じになる
+    result = check_merge_order(exact, capacity=CAPACITY, n=3)
+    assert result['same_top']
+
+
+def test_round_trip():
+    counter = SpaceSavingCounter(CAPACITY)
+    for item in _stream(11):
+        counter.add(item)
+    restored = counter_from_dict(counter.to_dict())
+    assert dict(restored.items()) == dict(counter.items())
+    assert restored.errors == counter.errors and restored.total == counter.total
+    copied = copy_counter(counter)
+    copied.add('new-item')
+    assert 'new-item' not in counter
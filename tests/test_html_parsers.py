@@ -0,0 +1,43 @@
+# === パーサーの一致確認(html_parsers.py) ===
+# インストール済みの全てのパーサーで【1】〜【13】の数が同じになることを確かめる
+
+import pytest
+
+pytest.importorskip('bs4')
+
+from html_parsers import available_backends, check_conformance, collect_stats, section_counts  # noqa: E402
+
+from conftest import MALFORMED, SAMPLE_URL  # noqa: E402
+
+BACKENDS = available_backends()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_sample_page_matches_html_parser(sample_source, backend):
+    expected = section_counts(collect_stats(sample_source, 'html.parser'), SAMPLE_URL)
+    assert section_counts(collect_stats(sample_source, backend), SAMPLE_URL) == expected
+
+
+def test_sample_page_conformance(sample_source):
+    assert check_conformance(sample_source) == {}
+
+
+@pytest.mark.parametrize('name', sorted(MALFORMED))
+def test_malformed_html_conformance(name):
+    assert check_conformance(MALFORMED[name]) == {}
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_malformed_counts(backend):
+    counts = section_counts(collect_stats(MALFORMED['unquoted_attrs'], backend), 'https://example.com/')
+    assert counts['link_count'] == 2
+    assert counts['internal_links'] == 1
+    assert counts['external_links'] == 1
+    assert counts['data_attributes'] == 1
+
+    counts = section_counts(collect_stats(MALFORMED['comment_script'], backend))
+    assert counts['divs_with_class'] == 1
+    assert counts['script'] == 1
+
+    counts = section_counts(collect_stats(MALFORMED['header_nav'], backend))
+    assert counts['has_header'] and counts['header_nav_links'] == 2
@@ -0,0 +1,60 @@
+# === CSSセレクターの一括評価(selector_index.py) ===
+# 索引から答えた結果が soup.select と同じ要素・同じ順番になることを確かめる
+
+import pytest
+
+bs4 = pytest.importorskip('bs4')
+
+from selector_index import SelectorIndex, UnsupportedSelector, compile_selector  # noqa: E402
+
+# 索引で扱う構文(子孫結合子・カンマ区切り・属性の演算子)
+SELECTORS = [
+    'div', 'a', '*', '.item', 'div.item', '#main', 'p.a.b', 'a[href]', 'a[rel="tag"]', 'a[rel~=tag]',
+    "a[href^='/cat']", 'a[href$=".html"]', 'a[href*=post]', 'p[class~=b]', 'span[lang|=ja]',
+    'article h2', 'div .item a', 'h2, p.a', 'p.a, h2', 'article h2 a[rel="bookmark"]',
+]
+
+# soup.select に任せる構文
+FALLBACK = ['article > h2', 'p + p', 'p ~ span', 'li:first-child', 'a:not([rel])']
+
+HTML = '''
+<div id="main" class="item">
+  <article><h2 class="t"><a href="/post/1.html" rel="bookmark">one</a></h2>
+    <p class="a b">x</p><p class="b a c">y</p><span lang="ja-JP">z</span></article>
+  <article><div><h2><a href="/cat/x" rel="tag nofollow">two</a></h2></div>
+    <div class="item"><a href="https://e.com/post">e</a></div></article>
+  <ul><li class="item item">1</li><li>2</li></ul>
+</div>
+'''
+
+
+@pytest.fixture(scope='module')
+def soup():
+    return bs4.BeautifulSoup(HTML, 'html.parser')
+
+
+@pytest.mark.parametrize('selector', SELECTORS + FALLBACK)
+def test_matches_soup_select(soup, selector):
+    expected = soup.select(selector)
+    assert [id(el) for el in SelectorIndex(soup).select(selector)] == [id(el) for el in expected]
+
+
+@pytest.mark.parametrize('selector', FALLBACK)
+def test_unsupported_selectors(selector):
+    with pytest.raises(UnsupportedSelector):
+        compile_selector(selector)
+
+
+def test_duplicate_class_listed_once(soup):
+    index = SelectorIndex(soup)
+    assert len(index.by_class['item']) == 3
+
+
+def test_toku_patterns_on_sample_page(sample_source):
+    toku = pytest.importorskip('toku')
+    selectors = (toku.ARTICLE_PATTERNS + toku.TITLE_PATTERNS + toku.DATE_PATTERNS
+                 + toku.CONTENT_PATTERNS + toku.CATEGORY_PATTERNS)
+    page = bs4.BeautifulSoup(sample_source, 'html.parser')
+    results = SelectorIndex(page).select_all(selectors)
+    for selector in selectors:
+        assert [id(el) for el in results[selector]] == [id(el) for el in page.select(selector)], selector
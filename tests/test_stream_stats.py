@@ -0,0 +1,69 @@
+# === 木を作らないストリーミング解析(stream_stats.py) ===
+# 木を作る解析と【1】〜【13】の数が同じになることと、メモリの上限で止まることを確かめる
+
+# 解析後に tracemalloc が止まっているか確かめるため
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('bs4')
+
+from fixture_server import write_large_page  # noqa: E402
+from html_parsers import available_backends, collect_stats, section_counts  # noqa: E402
+from stream_stats import (TOKENIZERS, MemoryLimitExceeded, StreamAnalyzer, compare_memory,  # noqa: E402
+                          iter_text_chunks, stream_stats)
+
+from conftest import MALFORMED, SAMPLE_URL  # noqa: E402
+
+# 木を作るパーサーと同じ補完をするトークナイザーだけを比べる
+PAIRS = [tokenizer for tokenizer in TOKENIZERS if tokenizer in available_backends()]
+
+
+def _stream_counts(source, tokenizer, base_url, size):
+    # バイト列を細かく切って、UTF-8の文字やタグの途中で分かれても同じになるか確かめる
+    data = source.encode('utf-8')
+    chunks = (data[start:start + size] for start in range(0, len(data), size))
+    return section_counts(stream_stats(chunks, base_url=base_url, tokenizer=tokenizer))
+
+
+@pytest.mark.parametrize('tokenizer', PAIRS)
+@pytest.mark.parametrize('size', [7, 4096])
+def test_sample_page_parity(sample_source, tokenizer, size):
+    expected = section_counts(collect_stats(sample_source, tokenizer), SAMPLE_URL)
+    assert _stream_counts(sample_source, tokenizer, SAMPLE_URL, size) == expected
+
+
+@pytest.mark.parametrize('tokenizer', PAIRS)
+@pytest.mark.parametrize('name', sorted(MALFORMED))
+def test_malformed_parity(tokenizer, name):
+    source = MALFORMED[name]
+    expected = section_counts(collect_stats(source, tokenizer), 'https://example.com/')
+    assert _stream_counts(source, tokenizer, 'https://example.com/', 5) == expected
+
+
+@pytest.mark.parametrize('tokenizer', PAIRS)
+def test_large_fixture_parity(tmp_path, tokenizer):
+    path = str(tmp_path / 'large.html')
+    assert write_large_page(path, 0.3) > 0
+    result = compare_memory(path, tokenizer=tokenizer)
+    assert result['mismatches'] == {}
+    assert result['stream']['backend'] == tokenizer
+    assert not tracemalloc.is_tracing()
+
+
+def test_text_chunks_round_trip(sample_source):
+    assert ''.join(iter_text_chunks(sample_source, 1000)) == sample_source
+
+
+@pytest.mark.parametrize('tokenizer', PAIRS)
+def test_memory_limit(tokenizer):
+    analyzer = StreamAnalyzer(tokenizer=tokenizer, memory_limit=1024)
+    with pytest.raises(MemoryLimitExceeded):
+        for chunk in iter_text_chunks(''.join(f'<div class="c{i}" data-i="{i}">x</div>' for i in range(20000))):
+            analyzer.feed(chunk)
+    assert not tracemalloc.is_tracing()
+
+
+def test_unknown_tokenizer():
+    with pytest.raises(ValueError):
+        StreamAnalyzer(tokenizer='html5lib')
@@ -1,20 +1,32 @@
 # === 必要なライブラリを全てインポート ===
-# Seleniumの基本機能
-from selenium import webdriver
-# Chromeのオプション設定用
-from selenium.webdriver.chrome.options import Options
-# Chromeのサービス設定用
-from selenium.webdriver.chrome.service import Service
-# ChromeDriverを自動ダウンロードするツール
-from webdriver_manager.chrome import ChromeDriverManager
-# HTML要素を探すための方法を指定
-from selenium.webdriver.common.by import By
-# BeautifulSoupでHTML解析
-from bs4 import BeautifulSoup
-# 待機処理用
-import time
+# ブラウザが落ちたかどうかの判定用
+from selenium.common.exceptions import WebDriverException
+# BeautifulSoupでHTML解析(パーサーは自動で最速のものを選ぶ)
+from html_parsers import parse_html
 # ログ出力用
 import logging
+# 起動済みブラウザを使い回すプール
+from driver_pool import get_default_pool
+# 読み込み完了の判定用
+from page_ready import wait_for_page, DEFAULT_STRATEGIES
+# 結果のレポートと出力先
+from report import Report, ConsoleSink, emit_report
+# 全セレクターを1回の索引作成で評価するため
+from selector_index import SelectorIndex
+# 取得済みページのキャッシュ(ヒットすればブラウザを使わない)
+from page_cache import get_default_cache
+# HTMLスナップショット・スクリーンショットを裏で保存するため
+from artifacts import get_default_writer, screenshot_path
+# 実行モード(ヘッドレス・対話)の切り替え
+from run_mode import get_run_mode
+# 読み込んだリソースの量・時間の計測用
+from fetch_profile import measure_page
+# 段階ごとの時間計測(TRACE_OUTPUT を指定したときだけ記録)
+from tracing import span
+# 頻出クラス名をメモリの上限付きで数えるため
+from heavy_hitters import new_counter
+# 探索結果から記事の抽出スキーマを作るため
+from extraction_schema import infer_schema
 
 # ログの設定
 logging.basicConfig(
@@ -24,246 +36,159 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def find_specific_elements(url):
+# === 探索するCSSセレクターのパターン ===
+# パターン1: よくある記事一覧のパターン
+ARTICLE_PATTERNS = [
+    ('article'),  # articleタグ
+    ('.post'),  # postクラス
+    ('.entry'),  # entryクラス
+    ('.blog-post'),  # blog-postクラス
+    ('.article-item'),  # article-itemクラス
+    ('[class*="post"]'),  # postを含むクラス
+    ('.card'),  # cardクラス
+    ('.item'),  # itemクラス
+]
+
+# パターン2: タイトル
+TITLE_PATTERNS = [
+    ('h1'),  # h1タグ
+    ('h2'),  # h2タグ
+    ('h2.entry-title'),  # entry-titleクラスを持つh2
+    ('h2.post-title'),  # post-titleクラスを持つh2
+    ('.title'),  # titleクラス
+    ('article h2'),  # article内のh2
+    ('h2 a'),  # リンクを含むh2
+    ('.entry-title'),  # entry-titleクラス
+]
+
+# パターン3: 日付
+DATE_PATTERNS = [
+    ('time'),  # timeタグ
+    ('.date'),  # dateクラス
+    ('.published'),  # publishedクラス
+    ('.entry-date'),  # entry-dateクラス
+    ('[datetime]'),  # datetime属性を持つ要素
+    ('.post-date'),  # post-dateクラス
+]
+
+# パターン4: 本文・抜粋
+CONTENT_PATTERNS = [
+    ('.entry-content'),  # entry-contentクラス
+    ('.post-content'),  # post-contentクラス
+    ('.excerpt'),  # excerptクラス
+    ('.summary'),  # summaryクラス
+    ('article p'),  # article内のp(段落)
+    ('.description'),  # descriptionクラス
+]
+
+# パターン5: カテゴリー・タグ
+CATEGORY_PATTERNS = [
+    ('.category'),  # categoryクラス
+    ('.tag'),  # tagクラス
+    ('.categories'),  # categoriesクラス
+    ('.tags'),  # tagsクラス
+    ('a[rel="category"]'),  # rel属性がcategoryのリンク
+    ('a[rel="tag"]'),  # rel属性がtagのリンク
+    ('.cat-links'),  # cat-linksクラス
+]
+
+# レポートに残すサンプルテキストの最大文字数(表示はさらに短く切る)
+SAMPLE_TEXT_LIMIT = 200
+
+
+def find_specific_elements(url, pool=None, ready_strategies=DEFAULT_STRATEGIES, sinks=None, cache=None,
+                           mode=None):
     """
     特定のパターンの要素を探索する
+    Args:
+        url: 分析するURL
+        pool: ブラウザを借りるDriverPool(省略時は共有のデフォルトプール)
+        ready_strategies: 読み込み完了の判定方法(page_ready.pyの戦略のリスト)
+        sinks: 結果の出力先(report.pyのシンクのリスト。省略時は画面表示)
+        cache: ページキャッシュ(省略時は共有のデフォルトキャッシュ。Falseで使わない)
+        mode: 実行モード(run_mode.pyのRunMode。省略時は環境変数 RUN_MODE、無ければ画面あり・待ち無し)
+    Returns:
+        Report: 探索結果(エラー時はNone)
     """
-    # Chromeのオプションを作成
-    chrome_options = Options()
-    
-    # ヘッドレスモードをオフ(画面を表示)
-    # chrome_options.add_argument('--headless')  # コメントアウト=画面表示
-    
-    # その他の基本設定
-    chrome_options.add_argument('--disable-gpu')  # GPU無効化
-    chrome_options.add_argument('--no-sandbox')  # サンドボックス無効化
-    chrome_options.add_argument('--window-size=1920,1080')  # ウィンドウサイズ
+    if sinks is None:
+        sinks = [ConsoleSink(render_elements_report)]
+    if mode is None:
+        mode = get_run_mode()
     
-    # User-Agentを設定(ボット判定回避)
-    chrome_options.add_argument(
-        'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    )
+    # キャッシュにあればブラウザを使わずに探索する(【10】の保存は行わない)
+    if cache is None:
+        cache = get_default_cache()
+    if cache:
+        with span('cache.lookup', url=url):
+            page_source = cache.lookup(url)
+        if page_source is not None:
+            report = build_elements_report(parse_html(page_source), url)
+            report.meta['cache'] = 'hit'
+            logger.info(f"キャッシュから探索しました(ブラウザ未使用): {cache.stats()}")
+            emit_report(report, sinks)
+            return report
     
-    # ChromeDriverを自動インストール
-    service = Service(ChromeDriverManager().install())
-    
-    # Chromeドライバーを起動
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    # 起動済みのブラウザをプールから借りる
+    if pool is None:
+        pool = get_default_pool()
+    with span('pool.acquire'):
+        session = pool.acquire()
+    driver = session.driver
+    # ブラウザ自体が壊れたかどうか(壊れていたら返却時に捨てる)
+    broken = False
     
     try:
         # 対象URLにアクセス
         logger.info(f"アクセス中: {url}")
-        driver.get(url)
+        with span('driver.get', url=url):
+            driver.get(url)
         
-        # ページが完全に読み込まれるまで3秒待機
-        time.sleep(3)
+        # ページが解析できる状態になるまで待機(固定秒数ではなく状態を見る)
+        with span('page.wait_ready'):
+            readiness = wait_for_page(driver, url, strategies=ready_strategies)
+        # 取得プロファイル(fetch_profile.py)で実際に読み込んだ量と時間
+        fetch = measure_page(driver)
         
         # ページのHTMLソースを取得
-        page_source = driver.page_source
+        with span('page_source') as s:
+            page_source = driver.page_source
+            s.set(chars=len(page_source))
+        # 次回はブラウザ無しで探索できるようにキャッシュしておく(下のHTML保存も兼ねる)
+        snapshot = None
+        if cache:
+            with span('cache.store'):
+                snapshot = cache.store(url, page_source)
         
         # BeautifulSoupで解析(HTMLを扱いやすくする)
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        print("\n" + "="*80)
-        print("【coorikuya.com 詳細な要素検索】")
-        print("="*80)
-        
-        # === パターン1: 記事一覧を探す ===
-        print("\n1. 記事一覧候補:")
-        # よくある記事一覧のパターン(CSSセレクター)
-        patterns = [
-            ('article'),  # articleタグ
-            ('.post'),  # postクラス
-            ('.entry'),  # entryクラス
-            ('.blog-post'),  # blog-postクラス
-            ('.article-item'),  # article-itemクラス
-            ('[class*="post"]'),  # postを含むクラス
-            ('.card'),  # cardクラス
-            ('.item'),  # itemクラス
-        ]
-        
-        # 各パターンで要素を検索
-        for pattern in patterns:
-            # CSSセレクターで要素を検索
-            elements = soup.select(pattern)
-            # 要素が見つかった場合
-            if elements:
-                print(f"  ✓ セレクター '{pattern}': {len(elements)}個見つかりました")
-                # 最初の要素の構造を表示
-                if elements:
-                    first = elements[0]
-                    # タグ名とクラス名を取得
-                    class_list = first.get('class', [])
-                    print(f"    構造例: <{first.name} class='{' '.join(class_list)}'>")
-                    # 直接の子要素を確認
-                    children = first.find_all(recursive=False)
-                    print(f"    直接の子要素: {len(children)}個")
-        
-        # === パターン2: タイトルを探す ===
-        print("\n2. タイトル候補:")
-        title_patterns = [
-            ('h1'),  # h1タグ
-            ('h2'),  # h2タグ
-            ('h2.entry-title'),  # entry-titleクラスを持つh2
-            ('h2.post-title'),  # post-titleクラスを持つh2
-            ('.title'),  # titleクラス
-            ('article h2'),  # article内のh2
-            ('h2 a'),  # リンクを含むh2
-            ('.entry-title'),  # entry-titleクラス
-        ]
-        
-        # 各パターンで検索
-        for pattern in title_patterns:
-            elements = soup.select(pattern)
-            if elements:
-                print(f"  ✓ '{pattern}': {len(elements)}個")
-                # 最初のテキストを表示(50文字まで)
-                if elements:
-                    text = elements[0].get_text(strip=True)
-                    print(f"    例: {text[:50]}")
-        
-        # === パターン3: 日付を探す ===
-        print("\n3. 日付候補:")
-        date_patterns = [
-            ('time'),  # timeタグ
-            ('.date'),  # dateクラス
-            ('.published'),  # publishedクラス
-            ('.entry-date'),  # entry-dateクラス
-            ('[datetime]'),  # datetime属性を持つ要素
-            ('.post-date'),  # post-dateクラス
-        ]
-        
-        # 各パターンで検索
-        for pattern in date_patterns:
-            elements = soup.select(pattern)
-            if elements:
-                print(f"  ✓ '{pattern}': {len(elements)}個")
-                if elements:
-                    # テキストまたはdatetime属性を表示
-                    text = elements[0].get_text(strip=True)
-                    datetime_attr = elements[0].get('datetime', '')
-                    print(f"    例: {text}")
-                    if datetime_attr:
-                        print(f"    datetime属性: {datetime_attr}")
-        
-        # === パターン4: 本文・抜粋を探す ===
-        print("\n4. 本文・抜粋候補:")
-        content_patterns = [
-            ('.entry-content'),  # entry-contentクラス
-            ('.post-content'),  # post-contentクラス
-            ('.excerpt'),  # excerptクラス
-            ('.summary'),  # summaryクラス
-            ('article p'),  # article内のp(段落)
-            ('.description'),  # descriptionクラス
-        ]
+        with span('parse'):
+            soup = parse_html(page_source)
         
-        # 各パターンで検索
-        for pattern in content_patterns:
-            elements = soup.select(pattern)
-            if elements:
-                print(f"  ✓ '{pattern}': {len(elements)}個")
-                if elements:
-                    # テキストを取得(最初の80文字)
-                    text = elements[0].get_text(strip=True)
-                    print(f"    例: {text[:80]}...")
-        
-        # === パターン5: カテゴリー・タグを探す ===
-        print("\n5. カテゴリー・タグ候補:")
-        category_patterns = [
-            ('.category'),  # categoryクラス
-            ('.tag'),  # tagクラス
-            ('.categories'),  # categoriesクラス
-            ('.tags'),  # tagsクラス
-            ('a[rel="category"]'),  # rel属性がcategoryのリンク
-            ('a[rel="tag"]'),  # rel属性がtagのリンク
-            ('.cat-links'),  # cat-linksクラス
-        ]
-        
-        # 各パターンで検索
-        for pattern in category_patterns:
-            elements = soup.select(pattern)
-            if elements:
-                print(f"  ✓ '{pattern}': {len(elements)}個")
-                if elements:
-                    # テキストを表示
-                    print(f"    例: {elements[0].get_text(strip=True)}")
-        
-        # === パターン6: 画像を探す ===
-        print("\n6. 画像候補:")
-        images = soup.find_all('img')
-        print(f"  総画像数: {len(images)}個")
-        
-        # 最初の3つの画像を表示
-        for i, img in enumerate(images[:3], 1):
-            src = img.get('src', '')
-            alt = img.get('alt', '')
-            print(f"  {i}. alt='{alt[:30]}' src='{src[:60]}'")
-        
-        # === パターン7: リンクを探す ===
-        print("\n7. リンク候補:")
-        links = soup.find_all('a', href=True)
-        print(f"  総リンク数: {len(links)}個")
-        
-        # 最初の5つのリンクを表示
-        for i, link in enumerate(links[:5], 1):
-            href = link.get('href', '')
-            text = link.get_text(strip=True)
-            print(f"  {i}. {text[:30]} -> {href[:50]}")
-        
-        # === 全体のHTML構造ツリーを表示 ===
-        print("\n8. HTML構造ツリー(body直下の要素):")
-        body = soup.find('body')
-        if body:
-            # bodyの直接の子要素を列挙
-            for i, child in enumerate(body.find_all(recursive=False), 1):
-                # クラス名を取得
-                class_str = ' '.join(child.get('class', []))
-                # ID属性を取得
-                id_str = child.get('id', '')
-                
-                # 出力
-                print(f"  {i}. <{child.name}> ", end='')
-                if id_str:
-                    print(f"id='{id_str}' ", end='')
-                if class_str:
-                    print(f"class='{class_str}'", end='')
-                print()
-        
-        # === よく使われているクラス名のランキング ===
-        print("\n9. 頻出クラス名トップ10:")
-        class_counter = {}
-        # 全てのタグからクラス名を収集
-        for tag in soup.find_all(class_=True):
-            classes = tag.get('class', [])
-            for cls in classes:
-                # カウント
-                class_counter[cls] = class_counter.get(cls, 0) + 1
-        
-        # 出現回数でソート
-        sorted_classes = sorted(
-            class_counter.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        # トップ10を表示
-        for i, (cls, count) in enumerate(sorted_classes[:10], 1):
-            print(f"  {i:2d}. '{cls}' - {count}回")
+        # パターン1〜9を探索してレポートにする
+        report = build_elements_report(soup, url)
+        report.meta['readiness'] = readiness.to_dict()
+        report.meta['fetch'] = fetch
+        report.meta['cache'] = 'miss' if cache else None
         
         # === HTMLソースを保存 ===
-        print("\n10. HTMLソース保存:")
-        with open('coorikuya_source.html', 'w', encoding='utf-8') as f:
-            # きれいに整形して保存
-            f.write(soup.prettify())
-        print("  ✓ 'coorikuya_source.html' に保存しました")
+        # 取得したままのHTMLを裏で圧縮して保存(同じ内容なら書き込まない)
+        artifacts = get_default_writer()
+        with span('section.10.snapshot'):
+            html_path = snapshot[0] if snapshot else artifacts.save_snapshot(url, page_source)[0]
         
         # === スクリーンショット保存 ===
-        driver.save_screenshot('coorikuya_screenshot.png')
-        print("  ✓ 'coorikuya_screenshot.png' に保存しました")
+        # 撮るだけ撮って、PNGの書き込みは裏で行う(すぐにブラウザを返せる)
+        shot_path = screenshot_path(url)
+        with span('screenshot'):
+            artifacts.save_screenshot(driver, shot_path)
+        report.add_section('10', 'HTMLソース保存', {
+            'html': html_path,
+            'screenshot': shot_path,
+        })
         
-        print("\n" + "="*80)
-        print("【分析完了！】")
-        print("="*80)
+        # 出力先(画面・JSONなど)に渡す
+        with span('emit'):
+            emit_report(report, sinks)
+        return report
         
     except Exception as e:
         # エラーが発生した場合
@@ -271,16 +196,254 @@ def find_specific_elements(url):
         # 詳細なエラー情報を表示
         import traceback
         traceback.print_exc()
+        # WebDriverの例外ならブラウザが落ちている可能性がある
+        broken = isinstance(e, WebDriverException)
         
     finally:
-        # 必ずブラウザを閉じる
-        print("\n5秒後にブラウザを閉じます...")
-        time.sleep(5)
-        driver.quit()
-        logger.info("ブラウザを閉じました")
+        # 必ずブラウザをプールに返す(Cookie等は返却時に消える。interactiveのときだけEnterを待つ)
+        mode.before_release()
+        with span('pool.release'):
+            pool.release(session, broken=broken)
+        logger.info(f"ブラウザをプールに返却しました: {pool.stats()}")
+
+
+def _probe(index, patterns, sample):
+    """
+    パターンごとにCSSセレクターで検索し、件数と最初の要素のサンプルを返す
+    Args:
+        index: SelectorIndex(ページ全体の索引)
+        patterns: CSSセレクターのリスト
+        sample: 最初の要素からサンプル(辞書)を作る関数
+    Returns:
+        list: {'selector', 'count', 'sample'} のリスト(見つからなかったものも含む)
+    """
+    probes = []
+    for pattern in patterns:
+        # CSSセレクターで要素を検索(木をたどり直さず索引から答える)
+        elements = index.select(pattern)
+        probes.append({
+            'selector': pattern,
+            'count': len(elements),
+            'sample': sample(elements[0]) if elements else None,
+        })
+    return probes
+
+
+def _text_sample(element):
+    """最初の要素のテキストをサンプルにする"""
+    return {'text': element.get_text(strip=True)[:SAMPLE_TEXT_LIMIT]}
+
+
+def _structure_sample(element):
+    """最初の要素のタグ名・クラス名・直接の子要素数をサンプルにする"""
+    return {
+        'tag': element.name,
+        'classes': list(element.get('class', [])),
+        'children': len(element.find_all(recursive=False)),
+    }
+
+
+def _date_sample(element):
+    """最初の要素のテキストとdatetime属性をサンプルにする"""
+    return {
+        'text': element.get_text(strip=True)[:SAMPLE_TEXT_LIMIT],
+        'datetime': element.get('datetime', ''),
+    }
+
+
+def build_elements_report(soup, url):
+    """
+    解析済みのHTMLからパターン1〜9を探索し、抽出スキーマ(11)も付けたレポートを作る(ブラウザ不要)
+    Args:
+        soup: BeautifulSoupオブジェクト
+        url: 分析したURL
+    Returns:
+        Report: パターン1〜9と11を入れたレポート
+    """
+    report = Report('elements', url)
+    # タグ名・クラス名・id・属性の索引を1回だけ作る
+    with span('selector_index'):
+        index = SelectorIndex(soup)
+    
+    # === パターン1〜5: CSSセレクターで候補を探す ===
+    with span('section.1'):
+        report.add_section('1', '記事一覧候補', {'probes': _probe(index, ARTICLE_PATTERNS, _structure_sample)})
+    with span('section.2'):
+        report.add_section('2', 'タイトル候補', {'probes': _probe(index, TITLE_PATTERNS, _text_sample)})
+    with span('section.3'):
+        report.add_section('3', '日付候補', {'probes': _probe(index, DATE_PATTERNS, _date_sample)})
+    with span('section.4'):
+        report.add_section('4', '本文・抜粋候補', {'probes': _probe(index, CONTENT_PATTERNS, _text_sample)})
+    with span('section.5'):
+        report.add_section('5', 'カテゴリー・タグ候補', {'probes': _probe(index, CATEGORY_PATTERNS, _text_sample)})
+    
+    # === パターン6: 画像を探す ===
+    images = index.by_tag.get('img', [])
+    report.add_section('6', '画像候補', {
+        'count': len(images),
+        'samples': [{'alt': img.get('alt', ''), 'src': img.get('src', '')} for img in images[:3]],
+    })
+    
+    # === パターン7: リンクを探す ===
+    with span('section.7'):
+        links = index.select('a[href]')
+        report.add_section('7', 'リンク候補', {
+            'count': len(links),
+            'samples': [
+                {'text': link.get_text(strip=True), 'href': link.get('href', '')}
+                for link in links[:5]
+            ],
+        })
+    
+    # === 全体のHTML構造ツリー(body直下の要素) ===
+    with span('section.8'):
+        body = soup.find('body')
+        children = []
+        if body:
+            for child in body.find_all(recursive=False):
+                children.append({
+                    'tag': child.name,
+                    'id': child.get('id', ''),
+                    'classes': list(child.get('class', [])),
+                })
+        report.add_section('8', 'HTML構造ツリー(body直下の要素)', {'children': children})
+    
+    # === よく使われているクラス名のランキング ===
+    with span('section.9'):
+        # 正確に数える(HEAVY_HITTERS_CAPACITY があれば候補数を決めて近似で数える)
+        class_counter = new_counter()
+        # 全てのタグからクラス名を収集
+        for tag in index.by_attr.get('class', []):
+            for cls in tag.get('class', []):
+                class_counter.add(cls)
+        
+        # 全件ソートせずに上位10件だけ取り出す
+        top_classes = class_counter.top(10)
+    report.add_section('9', '頻出クラス名トップ10', {
+        'top_classes': top_classes,
+        'approximate': class_counter.approximate,
+    })
+    
+    # === 見つかった候補から抽出スキーマを作る ===
+    # 記事1件ごとに1つずつ見つかる候補を選ぶ(extraction_schema.py で多くのページから取り出せる)
+    with span('section.11'):
+        schema = infer_schema(index, report)
+    report.add_section('11', '抽出スキーマ', {'schema': schema.to_dict() if schema else None})
+    return report
+
+
+def render_elements_report(report, out=None):
+    """
+    レポートを今までと同じ形式で画面に表示する(ConsoleSink用)
+    Args:
+        report: build_elements_report / find_specific_elements の結果
+        out: 出力先(省略時は標準出力)
+    """
+    def p(*args, **kwargs):
+        print(*args, file=out, **kwargs)
+    
+    p("\n" + "="*80)
+    p("【coorikuya.com 詳細な要素検索】")
+    p("="*80)
+    
+    # === パターン1: 記事一覧 ===
+    p("\n1. 記事一覧候補:")
+    for probe in report['1']['probes']:
+        # 要素が見つかった場合
+        if probe['count']:
+            p(f"  ✓ セレクター '{probe['selector']}': {probe['count']}個見つかりました")
+            # 最初の要素の構造を表示
+            sample = probe['sample']
+            p(f"    構造例: <{sample['tag']} class='{' '.join(sample['classes'])}'>")
+            p(f"    直接の子要素: {sample['children']}個")
+    
+    # === パターン2: タイトル ===
+    p("\n2. タイトル候補:")
+    for probe in report['2']['probes']:
+        if probe['count']:
+            p(f"  ✓ '{probe['selector']}': {probe['count']}個")
+            # 最初のテキストを表示(50文字まで)
+            p(f"    例: {probe['sample']['text'][:50]}")
+    
+    # === パターン3: 日付 ===
+    p("\n3. 日付候補:")
+    for probe in report['3']['probes']:
+        if probe['count']:
+            p(f"  ✓ '{probe['selector']}': {probe['count']}個")
+            # テキストまたはdatetime属性を表示
+            p(f"    例: {probe['sample']['text']}")
+            if probe['sample']['datetime']:
+                p(f"    datetime属性: {probe['sample']['datetime']}")
+    
+    # === パターン4: 本文・抜粋 ===
+    p("\n4. 本文・抜粋候補:")
+    for probe in report['4']['probes']:
+        if probe['count']:
+            p(f"  ✓ '{probe['selector']}': {probe['count']}個")
+            # テキストを表示(最初の80文字)
+            p(f"    例: {probe['sample']['text'][:80]}...")
+    
+    # === パターン5: カテゴリー・タグ ===
+    p("\n5. カテゴリー・タグ候補:")
+    for probe in report['5']['probes']:
+        if probe['count']:
+            p(f"  ✓ '{probe['selector']}': {probe['count']}個")
+            p(f"    例: {probe['sample']['text']}")
+    
+    # === パターン6: 画像 ===
+    data = report['6']
+    p("\n6. 画像候補:")
+    p(f"  総画像数: {data['count']}個")
+    # 最初の3つの画像を表示
+    for i, sample in enumerate(data['samples'], 1):
+        p(f"  {i}. alt='{sample['alt'][:30]}' src='{sample['src'][:60]}'")
+    
+    # === パターン7: リンク ===
+    data = report['7']
+    p("\n7. リンク候補:")
+    p(f"  総リンク数: {data['count']}個")
+    # 最初の5つのリンクを表示
+    for i, sample in enumerate(data['samples'], 1):
+        p(f"  {i}. {sample['text'][:30]} -> {sample['href'][:50]}")
+    
+    # === 全体のHTML構造ツリー ===
+    p("\n8. HTML構造ツリー(body直下の要素):")
+    for i, child in enumerate(report['8']['children'], 1):
+        p(f"  {i}. <{child['tag']}> ", end='')
+        if child['id']:
+            p(f"id='{child['id']}' ", end='')
+        if child['classes']:
+            p(f"class='{' '.join(child['classes'])}'", end='')
+        p()
+    
+    # === よく使われているクラス名のランキング ===
+    p("\n9. 頻出クラス名トップ10" + ("(近似)" if report['9']['approximate'] else "") + ":")
+    for i, (cls, count) in enumerate(report['9']['top_classes'], 1):
+        p(f"  {i:2d}. '{cls}' - {count}回")
+    
+    # === HTMLソース・スクリーンショット保存 ===
+    if '10' in report:
+        data = report['10']
+        p("\n10. HTMLソース保存:")
+        p(f"  ✓ '{data['html']}' に保存しました")
+        p(f"  ✓ '{data['screenshot']}' に保存しました")
+    
+    # === 抽出スキーマ ===
+    schema = report['11']['schema']
+    p("\n11. 抽出スキーマ:")
+    if schema:
+        p(f"  記事: '{schema['container']}'")
+        for field in schema['fields']:
+            p(f"  - {field['name']}: '{field['selector']}' ({field['type']})")
+    else:
+        p("  記事一覧が見つからないので作れませんでした")
+    
+    p("\n" + "="*80)
+    p("【分析完了！】")
+    p("="*80)
 
 
 # このファイルが直接実行された場合のみ実行
 if __name__ == "__main__":
     # coorikuya.comを分析
-    find_specific_elements("https://www.coorikuya.com/")
\ No newline at end of file
+    find_specific_elements("https://www.coorikuya.com/")
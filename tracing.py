@@ -0,0 +1,278 @@
+# === 処理の段階ごとの時間計測(スパン) ===
+# ログの時刻だけでは、ドライバーの準備・ブラウザ起動・driver.get・待機・page_source の転送・
+# 解析・各セクション・保存・スクリーンショットのどこで時間が掛かったのか分からないので、
+# with span('名前'): で囲んだ区間の時間を記録し、あとでまとめて書き出せるようにする
+# - 無効なとき(デフォルト)は何もしない共通のオブジェクトを返すだけなのでほぼ負担が無い
+# - 書き出し形式: スパン一覧のJSON / Chromeのトレース形式(chrome://tracing・Perfetto) / Prometheusのテキスト形式
+# 例: TRACE_OUTPUT=trace.trace.json python sctest.py   (終了時に Chrome トレース形式で保存)
+#     TRACE_OUTPUT=phases.prom python batch_crawl.py urls.txt
+
+# 入れ子のスタックをスレッド・asyncioのタスクごとに分けるため
+import contextvars
+# 結果の書き出し用
+import json
+# 環境変数で有効にするため
+import os
+# 同時に複数スレッドから記録しても安全にするため
+import threading
+# 時間の計測用
+import time
+# プログラム終了時に書き出すため
+import atexit
+# ログ出力用
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _NoopSpan:
+    """無効なときに返す、何もしないスパン"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# 今開いているスパンの並び(外側から順のタプル)。threading.local だと同じスレッドで動く
+# asyncioのタスク同士が await のたびに混ざるので、タスクごとに分かれる ContextVar に置く
+_open_spans = contextvars.ContextVar('tracing_open_spans', default=())
+
+
+class Span:
+    """
+    計測した区間1つ分
+
+    Attributes:
+        name (str): 区間の名前(例: 'driver.get')
+        start (float): 開始時刻(トレーサー作成時からの秒数)
+        duration (float): かかった秒数
+        thread (int): 計測したスレッドのID
+        parent (str): 外側のスパンの名前(無ければNone)
+        attrs (dict): URLなどの付加情報
+    """
+
+    __slots__ = ('tracer', 'name', 'start', 'duration', 'thread', 'parent', 'attrs')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = 0.0
+        self.thread = threading.get_ident()
+        self.parent = None
+
+    def __enter__(self):
+        stack = _open_spans.get()
+        self.parent = next((span.name for span in reversed(stack) if span.tracer is self.tracer), None)
+        _open_spans.set(stack + (self,))
+        self.start = time.perf_counter() - self.tracer.origin
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.tracer.origin - self.start
+        # 一番上とは限らないので、このスパン自身を取り除く
+        _open_spans.set(tuple(span for span in _open_spans.get() if span is not self))
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._record(self)
+        return False
+
+    def set(self, **attrs):
+        """計測中に付加情報を追加する(例: 転送したバイト数)"""
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration': round(self.duration, 6),
+            'thread': self.thread,
+            'parent': self.parent,
+            'attrs': self.attrs,
+        }
+
+
+class Tracer:
+    """
+    スパンを集めて JSON / Chromeトレース / Prometheus 形式で書き出す
+
+    Args:
+        enabled (bool): Falseなら span() は何もしない
+
+    Example:
+        >>> tracer = Tracer(enabled=True)
+        >>> with tracer.span('driver.get', url=url):
+        ...     driver.get(url)
+        >>> tracer.write('trace.trace.json')
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def span(self, name, **attrs):
+        """
+        with文で囲んだ区間を計測する
+
+        Args:
+            name (str): 区間の名前
+            **attrs: 付加情報
+
+        Returns:
+            Span: 計測用のコンテキスト(無効なら何もしないもの)
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """
+        区間の名前ごとの回数・合計・最大を返す
+
+        Returns:
+            dict: 名前 → {'count', 'total', 'max'}(合計の多い順)
+        """
+        with self._lock:
+            spans = list(self.spans)
+        result = {}
+        for span in spans:
+            entry = result.setdefault(span.name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += span.duration
+            entry['max'] = max(entry['max'], span.duration)
+        return dict(sorted(result.items(), key=lambda item: item[1]['total'], reverse=True))
+
+    def to_json(self):
+        """
+        スパン一覧を返す
+
+        Returns:
+            dict: spans(開始順)と summary
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        return {'spans': [span.to_dict() for span in spans], 'summary': self.summary()}
+
+    def to_chrome_trace(self):
+        """
+        Chromeのトレース形式(chrome://tracing・Perfettoで開ける)を返す
+
+        Returns:
+            dict: traceEvents(完了イベント 'X'。時刻はマイクロ秒)
+        """
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': round(span.start * 1e6, 1),
+            'dur': round(span.duration * 1e6, 1),
+            'pid': pid,
+            'tid': span.thread,
+            'args': span.attrs,
+        } for span in spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_prometheus(self, metric='analysis_phase_seconds'):
+        """
+        Prometheusのテキスト形式を返す(区間ごとの合計秒数・回数・最大)
+
+        Args:
+            metric (str): メトリクス名
+
+        Returns:
+            str: テキスト形式のメトリクス
+        """
+        lines = [
+            f'# HELP {metric} Time spent in each analysis phase.',
+            f'# TYPE {metric} summary',
+        ]
+        for name, entry in self.summary().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{metric}_sum{{phase="{label}"}} {entry["total"]:.6f}')
+            lines.append(f'{metric}_count{{phase="{label}"}} {entry["count"]}')
+        lines.append(f'# HELP {metric}_max Longest single run of each analysis phase.')
+        lines.append(f'# TYPE {metric}_max gauge')
+        for name, entry in self.summary().items():
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{metric}_max{{phase="{label}"}} {entry["max"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        拡張子に合わせた形式で書き出す
+
+        - .prom        : Prometheusのテキスト形式
+        - .trace.json  : Chromeのトレース形式
+        - それ以外     : スパン一覧のJSON
+
+        Args:
+            path (str): 出力先
+        """
+        if path.endswith('.prom'):
+            text = self.to_prometheus()
+        elif path.endswith('.trace.json'):
+            text = json.dumps(self.to_chrome_trace(), ensure_ascii=False)
+        else:
+            text = json.dumps(self.to_json(), ensure_ascii=False, indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        logger.info(f"計測結果を保存しました: {path} ({len(self.spans)}区間)")
+
+
+# プログラム全体で共有するトレーサー(TRACE_OUTPUT があれば有効)
+_default_tracer = Tracer(enabled=bool(os.environ.get('TRACE_OUTPUT')))
+
+
+def _write_default_trace():
+    """終了時に TRACE_OUTPUT へ書き出す"""
+    if _default_tracer.spans:
+        _default_tracer.write(os.environ['TRACE_OUTPUT'])
+
+
+if _default_tracer.enabled:
+    atexit.register(_write_default_trace)
+
+
+def get_tracer():
+    """
+    共有のトレーサーを返す
+
+    Returns:
+        Tracer: 環境変数 TRACE_OUTPUT があれば有効なトレーサー
+    """
+    return _default_tracer
+
+
+def span(name, **attrs):
+    """
+    共有のトレーサーで区間を計測する(get_tracer().span() の短縮形)
+
+    Args:
+        name (str): 区間の名前
+        **attrs: 付加情報
+
+    Returns:
+        Span: 計測用のコンテキスト(無効なら何もしないもの)
+    """
+    if not _default_tracer.enabled:
+        return _NOOP_SPAN
+    return Span(_default_tracer, name, attrs)